@@ -0,0 +1,503 @@
+#!/usr/local/bin/python
+
+'''
+Usage:
+  benchmark.py nnf [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py predicates [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py depth [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py scheduler [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py branching [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py backjump [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py records [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py states [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py successors [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py contract [--depth=<depth>...] [--repeat=<repeat>]
+  benchmark.py -h | --help
+
+  Micro benchmarks for the formula and tableau engines
+
+Options:
+    -h --help  Show this screen.
+    --depth=<depth>  Nesting depth of the generated formulae
+                     (nnf and predicates: 10 25 50 75 100, depth: 100 1000 10000 30000,
+                     scheduler: 2 4 6 8 10, branching: 4 6 8 10, backjump: 4 8 12 16,
+                     records: 2 4 6 8 10, states: 1 2 3,
+                     successors: 1000 2000 4000 8000, contract: 250 500 1000)
+    --repeat=<repeat>  Number of runs per measurement, the best one is reported [default: 5]
+
+'''
+
+import sys
+import timeit
+
+from docopt import docopt
+
+import formula_utils as FormulaUtils
+import graph as Graph
+import legacy_formula_utils as LegacyFormulaUtils
+import tableau as Tableau
+from scheduler import BETA_STRATEGIES
+from stategraph import StateGraph
+
+
+__author__ = 'thiagovieira'
+
+PREDICATES = ['is_unary', 'is_binary', 'is_atom', 'is_false', 'is_negation', 'is_knowledge',
+              'is_always', 'is_eventually', 'is_next', 'is_conjuction', 'is_disjunction', 'is_until',
+              'is_unless']
+BINARY_OPERATORS = ['->', '^', 'v', 'U', 'W']
+UNARY_OPERATORS = ['~', 'G', 'F', 'N', 'k1']
+DEFAULT_DEPTHS = {'nnf': [10, 25, 50, 75, 100], 'predicates': [10, 25, 50, 75, 100],
+                  'depth': [100, 1000, 10000, 30000], 'scheduler': [2, 4, 6, 8, 10],
+                  'branching': [4, 6, 8, 10], 'backjump': [4, 8, 12, 16], 'records': [2, 4, 6, 8, 10],
+                  'states': [1, 2, 3], 'successors': [1000, 2000, 4000, 8000],
+                  'contract': [250, 500, 1000]}
+
+
+def build_deep_formula(depth):
+    '''
+    Right nested formula alternating binary and negated/modal unary operators,
+    e.g. ~(p0 -> G(p1 ^ ~(p2 v ...)))
+    :param depth: Int nesting depth of the formula
+    :return: Formula interned formula
+    '''
+    parsetree_list = FormulaUtils.make_atom('p' + str(depth))
+    for level in reversed(range(depth)):
+        if level % 2:
+            parsetree_list = FormulaUtils.make_unary(UNARY_OPERATORS[level % len(UNARY_OPERATORS)],
+                                                     parsetree_list)
+        else:
+            parsetree_list = FormulaUtils.make_binary(FormulaUtils.make_atom('p' + str(level)),
+                                                      BINARY_OPERATORS[level % len(BINARY_OPERATORS)],
+                                                      parsetree_list)
+    return parsetree_list
+
+
+def build_next_chain(depth):
+    '''
+    :param depth: Int nesting depth
+    :return: Formula ~N~N...~Np0, every negation has to be pushed all the way down
+    '''
+    formula = FormulaUtils.make_atom('p0')
+    for _ in range(depth // 2):
+        formula = FormulaUtils.make_unary('~', FormulaUtils.make_unary('N', formula))
+    return formula
+
+
+def build_disjunction_chain(depth):
+    '''
+    Until chains are not used here, their NNF repeats the right operand, so the printed formula
+    (and the sort order built from it) grows exponentially with the depth
+    :param depth: Int nesting depth
+    :return: Formula ~(p0 v ~(p1 v ~(... v p<depth>))), right nested
+    '''
+    formula = FormulaUtils.make_atom('p' + str(depth))
+    for level in reversed(range(depth // 2)):
+        formula = FormulaUtils.make_unary('~', FormulaUtils.make_binary(
+            FormulaUtils.make_atom('p' + str(level)), 'v', formula))
+    return formula
+
+
+def build_implication_chain(depth):
+    '''
+    :param depth: Int nesting depth
+    :return: Formula p0 -> (q0 ^ (p1 -> (q1 ^ ...)))
+    '''
+    formula = FormulaUtils.make_atom('r0')
+    for level in reversed(range(depth // 2)):
+        formula = FormulaUtils.make_binary(FormulaUtils.make_atom('q' + str(level)), '^', formula)
+        formula = FormulaUtils.make_binary(FormulaUtils.make_atom('p' + str(level)), '->', formula)
+    return formula
+
+
+def build_tableau_input(size):
+    '''
+    Conjunction of size disjunctions and eventualities over fresh atoms, every one of them splits
+    all the branches, the last conjunct asks every knowledge subformula to be decided
+    :param size: Int number of conjuncts
+    :return: List formula list for tableau.get_tableaux
+    '''
+    formula = FormulaUtils.make_unary('k1', FormulaUtils.make_binary(
+        FormulaUtils.make_unary('k1', FormulaUtils.make_atom('r0')), 'v', FormulaUtils.make_atom('r1')))
+    for level in range(size):
+        if level % 2:
+            conjunct = FormulaUtils.make_unary('F', FormulaUtils.make_atom('p' + str(level)))
+        else:
+            conjunct = FormulaUtils.make_binary(FormulaUtils.make_atom('p' + str(level)), 'v',
+                                                FormulaUtils.make_unary('G', FormulaUtils.make_atom('q' + str(level))))
+        formula = FormulaUtils.make_binary(conjunct, '^', formula)
+    return [FormulaUtils.normalize_formula(formula)]
+
+
+def build_graph_input(size):
+    '''
+    size eventualities F(p<i> -> q) in front of G(p0 -> q), the successors of their states hold the same
+    formulae in many orders
+    :param size: Int number of eventualities
+    :return: List formula list for tableau.get_tableaux
+    '''
+    q = FormulaUtils.make_atom('q')
+    formula = FormulaUtils.make_unary('G', FormulaUtils.make_binary(FormulaUtils.make_atom('p0'), '->', q))
+    for level in range(1, size + 1):
+        formula = FormulaUtils.make_binary(FormulaUtils.make_unary('F', FormulaUtils.make_binary(
+            FormulaUtils.make_atom('p' + str(level)), '->', q)), '^', formula)
+    return [FormulaUtils.normalize_formula(formula)]
+
+
+def build_next_timeline(size):
+    '''
+    :param size: Int number of next operators
+    :return: List formula list for tableau.get_tableaux, N(p0 ^ N(p1 ^ ... N(p<size-1> ^ q))), a graph
+    of size + 1 states, each one the next of the one before
+    '''
+    formula = FormulaUtils.make_atom('q')
+    for level in reversed(range(size)):
+        formula = FormulaUtils.make_unary('N', FormulaUtils.make_binary(FormulaUtils.make_atom('p' + str(level)), '^',
+                                                                        formula))
+    return [FormulaUtils.normalize_formula(formula)]
+
+
+def build_dead_timeline(size):
+    '''
+    :param size: Int number of next operators
+    :return: List formula list for tableau.get_tableaux, N(p0 ^ N(p1 ^ ... N(p<size-1> ^ N false))), the
+    last of its size + 1 states has no next successor, so contracting the graph removes them all, last first
+    '''
+    formula = FormulaUtils.make_unary('N', FormulaUtils.make_atom('false'))
+    for level in reversed(range(size)):
+        formula = FormulaUtils.make_unary('N', FormulaUtils.make_binary(FormulaUtils.make_atom('p' + str(level)), '^',
+                                                                        formula))
+    return [FormulaUtils.normalize_formula(formula)]
+
+
+def build_clause_ring(size):
+    '''
+    Binary clauses over a ring of atoms, each one sharing atoms with its neighbours, so the syntactic
+    disjunction rule keeps rebuilding the same sub-branches
+    :param size: Int number of atom pairs
+    :return: List formula list for tableau.get_tableaux, (p0 v q0) ^ (~p0 v ~q1) ^ ... ^ (~p<size-1> v ~q0)
+    '''
+    formula = FormulaUtils.make_atom('r0')
+    for level in range(size):
+        p, q = FormulaUtils.make_atom('p' + str(level)), FormulaUtils.make_atom('q' + str(level))
+        next_q = FormulaUtils.make_atom('q' + str((level + 1) % size))
+        formula = FormulaUtils.make_binary(FormulaUtils.make_binary(p, 'v', q), '^', formula)
+        formula = FormulaUtils.make_binary(FormulaUtils.make_binary(FormulaUtils.get_negation(p), 'v',
+                                                                    FormulaUtils.get_negation(next_q)), '^', formula)
+    return [FormulaUtils.normalize_formula(formula)]
+
+
+def build_unsat_core_input(size):
+    '''
+    size disjunctions over fresh atoms in front of the four clauses over s0 and s1, which no branch
+    satisfies. Without backjumping the clauses are refuted again under every choice of the disjunctions
+    :param size: Int number of disjunctions
+    :return: List formula list for tableau.get_tableaux
+    '''
+    s0, s1 = FormulaUtils.make_atom('s0'), FormulaUtils.make_atom('s1')
+    not_s0, not_s1 = FormulaUtils.get_negation(s0), FormulaUtils.get_negation(s1)
+    formula = FormulaUtils.make_binary(FormulaUtils.make_binary(not_s0, 'v', not_s1), '^',
+                                       FormulaUtils.make_binary(s0, 'v', not_s1))
+    formula = FormulaUtils.make_binary(FormulaUtils.make_binary(not_s0, 'v', s1), '^', formula)
+    formula = FormulaUtils.make_binary(FormulaUtils.make_binary(s0, 'v', s1), '^', formula)
+    for level in range(size):
+        formula = FormulaUtils.make_binary(FormulaUtils.make_binary(
+            FormulaUtils.make_atom('p' + str(level)), 'v', FormulaUtils.make_atom('q' + str(level))), '^', formula)
+    return [FormulaUtils.normalize_formula(formula)]
+
+
+def traverse_recursive(formula):
+    '''
+    :param formula: Formula interned formula
+    :return: Formula normalized formula, after also listing its subformulae and symbols
+    '''
+    FormulaUtils.clear_normalization_caches()
+    normalized = FormulaUtils.sort_recursive(FormulaUtils.get_NNF_recursive(
+        FormulaUtils.remove_implications_recursive(formula)))
+    FormulaUtils.get_subformulae_recursive(normalized, [])
+    list(FormulaUtils.flatten(normalized))
+    return normalized
+
+
+def traverse_iterative(formula):
+    '''
+    :param formula: Formula interned formula
+    :return: Formula normalized formula, after also listing its subformulae and symbols
+    '''
+    FormulaUtils.clear_normalization_caches()
+    normalized = FormulaUtils.sort_iterative(FormulaUtils.get_NNF_iterative(
+        FormulaUtils.remove_implications_iterative(formula)))
+    FormulaUtils.get_subformulae_iterative(normalized, [])
+    list(FormulaUtils.flatten_iterative(normalized))
+    return normalized
+
+
+def normalize_with(module, parsetree_list):
+    '''
+    :param module: Module providing remove_implications_recursive, get_NNF_recursive and sort_recursive
+    :param parsetree_list: List parsetree list or Formula
+    :return: List parsetree list or Formula with no implications, in NNF and sorted
+    '''
+    no_implications = module.remove_implications_recursive(parsetree_list)
+    return module.sort_recursive(module.get_NNF_recursive(no_implications))
+
+
+def normalize_cold(parsetree_list):
+    '''
+    Structural normalization with empty caches, so the engine itself is measured
+    :param parsetree_list: Formula interned formula
+    :return: Formula normalized formula
+    '''
+    FormulaUtils.clear_normalization_caches()
+    return normalize_with(FormulaUtils, parsetree_list)
+
+
+def best_time(func, repeat):
+    '''
+    :param func: Callable with no arguments to be measured
+    :param repeat: Int number of runs
+    :return: Float best wall time in seconds
+    '''
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def run_nnf_benchmark(depths, repeat):
+    print 'depth  string (s)  structural (s)  speedup'
+    for depth in depths:
+        formula = build_deep_formula(depth)
+        parsetree_list = FormulaUtils.formula_to_parsetree_list(formula)
+        structural_time = best_time(lambda: normalize_cold(formula), repeat)
+        try:
+            assert normalize_with(LegacyFormulaUtils, parsetree_list) == \
+                FormulaUtils.formula_to_parsetree_list(normalize_with(FormulaUtils, formula))
+            legacy_time = best_time(lambda: normalize_with(LegacyFormulaUtils, parsetree_list), repeat)
+        except MemoryError:  # literal_eval hits the parser stack limit on deeply nested strings
+            print '{0:5d}  {1:>10}  {2:14.4f}  {3:>7}'.format(depth, 'overflow', structural_time, '-')
+            continue
+        print '{0:5d}  {1:10.4f}  {2:14.4f}  {3:6.1f}x'.format(depth, legacy_time, structural_time,
+                                                              legacy_time / structural_time)
+
+
+def classify_all(module, formulae):
+    '''
+    Run every classification tableau.py and graph.py rely on over all formulae
+    :param module: Module providing the is_* predicates
+    :param formulae: List of parsetree lists or Formulas
+    '''
+    predicates = [getattr(module, name) for name in PREDICATES]
+    is_negated_unary_or_atom = module.is_negated_unary_or_atom
+    for formula in formulae:
+        for predicate in predicates:
+            predicate(formula)
+        is_negated_unary_or_atom(formula, 'atom')
+        is_negated_unary_or_atom(formula, 'knowledge')
+
+
+def run_predicates_benchmark(depths, repeat):
+    print 'formulae  string scan (s)  tagged (s)  speedup'
+    for depth in depths:
+        formula = FormulaUtils.remove_implications_recursive(build_deep_formula(depth))
+        formulae = FormulaUtils.get_subformulae_recursive(FormulaUtils.get_NNF_recursive(formula), [])
+        parsetree_lists = [FormulaUtils.formula_to_parsetree_list(f) for f in formulae]
+        for name in PREDICATES:
+            assert [getattr(LegacyFormulaUtils, name)(f) for f in parsetree_lists] == \
+                [getattr(FormulaUtils, name)(f) for f in formulae]
+        legacy_time = best_time(lambda: classify_all(LegacyFormulaUtils, parsetree_lists), repeat)
+        tagged_time = best_time(lambda: classify_all(FormulaUtils, formulae), repeat)
+        print '{0:8d}  {1:15.4f}  {2:10.4f}  {3:6.1f}x'.format(len(formulae), legacy_time, tagged_time,
+                                                              legacy_time / tagged_time)
+
+
+def run_depth_benchmark(depths, repeat):
+    print 'family        depth  recursive (s)  iterative (s)'
+    for name, build in [('next chain', build_next_chain), ('disjunctions', build_disjunction_chain),
+                        ('implications', build_implication_chain)]:
+        for depth in depths:
+            formula = build(depth)
+            iterative_time = best_time(lambda: traverse_iterative(formula), repeat)
+            try:
+                assert traverse_recursive(formula) is traverse_iterative(formula)
+                recursive_time = '{0:13.4f}'.format(best_time(lambda: traverse_recursive(formula), repeat))
+            except RuntimeError:  # maximum recursion depth exceeded
+                recursive_time = '{0:>13}'.format('overflow')
+            print '{0:13} {1:5d}  {2}  {3:13.4f}'.format(name, depth, recursive_time, iterative_time)
+
+
+def run_scheduler_benchmark(sizes, repeat):
+    print 'size  dict branches   scans  dict (s)  worklist branches  rules  worklist (s)'
+    for size in sizes:
+        formula_list = build_tableau_input(size)
+        dict_stats, worklist_stats = {}, {}
+        dict_branches = len(Tableau.get_tableaux(formula_list, False, stats=dict_stats))
+        worklist_branches = len(Tableau.get_tableaux(formula_list, False, 'worklist', stats=worklist_stats))
+        dict_time = best_time(lambda: Tableau.get_tableaux(formula_list, False), repeat)
+        worklist_time = best_time(lambda: Tableau.get_tableaux(formula_list, False, 'worklist'), repeat)
+        print '{0:4d}  {1:13d}  {2:6d}  {3:8.4f}  {4:17d}  {5:5d}  {6:11.4f}'.format(
+            size, dict_branches, dict_stats['formula scans'], dict_time, worklist_branches,
+            worklist_stats['rule applications'], worklist_time)
+
+
+def run_branching_benchmark(sizes, repeat):
+    print 'family       size  strategy          semantic  branches  open  time (s)'
+    for name, build in [('splits', build_tableau_input), ('clause ring', build_clause_ring)]:
+        for size in sizes:
+            formula_list = build(size)
+            for strategy in BETA_STRATEGIES:
+                for semantic in [False, True]:
+                    stats = {}
+                    tableaux = Tableau.get_tableaux(formula_list, False, 'worklist', stats=stats, strategy=strategy,
+                                                    semantic=semantic)
+                    run_time = best_time(lambda: Tableau.get_tableaux(formula_list, False, 'worklist',
+                                                                      strategy=strategy, semantic=semantic), repeat)
+                    print '{0:12} {1:4d}  {2:16}  {3:8}  {4:8d}  {5:4d}  {6:8.4f}'.format(
+                        name, size, strategy, str(semantic), stats['branches'], len(tableaux or []), run_time)
+
+
+def run_backjump_benchmark(sizes, repeat):
+    print 'size  branches  time (s)  backjumping branches  backjumped  time (s)'
+    for size in sizes:
+        formula_list = build_unsat_core_input(size)
+        stats, backjump_stats = {}, {}
+        assert Tableau.get_tableaux(formula_list, False, 'worklist', stats=stats) == \
+            Tableau.get_tableaux(formula_list, False, 'worklist', stats=backjump_stats, backjump=True)
+        run_time = best_time(lambda: Tableau.get_tableaux(formula_list, False, 'worklist'), repeat)
+        backjump_time = best_time(lambda: Tableau.get_tableaux(formula_list, False, 'worklist', backjump=True),
+                                  repeat)
+        print '{0:4d}  {1:8d}  {2:8.4f}  {3:20d}  {4:10d}  {5:8.4f}'.format(
+            size, stats['branches'], run_time, backjump_stats['branches'], backjump_stats['backjumped branches'],
+            backjump_time)
+
+
+def get_entries_size(entries):
+    '''
+    :param entries: List branch or state entries, records or dicts
+    :return: Int bytes taken by the entries themselves (the formulae are shared and not counted)
+    '''
+    return sum(sys.getsizeof(entry) for entry in entries)
+
+
+def run_records_benchmark(sizes, repeat):
+    print 'size  branches  dict B/branch  record B/branch  states  dict B/node  record B/node  ' \
+          'dict copy (s)  record copy (s)'
+    for size in sizes:
+        tableaux = Tableau.get_tableaux(build_tableau_input(size), False)
+        branch_entries = [tableau['formulae'] for tableau in tableaux]
+        branch_dicts = [[entry.to_dict() for entry in entries] for entries in branch_entries]
+        states = Graph.build_states(tableaux)[0]
+        state_dicts = [[entry.to_dict() for entry in state] for state in states]
+        dict_branch = sum(map(get_entries_size, branch_dicts)) / len(tableaux)
+        record_branch = sum(map(get_entries_size, branch_entries)) / len(tableaux)
+        dict_node = sum(map(get_entries_size, state_dicts)) / len(states)
+        record_node = sum(map(get_entries_size, states)) / len(states)
+        dict_copy = best_time(lambda: [[entry.copy() for entry in entries] for entries in branch_dicts], repeat)
+        record_copy = best_time(lambda: [[entry.copy() for entry in entries] for entries in branch_entries], repeat)
+        print '{0:4d}  {1:8d}  {2:13d}  {3:15d}  {4:6d}  {5:11d}  {6:13d}  {7:13.4f}  {8:15.4f}'.format(
+            size, len(tableaux), dict_branch, record_branch, len(states), dict_node, record_node, dict_copy,
+            record_copy)
+
+
+def build_state_graph(formula_list, identity):
+    '''
+    :param formula_list: List formula list for tableau.get_tableaux
+    :param identity: String one of stategraph.IDENTITIES
+    :return: StateGraph contracted graph of formula_list
+    '''
+    Graph.clear_successor_caches()  # every run builds its successors
+    states, agents_list = Graph.build_states(Tableau.get_tableaux(formula_list, False))
+    G = StateGraph(agents_list=agents_list, identity=identity)
+    for state in states:
+        Graph.add_state(G, state)
+    Graph.build_successors(G, False)
+    G.modified = True
+    return Graph.contract_graph(G, False)
+
+
+def run_states_benchmark(sizes, repeat):
+    print 'size  name states  nodes  time (s)  fingerprint states  merged  nodes  time (s)'
+    for size in sizes:
+        formula_list = build_graph_input(size)
+        named = build_state_graph(formula_list, 'name')
+        fingerprinted = build_state_graph(formula_list, 'fingerprint')
+        name_time = best_time(lambda: build_state_graph(formula_list, 'name'), repeat)
+        fingerprint_time = best_time(lambda: build_state_graph(formula_list, 'fingerprint'), repeat)
+        print '{0:4d}  {1:11d}  {2:5d}  {3:8.4f}  {4:18d}  {5:6d}  {6:5d}  {7:8.4f}'.format(
+            size, len(named.states), len(named), name_time, len(fingerprinted.states), fingerprinted.merged,
+            len(fingerprinted), fingerprint_time)
+
+
+def build_successor_graph(formula_list):
+    '''
+    :param formula_list: List formula list for tableau.get_tableaux
+    :return: StateGraph graph of formula_list with all its successors built, not contracted
+    '''
+    Graph.clear_successor_caches()
+    states, agents_list = Graph.build_states(Tableau.get_tableaux(formula_list, False))
+    G = StateGraph(agents_list=agents_list)
+    for state in states:
+        Graph.add_state(G, state)
+    return Graph.build_successors(G, False)
+
+
+def run_successors_benchmark(sizes, repeat):
+    print 'size  states  time (s)  us/state'
+    for size in sizes:
+        formula_list = build_next_timeline(size)
+        states = len(build_successor_graph(formula_list))
+        run_time = best_time(lambda: build_successor_graph(formula_list), repeat)
+        print '{0:4d}  {1:6d}  {2:8.4f}  {3:8.1f}'.format(size, states, run_time, run_time * 1e6 / states)
+
+
+def time_contract(formula_list, engine, repeat):
+    '''
+    :param formula_list: List formula list for tableau.get_tableaux
+    :param engine: String one of graph.CONTRACT_ENGINES
+    :param repeat: Int number of runs
+    :return: Tuple (dict contract counters, float best wall time in seconds of the contraction alone)
+    '''
+    graphs = []
+    stats = {}
+    Graph.contract_graph(build_successor_graph(formula_list), False, engine=engine, stats=stats)
+    run_time = min(timeit.repeat(lambda: Graph.contract_graph(graphs.pop(), False, engine=engine),
+                                 lambda: graphs.append(build_successor_graph(formula_list)), number=1, repeat=repeat))
+    return stats, run_time
+
+
+def run_contract_benchmark(sizes, repeat):
+    print 'size  states  removed  restart checks  time (s)  incremental checks  time (s)'
+    for size in sizes:
+        formula_list = build_dead_timeline(size)
+        restart_stats, restart_time = time_contract(formula_list, 'restart', repeat)
+        incremental_stats, incremental_time = time_contract(formula_list, 'incremental', repeat)
+        assert restart_stats['removed states'] == incremental_stats['removed states']
+        print '{0:4d}  {1:6d}  {2:7d}  {3:14d}  {4:8.4f}  {5:18d}  {6:8.4f}'.format(
+            size, size + 1, incremental_stats['removed states'], restart_stats['contract checks'], restart_time,
+            incremental_stats['contract checks'], incremental_time)
+
+
+if __name__ == '__main__':
+    args = docopt(__doc__)
+    command = [name for name in DEFAULT_DEPTHS if args[name]][0]
+    depths = [int(depth) for arg in args['--depth'] for depth in arg.split()] or DEFAULT_DEPTHS[command]
+    repeat = int(args['--repeat'])
+    if args['nnf']:
+        sys.setrecursionlimit(100000)
+        run_nnf_benchmark(depths, repeat)
+    elif args['predicates']:
+        sys.setrecursionlimit(100000)
+        run_predicates_benchmark(depths, repeat)
+    elif args['depth']:
+        run_depth_benchmark(depths, repeat)  # recursion limit left as is, that is the point
+    elif args['scheduler']:
+        run_scheduler_benchmark(depths, repeat)
+    elif args['branching']:
+        run_branching_benchmark(depths, repeat)
+    elif args['backjump']:
+        run_backjump_benchmark(depths, repeat)
+    elif args['records']:
+        run_records_benchmark(depths, repeat)
+    elif args['states']:
+        run_states_benchmark(depths, repeat)
+    elif args['successors']:
+        run_successors_benchmark(depths, repeat)
+    elif args['contract']:
+        run_contract_benchmark(depths, repeat)
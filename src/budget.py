@@ -0,0 +1,101 @@
+import resource
+import time
+
+
+__author__ = 'thiagovieira'
+
+'''
+Resource budgets of a tableau or graph construction. The engines spend branches and graph nodes on the
+budget as they build them and check it as they go, when a limit is reached BudgetExceeded stops the run
+'''
+
+MEMORY_CHECK_INTERVAL = 64  # checks between two readings of the resident memory
+
+
+class BudgetExceeded(Exception):
+    '''
+    reason is the limit that was reached ('time', 'branches', 'nodes' or 'memory') and usage the
+    budget usage at that moment, see Budget.get_usage
+    '''
+    def __init__(self, reason, usage):
+        Exception.__init__(self, 'budget exceeded: ' + reason)
+        self.reason = reason
+        self.usage = usage
+
+
+class Budget(object):
+    '''
+    Limits of a run, None for no limit: seconds of wall time, branches built (every pre-tableau of the
+    run included), graph nodes and megabytes of resident memory. The clock starts when the budget is built
+    '''
+
+    def __init__(self, seconds=None, branches=None, nodes=None, memory=None):
+        self.seconds = seconds
+        self.max_branches = branches
+        self.max_nodes = nodes
+        self.memory = memory
+        self.branches = 0
+        self.nodes = 0
+        self.checks = 0
+        self.start = time.time()
+
+    def spend(self, branches=0, nodes=0):
+        '''
+        :param branches: Int branches just built
+        :param nodes: Int graph nodes just added
+        '''
+        self.branches += branches
+        self.nodes += nodes
+        self.check()
+
+    def check(self):
+        '''
+        Raise BudgetExceeded if a limit is reached, the memory is only read every MEMORY_CHECK_INTERVAL checks
+        '''
+        self.checks += 1
+        if self.max_branches is not None and self.branches > self.max_branches:
+            raise BudgetExceeded('branches', self.get_usage())
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded('nodes', self.get_usage())
+        if self.seconds is not None and time.time() - self.start > self.seconds:
+            raise BudgetExceeded('time', self.get_usage())
+        if self.memory is not None and self.checks % MEMORY_CHECK_INTERVAL == 1 and get_memory() > self.memory:
+            raise BudgetExceeded('memory', self.get_usage())
+
+    def get_usage(self):
+        '''
+        :return: Dict seconds, branches, nodes and memory (MB) used so far
+        '''
+        return {'seconds': time.time() - self.start, 'branches': self.branches, 'nodes': self.nodes,
+                'memory': get_memory()}
+
+
+def get_memory():
+    '''
+    :return: Float resident memory of the process in MB, the peak one where /proc is not available
+    '''
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 1048576.0
+    except IOError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KB on Linux
+
+
+def get_result(budget, stats, error=None):
+    '''
+    :param budget: Budget of the run
+    :param stats: Dict counters of the run, as far as it went
+    :param error: BudgetExceeded if the run was stopped, None if it finished
+    :return: Dict 'status' 'done' or 'unknown', 'reason' None or the limit reached, 'stats' and 'usage' of the budget
+    '''
+    return {'status': 'unknown' if error else 'done', 'reason': error and error.reason, 'stats': stats,
+            'usage': error.usage if error else budget.get_usage()}
+
+
+def format_usage(usage):
+    '''
+    :param usage: Dict budget usage, see Budget.get_usage
+    :return: String one line summary of the usage
+    '''
+    return 'used: %.3fs, %d branches, %d nodes, %.1f MB' % (usage['seconds'], usage['branches'], usage['nodes'],
+                                                          usage['memory'])
@@ -0,0 +1,94 @@
+import cPickle
+import os
+import time
+import zlib
+
+
+__author__ = 'thiagovieira'
+
+'''
+Checkpoints of long tableau and graph runs. Every so often the engines save their state (the open
+branches still to expand, the visited flags, the graph built so far) to a file, a zlib compressed
+binary pickle behind a short header. A run started with resume takes the saved state back and goes
+on from there instead of building it again
+'''
+
+MAGIC = 'TBCK'
+VERSION = 1
+
+
+class Checkpoint(object):
+    '''
+    path is the checkpoint file and interval the seconds between two saves.
+    key tells which part of the run is being built (the index of the formula in a per line run), a
+    state is only restored for the same key and stage it was saved at, and only once.
+    saves counts the states written by this run and point is the (key, stage) the file holds
+    '''
+
+    def __init__(self, path, interval=60, resume=False):
+        self.path = path
+        self.interval = interval
+        self.key = None
+        self.saves = 0
+        self.last = time.time()
+        self.loaded = load_checkpoint(path) if resume else None
+        self.point = self.get_resume_point()
+
+    def get_resume_point(self):
+        '''
+        :return: Tuple (key, stage) the loaded state was saved at, None if there is none left to restore
+        '''
+        return self.loaded and (self.loaded['key'], self.loaded['stage'])
+
+    def restore(self, stage):
+        '''
+        :param stage: String 'tableaux', 'graph', 'stopped' or 'done'
+        :return: the state saved for the current key at stage, None if there is none
+        '''
+        if self.loaded is not None and self.loaded['key'] == self.key and self.loaded['stage'] == stage:
+            state = self.loaded['state']
+            self.loaded = None
+            return state
+        return None
+
+    def is_due(self):
+        '''
+        :return: Boolean True if interval seconds went by since the last save
+        '''
+        return time.time() - self.last >= self.interval
+
+    def save(self, stage, state):
+        '''
+        Write the file at once: to a temporary file first, renamed over the previous checkpoint, so an
+        interruption while saving leaves the previous one
+        :param stage: String 'tableaux', 'graph', 'stopped' or 'done'
+        :param state: picklable state of the stage
+        '''
+        data = zlib.compress(cPickle.dumps({'key': self.key, 'stage': stage, 'state': state},
+                                           cPickle.HIGHEST_PROTOCOL))
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'wb') as checkpoint_file:
+            checkpoint_file.write(MAGIC + chr(VERSION) + data)
+        os.rename(temporary_path, self.path)
+        self.saves += 1
+        self.last = time.time()
+        self.point = (self.key, stage)
+
+    def remove(self):
+        '''
+        Delete the file, once every formula of the run is done within its budget
+        '''
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_checkpoint(path):
+    '''
+    :param path: String checkpoint file written by Checkpoint.save
+    :return: Dict 'key', 'stage' and 'state' saved
+    '''
+    with open(path, 'rb') as checkpoint_file:
+        data = checkpoint_file.read()
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != chr(VERSION):
+        raise ValueError('not a tableau checkpoint: ' + path)
+    return cPickle.loads(zlib.decompress(data[len(MAGIC) + 1:]))
@@ -0,0 +1,174 @@
+from formula_utils import *
+from records import *
+
+
+__author__ = 'thiagovieira'
+
+'''
+Branches indexed by the closure of the input formulae. Every formula that shows up on a branch gets
+an integer id the first time it is seen, so a branch is a bit mask over those ids: membership and
+duplicate checks are bit tests and a split copies integers instead of a list of formula dicts.
+Literals (atoms and knowledge formulae) get two consecutive ids, the positive one first and its
+negation the next, so a branch holds p and ~p exactly when mask & (mask >> 1) has the bit of p set
+(literal_mask keeps only the bits of positive literals, the parity of the ids does not matter)
+'''
+
+
+class Closure(object):
+    '''
+    formulae maps an id to its formula and ids a formula to its id.
+    literal_mask has the bit of every positive literal and false_mask the bit of false
+    '''
+
+    def __init__(self):
+        self.formulae = []
+        self.ids = {}
+        self.literal_mask = 0
+        self.false_mask = 0
+
+    def __len__(self):
+        return len(self.formulae)
+
+    def _add(self, formula):
+        formula_id = len(self.formulae)
+        self.formulae.append(formula)
+        self.ids[formula] = formula_id
+        if is_false(formula):
+            self.false_mask |= 1 << formula_id
+        return formula_id
+
+    def get_id(self, formula):
+        '''
+        :param formula: Formula interned formula
+        :return: Int id of formula, assigned on first use
+        '''
+        formula_id = self.ids.get(formula)
+        if formula_id is None:
+            if is_atom(formula) or is_knowledge(formula):
+                formula_id = self._add(formula)
+                self.literal_mask |= 1 << formula_id
+                self._add(get_negation(formula))
+            elif is_negated_unary_or_atom(formula, 'atom') or is_negated_unary_or_atom(formula, 'knowledge'):
+                self.get_id(formula[1])
+                formula_id = self.ids[formula]
+            else:
+                formula_id = self._add(formula)
+        return formula_id
+
+    def get_formula(self, formula_id):
+        '''
+        :param formula_id: Int id given by get_id
+        :return: Formula formula with that id
+        '''
+        return self.formulae[formula_id]
+
+    def is_closed(self, mask):
+        '''
+        :param mask: Int branch mask
+        :return: Boolean True if the branch holds false or a literal together with its negation
+        '''
+        return (mask & (mask >> 1) & self.literal_mask) != 0 or (mask & self.false_mask) != 0
+
+
+class BitsetBranch(object):
+    '''
+    mask holds the ids on the branch and order the same ids in insertion order, the visited flags of
+    the dict tableau are the masks alpha_visited, beta_visited and sub_complete_visited
+    '''
+    __slots__ = ('mask', 'order', 'alpha_visited', 'beta_visited', 'sub_complete_visited', 'was_modified')
+
+    def __init__(self):
+        self.mask = 0
+        self.order = []
+        self.alpha_visited = 0
+        self.beta_visited = 0
+        self.sub_complete_visited = 0
+        self.was_modified = True
+
+    def __contains__(self, formula_id):
+        return (self.mask >> formula_id) & 1 == 1
+
+    def add(self, formula_id):
+        '''
+        :param formula_id: Int id of a formula not on the branch yet
+        '''
+        self.mask |= 1 << formula_id
+        self.order.append(formula_id)
+
+    def copy(self):
+        '''
+        :return: BitsetBranch a new branch with the same formulae and flags
+        '''
+        branch = BitsetBranch()
+        branch.mask = self.mask
+        branch.order = list(self.order)
+        branch.alpha_visited = self.alpha_visited
+        branch.beta_visited = self.beta_visited
+        branch.sub_complete_visited = self.sub_complete_visited
+        branch.was_modified = self.was_modified
+        return branch
+
+    def get_order(self):
+        '''
+        :return: List ids on the branch in insertion order
+        '''
+        return self.order
+
+    def to_tableau(self, closure):
+        '''
+        :param closure: Closure the ids of the branch refer to
+        :return: Dict tableau dict structure, as built by tableau.get_tableaux
+        '''
+        formulae = []
+        for formula_id in self.get_order():
+            flags = ((self.alpha_visited >> formula_id) & 1) * ALPHA_VISITED | \
+                ((self.beta_visited >> formula_id) & 1) * BETA_VISITED | \
+                ((self.sub_complete_visited >> formula_id) & 1) * SUB_COMPLETE_VISITED
+            formulae.append(BranchEntry(closure.get_formula(formula_id), flags))
+        return {'formulae': formulae, 'index': set(entry.formula for entry in formulae), 'is_proper': True,
+                'was_modified': self.was_modified}
+
+
+class PersistentBranch(BitsetBranch):
+    '''
+    BitsetBranch whose order is a parent pointer chain (last id, chain of the previous ids), None when
+    empty. A copy shares the chain and the masks (Python ints are immutable), so a split is O(1) and
+    every id added to any branch is stored once
+    '''
+    __slots__ = ()
+
+    def __init__(self):
+        BitsetBranch.__init__(self)
+        self.order = None
+
+    def add(self, formula_id):
+        '''
+        :param formula_id: Int id of a formula not on the branch yet
+        '''
+        self.mask |= 1 << formula_id
+        self.order = (formula_id, self.order)
+
+    def copy(self):
+        '''
+        :return: PersistentBranch a new branch sharing the formulae and flags of this one
+        '''
+        branch = self.__class__.__new__(self.__class__)
+        branch.mask = self.mask
+        branch.order = self.order
+        branch.alpha_visited = self.alpha_visited
+        branch.beta_visited = self.beta_visited
+        branch.sub_complete_visited = self.sub_complete_visited
+        branch.was_modified = self.was_modified
+        return branch
+
+    def get_order(self):
+        '''
+        :return: List ids on the branch in insertion order
+        '''
+        order = []
+        chain = self.order
+        while chain is not None:
+            order.append(chain[0])
+            chain = chain[1]
+        order.reverse()
+        return order
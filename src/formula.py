@@ -0,0 +1,248 @@
+__author__ = 'thiagovieira'
+
+'''
+Hash-consed immutable formula nodes. Every structurally equal formula exists exactly once,
+so equality is an identity check and the hash is computed once, when the node is built.
+Nodes are indexed like the parsetree lists they replace: ['p0'], ['~', f] and
+[['binary', f, 'v', g]], so formula_utils predicates work on both representations
+'''
+
+# node kinds, one bit each so categories are masks
+PROP = 1 << 0
+TRUE = 1 << 1
+FALSE = 1 << 2
+NEGATION = 1 << 3
+KNOWLEDGE = 1 << 4
+NEXT = 1 << 5
+ALWAYS = 1 << 6
+EVENTUALLY = 1 << 7
+CONJUNCTION = 1 << 8
+DISJUNCTION = 1 << 9
+IMPLICATION = 1 << 10
+UNTIL = 1 << 11
+UNLESS = 1 << 12
+
+ATOM_KINDS = PROP | TRUE | FALSE
+UNARY_KINDS = NEGATION | KNOWLEDGE | NEXT | ALWAYS | EVENTUALLY
+BINARY_KINDS = CONJUNCTION | DISJUNCTION | IMPLICATION | UNTIL | UNLESS
+
+UNARY_OPERATOR_KINDS = {'~': NEGATION, 'N': NEXT, 'G': ALWAYS, 'F': EVENTUALLY}
+BINARY_OPERATOR_KINDS = {'^': CONJUNCTION, 'v': DISJUNCTION, '->': IMPLICATION, 'U': UNTIL,
+                         'W': UNLESS}
+
+_formula_table = {}  # interning table: node items -> node
+
+
+class Formula(object):
+    '''
+    Do not instantiate directly, use make_atom, make_unary and make_binary.
+    kind is the node kind tag, operator its main operator and agent the index i of a k<i> formula
+    '''
+    __slots__ = ('_items', '_hash', '_repr', 'kind', 'operator', 'agent')
+
+    def __init__(self, items, kind, operator, agent=None):
+        self._items = items
+        self._hash = hash(items)
+        self._repr = None
+        self.kind = kind
+        self.operator = operator
+        self.agent = agent
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        if self._repr is None:
+            self._repr = ''.join(iter_repr(self))
+        return self._repr
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return postfix_to_formula, (formula_to_postfix(self),)  # flat, deep formulae pickle too
+
+
+def _intern(items, kind, operator, agent=None):
+    '''
+    :param items: Tuple node items with children already interned
+    :param kind: Int node kind tag
+    :param operator: String main operator
+    :param agent: String agent index of a knowledge formula
+    :return: Formula the unique node with these items
+    '''
+    formula = _formula_table.get(items)
+    if formula is None:
+        formula = Formula(items, kind, operator, agent)
+        _formula_table[items] = formula
+    return formula
+
+
+def make_atom(symbol):
+    '''
+    :param symbol: String propositional symbol or boolean constant
+    :return: Formula interned atom
+    '''
+    if symbol == 'true':
+        kind = TRUE
+    elif symbol == 'false':
+        kind = FALSE
+    else:
+        kind = PROP
+    return _intern((symbol,), kind, symbol)
+
+
+def make_unary(operator, formula):
+    '''
+    :param operator: String unary operator ('~', 'N', 'F', 'G' or 'k<i>')
+    :param formula: Formula operand
+    :return: Formula interned unary formula
+    '''
+    if operator[0] == 'k':
+        return _intern((operator, formula), KNOWLEDGE, operator, operator[1:])
+    return _intern((operator, formula), UNARY_OPERATOR_KINDS[operator], operator)
+
+
+def make_binary(left, operator, right):
+    '''
+    :param left: Formula left operand
+    :param operator: String binary operator ('^', 'v', '->', 'U' or 'W')
+    :param right: Formula right operand
+    :return: Formula interned binary formula
+    '''
+    return _intern((('binary', left, operator, right),), BINARY_OPERATOR_KINDS[operator], operator)
+
+
+def parsetree_list_to_formula(parsetree_list):
+    '''
+    :param parsetree_list: List tree representation of the string formula (a Formula is returned as is)
+    :return: Formula interned node equivalent to parsetree_list
+    '''
+    if isinstance(parsetree_list, Formula):
+        return parsetree_list
+    if 'binary' == parsetree_list[0][0]:
+        return make_binary(parsetree_list_to_formula(parsetree_list[0][1]), parsetree_list[0][2],
+                           parsetree_list_to_formula(parsetree_list[0][3]))
+    elif len(parsetree_list) == 2:
+        return make_unary(parsetree_list[0], parsetree_list_to_formula(parsetree_list[1]))
+    else:
+        return make_atom(parsetree_list[0])
+
+
+def formula_to_parsetree_list(formula):
+    '''
+    :param formula: Formula interned node
+    :return: List a fresh parsetree list equivalent to formula
+    '''
+    if len(formula) == 2:
+        return [formula[0], formula_to_parsetree_list(formula[1])]
+    elif isinstance(formula[0], tuple):
+        return [['binary', formula_to_parsetree_list(formula[0][1]), formula[0][2],
+                 formula_to_parsetree_list(formula[0][3])]]
+    else:
+        return [formula[0]]
+
+
+def formula_to_postfix(formula):
+    '''
+    :param formula: Formula interned node
+    :return: Tuple of (arity, symbol) tokens of formula in postfix order, built with an explicit
+    stack so very deep formulae do not hit the recursion limit
+    '''
+    tokens = []
+    stack = [formula]
+    while stack:  # node, right, left order reversed at the end is left, right, node
+        item = stack.pop()
+        if len(item) == 2:  # unary
+            tokens.append((1, item[0]))
+            stack.append(item[1])
+        elif isinstance(item[0], tuple):  # binary
+            tokens.append((2, item[0][2]))
+            stack.extend((item[0][1], item[0][3]))
+        else:  # atom
+            tokens.append((0, item[0]))
+    tokens.reverse()
+    return tuple(tokens)
+
+
+def postfix_to_formula(tokens):
+    '''
+    :param tokens: Tuple of (arity, symbol) tokens in postfix order, see formula_to_postfix
+    :return: Formula interned node
+    '''
+    stack = []
+    for arity, symbol in tokens:
+        if arity == 0:
+            stack.append(make_atom(symbol))
+        elif arity == 1:
+            stack.append(make_unary(symbol, stack.pop()))
+        else:
+            right = stack.pop()
+            stack[-1] = make_binary(stack[-1], symbol, right)
+    return stack[0]
+
+
+def iter_repr(formula):
+    '''
+    Generate the repr of a formula (the repr of its parsetree list) piece by piece, with an
+    explicit stack so very deep formulae do not hit the recursion limit
+    :param formula: Formula interned formula
+    :return: Generator of strings
+    '''
+    stack = [formula]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+        elif item._repr is not None:
+            yield item._repr
+        elif len(item) == 2:  # unary
+            stack.extend((']', item[1], '[' + repr(item[0]) + ', '))
+        elif isinstance(item[0], tuple):  # binary
+            stack.extend((']]', item[0][3], ', ' + repr(item[0][2]) + ', ', item[0][1], "[['binary', "))
+        else:  # atom
+            yield '[' + repr(item[0]) + ']'
+
+
+def compare_repr(formula, other_formula):
+    '''
+    Same as cmp(str(formula), str(other_formula)) without building both strings, it stops at the
+    first difference
+    :param formula: Formula interned formula
+    :param other_formula: Formula interned formula
+    :return: Int negative, zero or positive
+    '''
+    if formula is other_formula:
+        return 0
+    pieces, other_pieces = iter_repr(formula), iter_repr(other_formula)
+    piece, other_piece = '', ''
+    while True:
+        if not piece:
+            piece = next(pieces, None)
+        if not other_piece:
+            other_piece = next(other_pieces, None)
+        if piece is None or other_piece is None:
+            return cmp(piece is not None, other_piece is not None)  # a prefix is smaller
+        size = min(len(piece), len(other_piece))
+        if piece[:size] != other_piece[:size]:
+            return cmp(piece[:size], other_piece[:size])
+        piece, other_piece = piece[size:], other_piece[size:]
+
+
+def get_table_size():
+    '''
+    :return: Int number of distinct formulae interned so far
+    '''
+    return len(_formula_table)
@@ -1,6 +1,7 @@
 import cProfile
 from ast import literal_eval
 
+from formula import *
 from utils import *
 
 
@@ -10,6 +11,16 @@ __author__ = 'thiagovieira'
 Auxiliary formula functions
 '''
 
+DE_MORGAN_DUALS = {'^': 'v', 'v': '^', 'U': 'W', 'W': 'U'}
+NEGATED_KINDS = {'knowledge': KNOWLEDGE, 'atom': ATOM_KINDS, 'always': ALWAYS,
+                 'eventually': EVENTUALLY, 'next': NEXT}  # for is_negated_unary_or_atom
+
+_NOT_FOUND = object()
+
+# normalization caches, keyed on interned formulae
+NORMALIZATION_CACHES = {'remove_implications': LRUCache(), 'nnf': LRUCache(), 'sort': LRUCache(),
+                        'normalize': LRUCache()}
+
 
 def do_cprofile(func):
     def profiled_func(*args, **kwargs):
@@ -70,12 +81,32 @@ def get_main_operator(parsetree_list):
     :param parsetree_list: List tree representation of the string formula
     :return: String main operator operator as string
     '''
-    if is_atom(parsetree_list):
-        return parsetree_list[0]
-    elif is_unary(parsetree_list):
-        return parsetree_list[0]
-    elif is_binary(parsetree_list):
-        return parsetree_list[0][2]
+    try:
+        return parsetree_list.operator
+    except AttributeError:  # plain parsetree list
+        return parsetree_list_to_formula(parsetree_list).operator
+
+
+def get_kind(parsetree_list):
+    '''
+    :param parsetree_list: List tree representation of the string formula
+    :return: Int kind tag of the formula (see formula.py), precomputed when the formula is built
+    '''
+    try:
+        return parsetree_list.kind
+    except AttributeError:  # plain parsetree list
+        return parsetree_list_to_formula(parsetree_list).kind
+
+
+def get_agent(parsetree_list):
+    '''
+    :param parsetree_list: List tree representation of the string formula
+    :return: String agent index i of a k<i> formula, None if it is not a knowledge formula
+    '''
+    try:
+        return parsetree_list.agent
+    except AttributeError:  # plain parsetree list
+        return parsetree_list_to_formula(parsetree_list).agent
 
 
 def get_subformulae_recursive(parsetree_list, subformulae_list):
@@ -97,6 +128,25 @@ def get_subformulae_recursive(parsetree_list, subformulae_list):
     return subformulae_list
 
 
+def get_subformulae_iterative(parsetree_list, subformulae_list):
+    '''
+    Same as get_subformulae_recursive (same order) with an explicit stack
+    :param parsetree_list: List tree representation of the string formula
+    :param subformulae_list: List of subformulae as parsetree list
+    :return: List of subformulae as parsetree list
+    '''
+    stack = [parsetree_list]
+    while stack:
+        parsetree_list = stack.pop()
+        subformulae_list.append(parsetree_list)
+        if is_binary(parsetree_list):
+            stack.append(parsetree_list[0][3])
+            stack.append(parsetree_list[0][1])
+        elif is_unary(parsetree_list):
+            stack.append(parsetree_list[1])
+    return subformulae_list
+
+
 def apply_nnf_to_parsetree_list_list(parsetree_list_list):
     formulae_list = []
     for parsetree_list in parsetree_list_list:
@@ -106,41 +156,134 @@ def apply_nnf_to_parsetree_list_list(parsetree_list_list):
     return formulae_list
 
 
-# @do_cprofile
+@lru_memoize(NORMALIZATION_CACHES['normalize'])
+def normalize_formula(parsetree_list):
+    '''
+    Normalization pipeline used everywhere a formula enters the tableau: remove implications,
+    negation normal form and sort. Memoized, repeated calls cost one cache lookup
+    :param parsetree_list: Formula interned formula
+    :return: Formula with no implications, in NNF, with conjunctions and disjunctions sorted
+    '''
+    return sort_iterative(get_NNF_iterative(remove_implications_iterative(parsetree_list)))
+
+
+def set_normalization_cache_size(maxsize):
+    '''
+    :param maxsize: Int maximum number of entries of each normalization cache (LRU eviction)
+    '''
+    for cache in NORMALIZATION_CACHES.values():
+        cache.resize(maxsize)
+
+
+def clear_normalization_caches():
+    for cache in NORMALIZATION_CACHES.values():
+        cache.clear()
+
+
+def get_normalization_cache_stats():
+    '''
+    :return: Dict cache name -> dict of hits, misses, evictions, size and maxsize
+    '''
+    return dict((name, cache.stats()) for name, cache in NORMALIZATION_CACHES.items())
+
+
+class _PendingFormula(Exception):
+    '''
+    Raised by _evaluate_iterative when a step needs a subformula that is not transformed yet
+    '''
+    def __init__(self, parsetree_list):
+        Exception.__init__(self)
+        self.parsetree_list = parsetree_list
+
+
+def _evaluate_iterative(parsetree_list, step, cache):
+    '''
+    Bottom-up evaluation of a transformation with an explicit stack instead of Python recursion.
+    step(formula, transform) is the same one step rewriting the recursive version uses; when it
+    asks transform for a subformula that is not done yet, the subformula is pushed and the
+    formula is retried once it is done
+    :param parsetree_list: Formula interned formula
+    :param step: Function one step of the transformation
+    :param cache: LRUCache shared with the recursive version
+    :return: Formula transformed formula
+    '''
+    results = {}
+
+    def transform(subformula):
+        value = results.get(subformula, _NOT_FOUND)
+        if value is _NOT_FOUND:
+            value = cache.get(subformula, _NOT_FOUND)
+            if value is _NOT_FOUND:
+                raise _PendingFormula(subformula)
+            results[subformula] = value
+        return value
+
+    value = cache.get(parsetree_list, _NOT_FOUND)
+    if value is not _NOT_FOUND:
+        return value
+    stack = [parsetree_list]
+    while stack:
+        current = stack[-1]
+        if current in results:
+            stack.pop()
+            continue
+        try:
+            value = step(current, transform)
+        except _PendingFormula, pending:
+            stack.append(pending.parsetree_list)
+            continue
+        cache.put(current, value)
+        results[current] = value
+        stack.pop()
+    return results[parsetree_list]
+
+
+@lru_memoize(NORMALIZATION_CACHES['nnf'])
 def get_NNF_recursive(parsetree_list):
     '''
     Get negation normal form from a parsetree list WITH NO IMPLICATIONS
     :param parsetree_list: List tree representation of the string formula with no implications
     :return: List parsetree list in negation normal form
     '''
-    parsetree_string = ''
+    return _nnf_step(parsetree_list, get_NNF_recursive)
+
+
+def get_NNF_iterative(parsetree_list):
+    '''
+    Same as get_NNF_recursive with an explicit stack, for very deep formulae
+    :param parsetree_list: List tree representation of the string formula with no implications
+    :return: List parsetree list in negation normal form
+    '''
+    return _evaluate_iterative(parsetree_list, _nnf_step, NORMALIZATION_CACHES['nnf'])
+
+
+def _nnf_step(parsetree_list, nnf):
+    '''
+    :param parsetree_list: List tree representation of the string formula with no implications
+    :param nnf: Function giving the negation normal form of the subformulae
+    :return: List parsetree list in negation normal form
+    '''
     if is_binary(parsetree_list):
-        left = '[[\'binary\',' + str(get_NNF_recursive(parsetree_list[0][1]))
-        main_operator = ',\'' + get_main_operator(parsetree_list) + '\','
-        right = str(get_NNF_recursive(parsetree_list[0][3])) + ']]'
-        parsetree_string = left + main_operator + right
+        return make_binary(nnf(parsetree_list[0][1]),
+                           get_main_operator(parsetree_list),
+                           nnf(parsetree_list[0][3]))
     elif is_unary(parsetree_list):
         if is_negation(parsetree_list):
             if is_binary(parsetree_list[1]):
-                new_parsetree_list = propagate_negation_binary(parsetree_list)
-                parsetree_string = str(get_NNF_recursive(new_parsetree_list))
+                return nnf(propagate_negation_binary(parsetree_list))
             elif is_unary(parsetree_list[1]):
                 if is_negation(parsetree_list[1]):
-                    parsetree_string = str(get_NNF_recursive(parsetree_list[1][1]))
+                    return nnf(parsetree_list[1][1])
+                elif is_knowledge(parsetree_list[1]):
+                    return make_unary('~', nnf(parsetree_list[1]))
                 else:
-                    if is_knowledge(parsetree_list[1]):
-                        parsetree_string = '[\'~\',' + str(get_NNF_recursive(parsetree_list[1])) + ']'
-                    else:
-                        new_parsetree_list = propagate_negation_unary(parsetree_list)
-                        parsetree_string = str(get_NNF_recursive(new_parsetree_list))
+                    return nnf(propagate_negation_unary(parsetree_list))
             else:  # negated atom
-                parsetree_string = str(parsetree_list)
+                return parsetree_list
         else:
-            parsetree_string = '[\'' + str(parsetree_list[0]) + '\',' + str(get_NNF_recursive(parsetree_list[1])) + ']'
+            return make_unary(parsetree_list[0], nnf(parsetree_list[1]))
     else:  # atom case
-        parsetree_string = str(parsetree_list)
-    new_parsetree_list = literal_eval(parsetree_string)
-    return new_parsetree_list
+        return parsetree_list
 
 
 def propagate_negation_binary(unary_parsetree_list):
@@ -149,17 +292,15 @@ def propagate_negation_binary(unary_parsetree_list):
     :param unary_parsetree_list: List tree representation of the string formula
     :return: List parsetree list with negation propagated one step
     '''
-    new_parsetree_string = ''
     # if is_binary(unary_parsetree_list[1]): already executed before call this function
     if is_conjuction(unary_parsetree_list[1]):
-        new_parsetree_string = apply_de_morgan(unary_parsetree_list[1], '^')
+        return apply_de_morgan(unary_parsetree_list[1], '^')
     elif is_disjunction(unary_parsetree_list[1]):
-        new_parsetree_string = apply_de_morgan(unary_parsetree_list[1], 'v')
+        return apply_de_morgan(unary_parsetree_list[1], 'v')
     elif is_until(unary_parsetree_list[1]):
-        new_parsetree_string = apply_modal_de_morgan(unary_parsetree_list[1], 'U')
+        return apply_modal_de_morgan(unary_parsetree_list[1], 'U')
     else:  # unless
-        new_parsetree_string = apply_modal_de_morgan(unary_parsetree_list[1], 'W')
-    return literal_eval(new_parsetree_string)
+        return apply_modal_de_morgan(unary_parsetree_list[1], 'W')
 
 
 def propagate_negation_unary(unary_parsetree_list):
@@ -168,85 +309,75 @@ def propagate_negation_unary(unary_parsetree_list):
     :param unary_parsetree_list: List tree representation of the string formula
     :return: List parsetree list with negation propagated one step
     '''
-    new_parsetree_string = ''
     # if is_unary(unary_parsetree_list[1]): already executed before call this function
     if is_always(unary_parsetree_list[1]):
-        new_parsetree_string = '[\'F\',[\'~\',' + str(unary_parsetree_list[1][1]) + ']]'
+        new_operator = 'F'
     elif is_eventually(unary_parsetree_list[1]):
-        new_parsetree_string = '[\'G\',[\'~\',' + str(unary_parsetree_list[1][1]) + ']]'
+        new_operator = 'G'
     else:  # is_next(unary_parsetree_list[1]):
-        new_parsetree_string = '[\'N\',[\'~\',' + str(unary_parsetree_list[1][1]) + ']]'
-    return literal_eval(new_parsetree_string)
+        new_operator = 'N'
+    return make_unary(new_operator, make_unary('~', unary_parsetree_list[1][1]))
 
 
 def apply_de_morgan(parsetree_list, connective):
     '''
     :param parsetree_list: List BINARY formula parsetree list
     :param connective: String main operator of bynary formula
-    :return: String string representation of the new binary formula with de morgan rule applied
-    '''
-    if connective == 'v':
-        new_main_operator = ',\'^\','
-    elif connective == '^':
-        new_main_operator = ',\'v\','
-    elif connective == 'U':
-        new_main_operator = ',\'W\','
-    else:
-        new_main_operator = ',\'U\','
-    new_left = '[[\'binary\',[\'~\',' + str(parsetree_list[0][1]) + ']'
-    new_right = '[\'~\',' + str(parsetree_list[0][3]) + ']]]'
-    new_parsetree_string = new_left + new_main_operator + new_right
-    return new_parsetree_string
+    :return: List parsetree list of the new binary formula with de morgan rule applied
+    '''
+    return make_binary(make_unary('~', parsetree_list[0][1]),
+                       DE_MORGAN_DUALS[connective],
+                       make_unary('~', parsetree_list[0][3]))
 
 
 def apply_modal_de_morgan(parsetree_list, connective):
     '''
     :param parsetree_list: List BINARY formula parsetree list
     :param connective: String main operator of bynary formula
-    :return: String string representation of the new binary formula with de morgan rule applied
+    :return: List parsetree list of the new binary formula with de morgan rule applied
     '''
-    if connective == 'U':
-        new_main_operator = ',\'W\','
-    else:
-        new_main_operator = ',\'U\','
-    new_left = '[[\'binary\',[\'~\',' + str(parsetree_list[0][3]) + ']'
-    new_right = '[[\'binary\',[\'~\',' + str(parsetree_list[0][1]) + '],\'^\',[\'~\',' + str(parsetree_list[0][3]) + ']]]]]'
-    new_parsetree_string = new_left + new_main_operator + new_right
-    return new_parsetree_string
+    negated_left = make_unary('~', parsetree_list[0][1])
+    negated_right = make_unary('~', parsetree_list[0][3])
+    return make_binary(negated_right, DE_MORGAN_DUALS[connective],
+                       make_binary(negated_left, '^', negated_right))
 
 
-# @do_cprofile
+@lru_memoize(NORMALIZATION_CACHES['remove_implications'])
 def remove_implications_recursive(parsetree_list):
     '''
     :param parsetree_list: List tree representation of the string formula
     :return: List new parsetree list with no implications
     '''
-    #parsetree_list = clean_brackets_parsetree_list(parsetree_list)
+    return _remove_implications_step(parsetree_list, remove_implications_recursive)
+
+
+def remove_implications_iterative(parsetree_list):
+    '''
+    Same as remove_implications_recursive with an explicit stack, for very deep formulae
+    :param parsetree_list: List tree representation of the string formula
+    :return: List new parsetree list with no implications
+    '''
+    return _evaluate_iterative(parsetree_list, _remove_implications_step,
+                               NORMALIZATION_CACHES['remove_implications'])
+
+
+def _remove_implications_step(parsetree_list, remove_implications):
+    '''
+    :param parsetree_list: List tree representation of the string formula
+    :param remove_implications: Function removing the implications of the subformulae
+    :return: List new parsetree list with no implications
+    '''
     if is_binary(parsetree_list):
         left = parsetree_list[0][1]
         main_operator = get_main_operator(parsetree_list)
         right = parsetree_list[0][3]
         if main_operator == '->':
-            new_left = '[[\'binary\',[\'~\',' + str(left) + ']'
-            new_main_operator = ',\'v\','
-            new_right = str(right) + ']]'
-            new_parsetree_string = new_left + new_main_operator + new_right
-            new_parsetree_list = literal_eval(new_parsetree_string)
-            return remove_implications_recursive(new_parsetree_list)
+            return remove_implications(make_binary(make_unary('~', left), 'v', right))
         else:
-            new_left = '[[\'binary\',' + str(
-                remove_implications_recursive(left))
-            new_main_operator = ',\'' + main_operator + '\','
-            new_right = str(remove_implications_recursive(right)) + ']]'
-            new_parsetree_string = new_left + new_main_operator + new_right
-            new_parsetree_list = literal_eval(new_parsetree_string)
-            return new_parsetree_list
+            return make_binary(remove_implications(left), main_operator,
+                               remove_implications(right))
     elif is_unary(parsetree_list):
-        new_parsetree_string = '[\'' + str(
-            parsetree_list[0]) + '\',' + str(
-            remove_implications_recursive(parsetree_list[1])) + ']'
-        new_parsetree_list = literal_eval(new_parsetree_string)
-        return new_parsetree_list
+        return make_unary(parsetree_list[0], remove_implications(parsetree_list[1]))
     else:  # atom case
         return parsetree_list
 
@@ -257,10 +388,7 @@ def is_unary(parsetree_list):
     :param parsetree_list: List tree representation of the string formula
     :return: True if is unary, False otherwise
     '''
-    if any((c in ['k', 'N', 'F', 'G', '~']) for c in parsetree_list[0][0]):
-        return True
-    else:
-        return False
+    return (get_kind(parsetree_list) & UNARY_KINDS) != 0
 
 
 def is_binary(parsetree_list):
@@ -268,10 +396,7 @@ def is_binary(parsetree_list):
     :param parsetree_list: List tree representation of the string formula
     :return: True if is binary, False otherwise
     '''
-    if 'binary' in parsetree_list[0][0]:
-        return True
-    else:
-        return False
+    return (get_kind(parsetree_list) & BINARY_KINDS) != 0
 
 
 def is_atom(parsetree_list):
@@ -279,10 +404,7 @@ def is_atom(parsetree_list):
     :param parsetree_list: List tree representation of the string formula
     :return: True if is atom, False otherwise
     '''
-    if not is_binary(parsetree_list) and not is_unary(parsetree_list):
-        return True
-    else:
-        return False
+    return (get_kind(parsetree_list) & ATOM_KINDS) != 0
 
 
 def is_false(parsetree_list):
@@ -291,10 +413,7 @@ def is_false(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is false constant, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'false':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == FALSE
 
 
 def is_true(parsetree_list):
@@ -303,10 +422,7 @@ def is_true(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is true constant, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'true':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == TRUE
 
 
 def is_negation(parsetree_list):
@@ -315,10 +431,7 @@ def is_negation(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is negation, False otherwise
     '''
-    if get_main_operator(parsetree_list) == '~':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == NEGATION
 
 
 def is_prop(parsetree_list):
@@ -326,7 +439,7 @@ def is_prop(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is propositional symbol, False otherwise
     '''
-    pass
+    return get_kind(parsetree_list) == PROP
 
 
 def is_knowledge(parsetree_list):
@@ -334,10 +447,7 @@ def is_knowledge(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is knowledge formulae, False otherwise
     '''
-    if 'k' in get_main_operator(parsetree_list):
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == KNOWLEDGE
 
 
 def is_always(parsetree_list):
@@ -345,10 +455,7 @@ def is_always(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is always formulae, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'G':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == ALWAYS
 
 
 def is_eventually(parsetree_list):
@@ -356,10 +463,7 @@ def is_eventually(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is eventually formulae, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'F':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == EVENTUALLY
 
 
 def is_next(parsetree_list):
@@ -367,10 +471,7 @@ def is_next(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is next formulae, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'N':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == NEXT
 
 
 def is_conjuction(parsetree_list):
@@ -379,10 +480,7 @@ def is_conjuction(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is a conjunction, False otherwise
     '''
-    if get_main_operator(parsetree_list) == '^':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == CONJUNCTION
 
 
 def is_disjunction(parsetree_list):
@@ -391,10 +489,7 @@ def is_disjunction(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is a disjunction, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'v':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == DISJUNCTION
 
 
 def is_until(parsetree_list):
@@ -403,10 +498,7 @@ def is_until(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is a until, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'U':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == UNTIL
 
 
 def is_unless(parsetree_list):
@@ -415,10 +507,7 @@ def is_unless(parsetree_list):
     :param parsetree_list:List tree representation of the string formula
     :return: True if is a unless, False otherwise
     '''
-    if get_main_operator(parsetree_list) == 'W':
-        return True
-    else:
-        return False
+    return get_kind(parsetree_list) == UNLESS
 
 
 def is_negated_unary_or_atom(parsetree_list, something):
@@ -427,23 +516,8 @@ def is_negated_unary_or_atom(parsetree_list, something):
     :param something: String type of unary formula
     :return: Boolean True if is negated knowledge, False otherwise
     '''
-    is_something = {
-        'knowledge': is_knowledge,
-        'atom': is_atom,
-        'always': is_always,
-        'eventually': is_eventually,
-        'next': is_next
-    }.get(something)
-    if is_something and (is_atom(parsetree_list) or is_unary(parsetree_list)):
-        if is_negation(parsetree_list):
-            if is_something(parsetree_list[1]):
-                return True
-            else:
-                return False
-        else:
-            return False
-    else:
-        return False
+    kind = get_kind(parsetree_list)
+    return kind == NEGATION and (get_kind(parsetree_list[1]) & NEGATED_KINDS.get(something, 0)) != 0
 
 
 def get_negation(parsetree_list):
@@ -451,83 +525,80 @@ def get_negation(parsetree_list):
     :param parsetree_list: List tree representation of the string formula
     :return: List tree representation of the negated string formula
     '''
-    parsetree_string = '[\'~\',' + str(parsetree_list) + ']'
-    new_parsetree_list = literal_eval(parsetree_string)
-    return new_parsetree_list
+    return make_unary('~', parsetree_list)
 
 
+@lru_memoize(NORMALIZATION_CACHES['sort'])
 def sort_recursive(parsetree_list):
     '''
     :param parsetree_list: List tree representation of the string formula
     :return: List tree representation of the string formula with conjunctions and disjunctions sorted in lexicographic order
     '''
+    return _sort_step(parsetree_list, sort_recursive)
+
+
+def sort_iterative(parsetree_list):
+    '''
+    Same as sort_recursive with an explicit stack, for very deep formulae
+    :param parsetree_list: List tree representation of the string formula
+    :return: List tree representation of the string formula with conjunctions and disjunctions sorted in lexicographic order
+    '''
+    return _evaluate_iterative(parsetree_list, _sort_step, NORMALIZATION_CACHES['sort'])
+
+
+def _sort_step(parsetree_list, sort):
+    '''
+    :param parsetree_list: List tree representation of the string formula
+    :param sort: Function sorting the subformulae
+    :return: List tree representation of the string formula with conjunctions and disjunctions sorted in lexicographic order
+    '''
     if is_binary(parsetree_list):
         left = parsetree_list[0][1]
-        main_operator = ',\'' + get_main_operator(parsetree_list) + '\','
+        main_operator = get_main_operator(parsetree_list)
         right = parsetree_list[0][3]
-        left_string = '[[\'binary\','
-        right_string = ']]'
         if is_conjuction(parsetree_list) or is_disjunction(parsetree_list):
             if is_binary(left) and is_binary(right):
                 if (is_conjuction(left) or is_disjunction(left)) and (is_conjuction(right) or is_disjunction(right)): #conjunction comes first
                     if (is_conjuction(left) and is_conjuction(right)) or is_disjunction(left) and is_disjunction(right):
-                        sorted_left = sort_recursive(left)
-                        sorted_right = sort_recursive(right)
-                        if str(sorted_left) >= str(sorted_right):
-                            left_string =  left_string + str(sort_recursive(sorted_left))
-                            right_string = str(sort_recursive(sorted_right)) + right_string
+                        sorted_left = sort(left)
+                        sorted_right = sort(right)
+                        if compare_repr(sorted_left, sorted_right) >= 0:  # str(sorted_left) >= str(sorted_right)
+                            new_left, new_right = sort(sorted_left), sort(sorted_right)
                         else:
-                            left_string =  left_string + str(sort_recursive(right))
-                            right_string = str(sort_recursive(left)) + right_string
+                            new_left, new_right = sorted_right, sorted_left
                     elif is_conjuction(left):
-                        left_string =  left_string + str(sort_recursive(left))
-                        right_string = str(sort_recursive(right)) + right_string
+                        new_left, new_right = sort(left), sort(right)
                     else:
-                        left_string =  left_string + str(sort_recursive(right))
-                        right_string = str(sort_recursive(left)) + right_string
+                        new_left, new_right = sort(right), sort(left)
                 elif is_conjuction(left) or is_disjunction(left): # conjunctions and disjunctions come first than others binary formulas
-                    left_string =  left_string + str(sort_recursive(left))
-                    right_string = str(sort_recursive(right)) + right_string
+                    new_left, new_right = sort(left), sort(right)
                 elif is_conjuction(right) or is_disjunction(right): # conjunctions and disjunctions come first than others binary formulas
-                    left_string =  left_string + str(sort_recursive(right))
-                    right_string = str(sort_recursive(left)) + right_string
+                    new_left, new_right = sort(right), sort(left)
                 else: #others binary formulas
-                    left_string =  left_string + str(sort_recursive(left))
-                    right_string = str(sort_recursive(right)) + right_string
+                    new_left, new_right = sort(left), sort(right)
             elif is_binary(left):
-                left_string = left_string + str(sort_recursive(right)) #unary/atom comes first
-                right_string = str(sort_recursive(left)) + right_string
+                new_left, new_right = sort(right), sort(left) #unary/atom comes first
             elif is_binary(right):
-                left_string = left_string + str(sort_recursive(left)) #unary/atom comes first
-                right_string = str(sort_recursive(right)) + right_string
+                new_left, new_right = sort(left), sort(right) #unary/atom comes first
             elif is_unary(left) and is_unary(right):
                 if str(left[0]) >= str(right[0]):
-                    left_string = left_string + '[\'' + str(right[0]) + '\',' + str(sort_recursive(right[1])) + ']'
-                    right_string = '[\'' + str(left[0]) + '\',' + str(sort_recursive(left[1])) + ']' + right_string
+                    new_left, new_right = sort(right), sort(left)
                 else:
-                    left_string = left_string + '[\'' + str(left[0]) + '\',' + str(sort_recursive(left[1])) + ']'
-                    right_string = '[\'' + str(right[0]) + '\',' + str(sort_recursive(right[1])) + ']' + right_string
+                    new_left, new_right = sort(left), sort(right)
             elif is_unary(left):
-                left_string = left_string + str(right) #atom comes first
-                right_string = '[\'' + str(left[0]) + '\',' + str(sort_recursive(left[1])) + ']' + right_string
+                new_left, new_right = right, sort(left) #atom comes first
             elif is_unary(right):
-                left_string = left_string + str(left) #atom comes first
-                right_string = '[\'' + str(right[0]) + '\',' + str(sort_recursive(right[1])) + ']' + right_string
+                new_left, new_right = left, sort(right) #atom comes first
             else: #both are atoms
                 if str(left[0]) >= str(right[0]):
-                    left_string = left_string + str(right)
-                    right_string = str(left) + right_string
+                    new_left, new_right = right, left
                 else:
-                    left_string = left_string + str(left)
-                    right_string = str(right) + right_string
-            return literal_eval(left_string + main_operator + right_string)
+                    new_left, new_right = left, right
+            return make_binary(new_left, main_operator, new_right)
         else:
-            left_string = left_string + str(sort_recursive(left))
-            right_string = str(sort_recursive(right)) + right_string
-            parsetree_string = left_string + main_operator + right_string
-            return literal_eval(parsetree_string)
+            return make_binary(sort(left), main_operator, sort(right))
     elif is_unary(parsetree_list):
-        return literal_eval('[\'' + str(parsetree_list[0]) + '\',' + str(sort_recursive(parsetree_list[1])) + ']')
+        return make_unary(parsetree_list[0], sort(parsetree_list[1]))
     else:
         return parsetree_list
 
@@ -538,7 +609,7 @@ def get_len(parsetree_list):
     :param parsetree_list: List parsetree list
     :return: Int size of the formula
     '''
-    lista = list(flatten(parsetree_list))
+    lista = list(flatten_iterative(parsetree_list))
     return len(lista)
 
 
@@ -575,6 +646,7 @@ if __name__ == '__main__':
     #parsetree = literal_eval(get_subformulae_recursive(lista[0], [])[0])
     #print parsetree[0][1]
     for f in lista:
+        f = parsetree_list_to_formula(f)
         print 'original: ' + str(f)
         sorted_parsetree = sort_recursive(f)
         print 'sorted: ' + str(sorted_parsetree) + str(type(sorted_parsetree))
@@ -1,6 +1,8 @@
 import lrparsing
 from lrparsing import Prio, Ref, Token, ParseError, TokenError
 
+from formula import make_atom, make_unary, make_binary, formula_to_parsetree_list
+
 __author__ = 'thiagovieira'
 
 
@@ -66,3 +68,36 @@ def parse_formula(formula_string):
         print 'Token error'
         print LrParsingError
         print '--------------------------'
+
+
+def get_formula(parse_tree):
+    '''
+    Walk the tuple parse tree once and build the interned formula directly, with no
+    repr_parse_tree, string rewriting or literal_eval (see formula_utils.parsetree_string_to_list)
+    :param parse_tree: Tuple parse tree from grammar.parse_formula
+    :return: Formula interned formula of the parse tree
+    '''
+    return _formula_node_to_formula(parse_tree[1])  # skip START
+
+
+def get_parsetree_list(parse_tree):
+    '''
+    :param parse_tree: Tuple parse tree from grammar.parse_formula
+    :return: List Python list representation of the parse tree
+    '''
+    return formula_to_parsetree_list(get_formula(parse_tree))
+
+
+def _formula_node_to_formula(formula_node):
+    '''
+    :param formula_node: Tuple formula node, either (formula atom) or (formula '(' unary|binary ')')
+    :return: Formula interned formula of the formula node
+    '''
+    if len(formula_node) == 2:  # atom
+        return make_atom(formula_node[1][1][1])
+    inner_node = formula_node[2]
+    if inner_node[0] is FormulaGrammar.unary:
+        return make_unary(inner_node[1][1], _formula_node_to_formula(inner_node[2]))
+    else:  # binary
+        return make_binary(_formula_node_to_formula(inner_node[1]), inner_node[2][1],
+                           _formula_node_to_formula(inner_node[3]))
@@ -2,7 +2,10 @@ from collections import deque
 
 import networkx as nx
 
+from budget import BudgetExceeded, format_usage, get_result
 from formula_utils import *
+from records import *
+from stategraph import StateGraph
 from tableau import get_tableaux
 
 #try:
@@ -13,10 +16,13 @@ from tableau import get_tableaux
 
 __author__ = 'thiagovieira'
 
+SUCCESSOR_CACHES = {'successor states': LRUCache()}  # keyed on the successor formulae and belief
+CONTRACT_ENGINES = ['incremental', 'restart']  # recheck the states a removal affects, or all of them
+
 
 def build_states(tableaux_list):
     '''
-    :param tableaux_list: List list of tableau dicts structure with a list of formulae
+    :param tableaux_list: List list (or any iterable, see tableau.iter_tableaux) of tableau dicts structure with a list of formulae
     :return: List a list of states labelled by their index with all formulae as a list of parsetree list
     '''
     states = []
@@ -24,73 +30,272 @@ def build_states(tableaux_list):
     for tableau in tableaux_list:
         new_state = []
         for formula in tableau['formulae']:
-            if is_knowledge(formula['formula']) or is_negated_unary_or_atom(formula['formula'],'knowledge'):
-                if is_knowledge(formula['formula']):
-                    if str(formula['formula'][0][1:]) not in agents_list:
-                        agents_list.append(str(formula['formula'][0][1:]))
+            if is_knowledge(formula.formula) or is_negated_unary_or_atom(formula.formula,'knowledge'):
+                if is_knowledge(formula.formula):
+                    if get_agent(formula.formula) not in agents_list:
+                        agents_list.append(get_agent(formula.formula))
                 else:
-                    if str(formula['formula'][1][0][1:]) not in agents_list:
-                        agents_list.append(str(formula['formula'][1][0][1:]))
-            new_state.append({'formula':formula['formula'], 'k_visited': False, 'b_visited': False, 'n_visited': False})
+                    if get_agent(formula.formula[1]) not in agents_list:
+                        agents_list.append(get_agent(formula.formula[1]))
+            new_state.append(StateEntry(formula.formula))
         states.append(new_state)
     return states, agents_list
 
 
-def build_successors(G, belief):
-    while G.graph['modified']:
-        G.graph['modified'] = False
-        G = build_knowledge_sucessors(G, belief)
-        G = build_temporal_sucessors(G, belief)
+def get_successor_states(formula_list, belief, budget=None, identity='name'):
+    '''
+    States of the tableaux of the formulae of a successor. Memoized on the set of the formulae (on
+    the formulae in order with the 'name' identity, the order shows in the states) and belief, every
+    node asking for the same successor formulae gets new states built from the cached formulae
+    :param formula_list: List formulae of the successor
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, the branches of the tableaux are spent on it
+    :param identity: String one of stategraph.IDENTITIES, of the graph the states are added to
+    :return: List states, as built by build_states, empty if the tableaux is not proper
+    '''
+    key = (frozenset(formula_list) if identity == 'fingerprint' else tuple(formula_list), belief)
+    cache = SUCCESSOR_CACHES['successor states']
+    successors = cache.get(key)
+    if successors is None:
+        states = build_states(get_tableaux(formula_list, belief, budget=budget) or [])[0]
+        successors = [tuple(entry.formula for entry in state) for state in states]
+        cache.put(key, successors)
+    return [[StateEntry(formula) for formula in state] for state in successors]
+
+
+def set_successor_cache_size(maxsize):
+    '''
+    :param maxsize: Int maximum number of entries of each successor cache (LRU eviction)
+    '''
+    for cache in SUCCESSOR_CACHES.values():
+        cache.resize(maxsize)
+
+
+def clear_successor_caches():
+    for cache in SUCCESSOR_CACHES.values():
+        cache.clear()
+
+
+def get_successor_cache_stats():
+    '''
+    :return: Dict cache name -> dict of hits, misses, evictions, size and maxsize
+    '''
+    return dict((name, cache.stats()) for name, cache in SUCCESSOR_CACHES.items())
+
+
+def add_state(G, state, budget=None, frontier=None):
+    '''
+    :param G: StateGraph
+    :param state: List state formulae, as built by build_states
+    :param budget: Budget if given, a new node is spent on it
+    :param frontier: Deque if given, a new node is appended to it
+    :return: Int id of the state in G
+    '''
+    state_id, is_new = G.add_state(state)
+    if is_new:
+        if budget is not None:
+            budget.spend(nodes=1)
+        if frontier is not None:
+            frontier.append(state_id)
+    return state_id
+
+
+def build_successors(G, belief, budget=None, checkpoint=None):
+    '''
+    Build the successors of every state, the ones added on the way included. The states still to
+    expand wait on a frontier queue, every state is taken from it once and all its knowledge, belief and
+    next formulae are expanded then, the new states its successors bring are put on the queue
+    :param G: StateGraph
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, checked for every state expanded
+    :param checkpoint: Checkpoint if given, the graph is saved on it every so often
+    :return: StateGraph G
+    '''
+    frontier = deque(node for node in G if not is_expanded(G, node, belief))  # all of them, unless resumed
+    while frontier:
+        if checkpoint is not None and checkpoint.is_due():
+            checkpoint.save('graph', {'phase': 'successors', 'graph': G})
+        if budget is not None:
+            budget.check()
+        node = frontier.popleft()
+        build_knowledge_sucessors(G, node, belief, budget, frontier)
+        build_temporal_sucessors(G, node, belief, budget, frontier)
     return G
 
 
-def contract(G, belief):
+def is_expanded(G, node, belief):
+    '''
+    :param G: StateGraph
+    :param node: Int id of a state
+    :param belief: Boolean if it is to use logic of belief
+    :return: Boolean True if the successors of every formula of the state were built
+    '''
+    flags = K_VISITED | B_VISITED | N_VISITED if belief else K_VISITED | N_VISITED
+    return all(formula.flags & flags == flags for formula in G.states[node])
+
+
+def contract_graph(G, belief, budget=None, checkpoint=None, engine='incremental', stats=None):
+    '''
+    Remove the states that cannot be satisfied until there is none left to remove. The states left do
+    not depend on the order they are checked in, a state removed only takes successors away from others
+    :param G: StateGraph with all its successors built
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, checked on every pass (on every state checked, incremental engine)
+    :param checkpoint: Checkpoint if given, the graph is saved on it every so often
+    :param engine: String one of CONTRACT_ENGINES
+    :param stats: Dict if given, 'contract checks' and 'removed states' are added to it
+    :return: StateGraph G
+    '''
+    if engine not in CONTRACT_ENGINES:
+        raise ValueError('unknown contract engine: ' + str(engine))
+    if stats is not None:
+        stats.setdefault('contract checks', 0)
+        stats.setdefault('removed states', 0)
+    if engine == 'incremental':
+        return contract_incremental(G, belief, budget, checkpoint, stats)
+    while G.modified:
+        if checkpoint is not None and checkpoint.is_due():
+            checkpoint.save('graph', {'phase': 'contract', 'graph': G})
+        G.modified = False
+        G = contract(G, belief, budget, stats)
+    return G
+
+
+def contract(G, belief, budget=None, stats=None):
+    '''
+    Check the states in order and remove the first one that cannot be satisfied
+    :param G: StateGraph
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, checked once
+    :param stats: Dict if given, with the 'contract checks' and 'removed states' counters to update
+    :return: StateGraph G, modified if a state was removed
+    '''
+    if budget is not None:
+        budget.check()
     for node in G:
-        if not G.node[node]['contract_visited']:
-            for formula in G.node[node]['formulae']:
-                if (is_eventually(formula['formula']) or is_until(formula['formula'])) and not is_resolvable(G, node, formula['formula'], belief):
-                    G.remove_node(node)
-                    G.graph['modified'] = True
-                    return G
-                if is_next(formula['formula']):
-                    has_n_successor = False
-                    for successor in G[node]:
-                        if G[node][successor][0]['label'] == 'n':
-                            has_n_successor = True
-                    if not has_n_successor:
-                        G.remove_node(node)
-                        G.graph['modified'] = True
-                        return G
-                if is_negated_unary_or_atom(formula['formula'],'knowledge'):
-                    label = 'R'+ str(formula['formula'][1][0][1:])
-                    has_label_successor = False
-                    for successor in G[node]:
-                        parsetree_list = sort_recursive(get_NNF_recursive(get_negation(formula['formula'][1][1]))) #inside formula of a negated knowledge formula may not be in NNF
-                        if belief:
-                            formula_dict = {'formula':parsetree_list, 'k_visited': True, 'b_visited': True, 'n_visited': True} #watch this
-                        else:
-                            formula_dict = {'formula':parsetree_list, 'k_visited': True, 'b_visited': False, 'n_visited': True} #watch this
-                        if G[node][successor][0]['label'] == label and formula_dict in G.node[successor]['formulae']:
-                            has_label_successor = True
-                    if not has_label_successor:
-                        G.remove_node(node)
-                        G.graph['modified'] = True
-                        return G
-                if belief:
-                    if is_knowledge(formula['formula']):
-                        label = 'R'+ str(formula['formula'][0][1:])
-                        has_label_successor = False
-                        for successor in G[node]:
-                            formula_dict = {'formula':formula['formula'][1], 'k_visited': True, 'b_visited': True, 'n_visited': True} #watch this
-                            if G[node][successor][0]['label'] == label and formula_dict in G.node[successor]['formulae']:
-                                has_label_successor = True
-                        if not has_label_successor:
-                            G.remove_node(node)
-                            G.graph['modified'] = True
-                            return G
+        if stats is not None:
+            stats['contract checks'] += 1
+        if not G.contract_visited[node] and not is_satisfiable_state(G, node, belief):
+            G.remove_state(node)
+            G.modified = True
+            if stats is not None:
+                stats['removed states'] += 1
+            return G
     return G
 
 
+def contract_incremental(G, belief, budget=None, checkpoint=None, stats=None):
+    '''
+    Check every state once, then only the states a removal may affect. Its predecessors (by any label)
+    are checked again at once. An eventuality may have been resolved through it, so once the queue is
+    empty the states holding an eventuality that reach the next predecessors of the states removed
+    are checked again too, found on the reverse edges
+    :param G: StateGraph
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, checked for every state checked
+    :param checkpoint: Checkpoint if given, the graph is saved on it every so often
+    :param stats: Dict if given, with the 'contract checks' and 'removed states' counters to update
+    :return: StateGraph G
+    '''
+    queue = deque(G)  # all of them, also when resumed
+    queued = [False] * len(G.states)
+    for node in queue:
+        queued[node] = True
+    sources = set()  # next predecessors of the states removed
+    while queue or sources:
+        if not queue:
+            for state_id in get_eventuality_ancestors(G, sources):
+                if not queued[state_id]:
+                    queue.append(state_id)
+                    queued[state_id] = True
+            sources = set()
+            continue
+        if checkpoint is not None and checkpoint.is_due():
+            checkpoint.save('graph', {'phase': 'contract', 'graph': G})
+        if budget is not None:
+            budget.check()
+        node = queue.popleft()
+        queued[node] = False
+        if stats is not None:
+            stats['contract checks'] += 1
+        if G.contract_visited[node] or is_satisfiable_state(G, node, belief):
+            continue
+        predecessors = G.get_predecessors(node)
+        if 'n' in G.predecessors:
+            sources.update(G.predecessors['n'][node])
+        G.remove_state(node)
+        if stats is not None:
+            stats['removed states'] += 1
+        for state_id in predecessors:
+            if G.states[state_id] is not None and not queued[state_id]:
+                queue.append(state_id)
+                queued[state_id] = True
+    G.modified = False
+    return G
+
+
+def get_eventuality_ancestors(G, sources):
+    '''
+    :param G: StateGraph
+    :param sources: Iterable ids of states, the removed ones are skipped
+    :return: Set ids of the states holding an eventuality (or until) formula that reach one of sources by
+    next edges, sources included
+    '''
+    predecessors = G.predecessors.get('n')
+    queue = deque(state_id for state_id in sources if G.states[state_id] is not None)
+    visited = set(queue)
+    ancestors = set()
+    while queue:
+        state_id = queue.popleft()
+        if any(is_eventually(formula.formula) or is_until(formula.formula) for formula in G.states[state_id]):
+            ancestors.add(state_id)
+        for predecessor in predecessors[state_id]:
+            if predecessor not in visited:
+                visited.add(predecessor)
+                queue.append(predecessor)
+    return ancestors
+
+
+def is_satisfiable_state(G, node, belief):
+    '''
+    :param G: StateGraph
+    :param node: Int id of a state
+    :param belief: Boolean if it is to use logic of belief
+    :return: Boolean False if the state is to be removed: one of its eventualities cannot be resolved, or
+    it lacks the next successor or the knowledge (belief) successor one of its formulae asks for
+    '''
+    for formula in G.states[node]:
+        if (is_eventually(formula.formula) or is_until(formula.formula)) and not is_resolvable(G, node, formula.formula, belief):
+            return False
+        if is_next(formula.formula):
+            has_n_successor = len(G.get_successors(node, 'n')) > 0
+            if not has_n_successor:
+                return False
+        if is_negated_unary_or_atom(formula.formula,'knowledge'):
+            label = 'R'+ get_agent(formula.formula[1])
+            has_label_successor = False
+            parsetree_list = normalize_formula(get_negation(formula.formula[1][1])) #inside formula of a negated knowledge formula may not be in NNF
+            if belief:
+                formula_dict = StateEntry(parsetree_list, K_VISITED | B_VISITED | N_VISITED) #watch this
+            else:
+                formula_dict = StateEntry(parsetree_list, K_VISITED | N_VISITED) #watch this
+            for successor in G.get_successors(node, label):
+                if formula_dict in G.states[successor]:
+                    has_label_successor = True
+            if not has_label_successor:
+                return False
+        if belief:
+            if is_knowledge(formula.formula):
+                label = 'R'+ get_agent(formula.formula)
+                has_label_successor = False
+                formula_dict = StateEntry(formula.formula[1], K_VISITED | B_VISITED | N_VISITED) #watch this
+                for successor in G.get_successors(node, label):
+                    if formula_dict in G.states[successor]:
+                        has_label_successor = True
+                if not has_label_successor:
+                    return False
+    return True
+
 
 def is_resolvable(G, node, formula, belief):
     if is_eventually(formula):
@@ -98,9 +303,9 @@ def is_resolvable(G, node, formula, belief):
     else: #is_until
         check_formula = formula[0][3]
     if belief:
-        check_formula_dict = {'formula':check_formula, 'k_visited': True, 'b_visited': True, 'n_visited': True}
+        check_formula_dict = StateEntry(check_formula, K_VISITED | B_VISITED | N_VISITED)
     else:
-        check_formula_dict = {'formula':check_formula, 'k_visited': True, 'b_visited': False, 'n_visited': True}
+        check_formula_dict = StateEntry(check_formula, K_VISITED | N_VISITED)
     return temporal_bfs(G, node, check_formula_dict)
 
 
@@ -111,121 +316,141 @@ def temporal_bfs(G, node, check_formula_dict):
     queue.append(node)
     while queue:
         current_node = queue.popleft()
-        if check_formula_dict in G.node[current_node]['formulae']:
+        if check_formula_dict in G.states[current_node]:
             return True
-        for successor in G[current_node]:
-            if G[current_node][successor][0]['label'] == 'n':
-                if successor not in visited:
-                    visited.add(successor)
-                    queue.append(successor)
-            else:
-                continue
+        for successor in G.get_successors(current_node, 'n'):
+            if successor not in visited:
+                visited.add(successor)
+                queue.append(successor)
     return False
 
 
-def build_knowledge_sucessors(G, belief):
-    for node in G:
-        for formula in G.node[node]['formulae']:
-            if not formula['k_visited']:
-                formula['k_visited'] = True
-                if is_negated_unary_or_atom(formula['formula'],'knowledge'):
+def build_knowledge_sucessors(G, node, belief, budget=None, frontier=None):
+    '''
+    Build the successors of the knowledge (and belief) formulae of a state not built yet
+    :param G: StateGraph
+    :param node: Int id of the state
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, the branches and nodes built are spent on it
+    :param frontier: Deque if given, the new states are appended to it
+    '''
+    for formula in G.states[node]:
+        if not formula.flags & K_VISITED:
+            formula.flags |= K_VISITED
+            if is_negated_unary_or_atom(formula.formula,'knowledge'):
+                new_state_formula_list = []
+                idx = get_agent(formula.formula[1]) #index of the knowledge formula
+                G.has_negated_k[node].append(idx)
+                new_state_formula_list.append(normalize_formula(get_negation(formula.formula[1][1]))) #inside formula of a negated knowledge formula may not be in NNF
+                for f in G.states[node]:
+                    if is_knowledge(f.formula) and get_agent(f.formula) == idx and f.formula not in new_state_formula_list:
+                        new_state_formula_list.append(f.formula)
+                        new_state_formula_list.append(f.formula[1])
+                    if  is_negated_unary_or_atom(f.formula, 'knowledge') and get_agent(f.formula[1]) == idx and f.formula not in new_state_formula_list:
+                        new_state_formula_list.append(f.formula)
+                for state in get_successor_states(new_state_formula_list, belief, budget, G.identity):
+                    G.add_edge(node, add_state(G, state, budget, frontier), 'R'+idx)
+    if belief:
+        for formula in G.states[node]:
+            if not formula.flags & B_VISITED:
+                formula.flags |= B_VISITED
+                if is_knowledge(formula.formula) and get_agent(formula.formula) not in G.has_negated_k[node]:
                     new_state_formula_list = []
-                    idx = str(formula['formula'][1][0][1:]) #index of the knowledge formula
-                    G.node[node]['has_negated_k'].append(idx)
-                    new_state_formula_list.append(sort_recursive(get_NNF_recursive(get_negation(formula['formula'][1][1])))) #inside formula of a negated knowledge formula may not be in NNF
-                    for f in G.node[node]['formulae']:
-                        if is_knowledge(f['formula']) and str(f['formula'][0][1:]) == idx and f['formula'] not in new_state_formula_list:
-                            new_state_formula_list.append(f['formula'])
-                            new_state_formula_list.append(f['formula'][1])
-                        if  is_negated_unary_or_atom(f['formula'], 'knowledge') and str(f['formula'][1][0][1:]) == idx and f['formula'] not in new_state_formula_list:
-                            new_state_formula_list.append(f['formula'])
-                    new_state_pc_tableaux = get_tableaux(new_state_formula_list, belief)
-                    if new_state_pc_tableaux:
-                        new_states, agents_list = build_states(new_state_pc_tableaux)
-                        for state in new_states:
-                            if str(state) not in G:
-                                G.add_node(str(state), formulae=state, contract_visited=False, has_negated_k=[])
-                            if (node,str(state)) not in G.edges():
-                                G.add_edge(node,str(state), label='R'+idx)
-                        G.graph['modified'] = True
-                        return G
-        if belief:
-            for formula in G.node[node]['formulae']:
-                if not formula['b_visited']:
-                    formula['b_visited'] = True
-                    if is_knowledge(formula['formula']) and str(formula['formula'][0][1]) not in G.node[node]['has_negated_k']:
-                        new_state_formula_list = []
-                        for f in G.node[node]['formulae']:
-                            if is_knowledge(f['formula']) and str(f['formula'][0][1:]) == str(formula['formula'][0][1:]) and f['formula'] not in new_state_formula_list:
-                                new_state_formula_list.append(f['formula'])
-                                new_state_formula_list.append(f['formula'][1])
-                        new_state_pc_tableaux = get_tableaux(new_state_formula_list, belief)
-                        if new_state_pc_tableaux:
-                            new_states, agents_list = build_states(new_state_pc_tableaux)
-                            for state in new_states:
-                                if str(state) not in G:
-                                    G.add_node(str(state), formulae=state, contract_visited=False, has_negated_k=[])
-                                if (node,str(state)) not in G.edges():
-                                    G.add_edge(node,str(state), label='R'+str(formula['formula'][0][1:]))
-                            G.graph['modified'] = True
-                            return G
-    return G
+                    for f in G.states[node]:
+                        if is_knowledge(f.formula) and get_agent(f.formula) == get_agent(formula.formula) and f.formula not in new_state_formula_list:
+                            new_state_formula_list.append(f.formula)
+                            new_state_formula_list.append(f.formula[1])
+                    for state in get_successor_states(new_state_formula_list, belief, budget, G.identity):
+                        G.add_edge(node, add_state(G, state, budget, frontier), 'R'+get_agent(formula.formula))
 
 
-def build_temporal_sucessors(G, belief):
-    for node in G:
-        for formula in G.node[node]['formulae']:
-            if not formula['n_visited']:
-                formula['n_visited'] = True
-                if is_next(formula['formula']):
-                    new_state_formula_list = []
-                    new_state_formula_list.append(formula['formula'][1])
-                    for f in G.node[node]['formulae']:
-                        if is_next(f['formula']) and f['formula'][1] not in new_state_formula_list:
-                            new_state_formula_list.append(f['formula'][1])
-                    new_state_pc_tableaux = get_tableaux(new_state_formula_list, belief)
-                    if new_state_pc_tableaux:
-                        new_states, agents_list = build_states(new_state_pc_tableaux)
-                        for state in new_states:
-                            if str(state) not in G:
-                                G.add_node(str(state), formulae=state, contract_visited=False, has_negated_k=[])
-                            if (node,str(state)) not in G.edges():
-                                G.add_edge(node,str(state), label='n')
-                        G.graph['modified'] = True
-                        return G
-    return G
+def build_temporal_sucessors(G, node, belief, budget=None, frontier=None):
+    '''
+    Build the successors of the next formulae of a state not built yet
+    :param G: StateGraph
+    :param node: Int id of the state
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget if given, the branches and nodes built are spent on it
+    :param frontier: Deque if given, the new states are appended to it
+    '''
+    for formula in G.states[node]:
+        if not formula.flags & N_VISITED:
+            formula.flags |= N_VISITED
+            if is_next(formula.formula):
+                new_state_formula_list = []
+                new_state_formula_list.append(formula.formula[1])
+                for f in G.states[node]:
+                    if is_next(f.formula) and f.formula[1] not in new_state_formula_list:
+                        new_state_formula_list.append(f.formula[1])
+                for state in get_successor_states(new_state_formula_list, belief, budget, G.identity):
+                    G.add_edge(node, add_state(G, state, budget, frontier), 'n')
 
 
-def get_graph(tableaux_list, idx, belief):
+def get_graph(tableaux_list, idx, belief, budget=None, checkpoint=None, identity='name'):
     '''
-    :param tableaux_list: List list of tableau dict structure with a list of tableau and some global attributes
+    :param tableaux_list: List list (or any iterable) of tableau dict structure with a list of tableau and some global attributes
     :param idx: Int index of the graph
     :param belief: Boolean if it is to use logic of belief
-    :return: Dict containing the states list, next time relation list and knowledge relation list
-    '''
-    if tableaux_list:
-        states, agents_list = build_states(tableaux_list)
-        MDG = nx.MultiDiGraph(name='Tableau Graph', modified=True, agents_list=agents_list)
-        for state in states:
-            MDG.add_node(str(state), formulae=state, contract_visited=False, has_negated_k=[])
-        MDG = build_successors(MDG, belief)
-        MDG.graph['modified'] = True
-        draw_graph(MDG, idx)
-        while MDG.graph['modified']:
-            MDG.graph['modified'] = False
-            MDG = contract(MDG,belief)
+    :param budget: Budget if given, the construction stops when a limit is reached and the graph is unknown
+    :param checkpoint: Checkpoint if given, the graph (with the visited flags of its states) is saved on it
+    every so often, when it holds a saved graph tableaux_list is not used and the run goes on from there
+    :param identity: String one of stategraph.IDENTITIES, states with the same key are one node
+    :return: Dict budget.get_result with 'graph', the StateGraph as far as it was built (None if the
+    tableaux is not proper), None without a budget
+    '''
+    saved = checkpoint and checkpoint.restore('graph')
+    if saved is not None:
+        G, phase = saved['graph'], saved['phase']
+    else:
+        G, phase = None, 'successors'
+        states, agents_list = build_states(tableaux_list or [])  # tableaux_list may be a generator
+    if G is not None or states:
+        try:
+            if saved is None:
+                G = StateGraph(name='Tableau Graph', agents_list=agents_list, identity=identity)
+                for state in states:
+                    add_state(G, state, budget)
+                if checkpoint is not None:
+                    checkpoint.save('graph', {'phase': phase, 'graph': G})  # the tableaux are done
+            if phase == 'successors':
+                G = build_successors(G, belief, budget, checkpoint)
+                G.modified = True
+                draw_graph(G.to_networkx(), idx)
+            G = contract_graph(G, belief, budget, checkpoint)
+        except BudgetExceeded as error:
+            print 'unknown: budget exceeded (' + error.reason + ')'
+            print format_usage(error.usage)
+            result = get_result(budget, get_graph_stats(G), error)
+            result['graph'] = G
+            return result
+        MDG = G.to_networkx()
         #print 'nodes: ' + str(MDG.nodes())
         #print 'edges: ' + str(MDG.edges())
         print nx.info(MDG)
+        print 'merged states: ' + str(G.merged)
         print 'nodes:'
-        for index, node in enumerate(MDG):
+        for index, node in enumerate(G):
             print str(index) + ': ',
-            for formula in MDG.node[node]['formulae']:
-                print str(formula['formula']) + ',',
+            for formula in G.states[node]:
+                print str(formula.formula) + ',',
             print
         draw_graph(MDG, idx)
     else:
         print 'this tableaux is not proper'
+    if budget is not None:
+        result = get_result(budget, get_graph_stats(G))
+        result['graph'] = G
+        return result
+
+
+def get_graph_stats(G):
+    '''
+    :param G: StateGraph, None if there is none
+    :return: Dict number of nodes, edges and merged states of G
+    '''
+    if G is None:
+        return {'nodes': 0, 'edges': 0, 'merged states': 0}
+    return {'nodes': G.number_of_nodes(), 'edges': G.number_of_edges(), 'merged states': G.merged}
 
 
 def draw_graph(G, idx):
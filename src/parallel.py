@@ -0,0 +1,184 @@
+from collections import deque
+import multiprocessing
+
+from budget import Budget, BudgetExceeded
+from scheduler import WorklistBranch, WorklistScheduler, remove_redundant_branches
+
+
+__author__ = 'thiagovieira'
+
+'''
+Parallel worklist engine. The tableau is split breadth first until there are enough open subtrees,
+which a process pool then expands depth first, taking them from a shared task queue. The closure is
+saturated before the split and sent to every worker once, so branches travel as tuples of ids and
+bit masks (WorklistBranch.to_tuple) and the ids mean the same in every process. Every subtree is
+pruned on its own, whatever the worker expanded before, and the branches repeated across subtrees are
+dropped once they are all done, so the result only depends on the number of workers. With a budget the
+workers count the branches they build on one shared counter, so the limit holds for the whole pool
+'''
+
+SUBTREES_PER_WORKER = 4  # open subtrees handed out per worker, so faster workers take the slack
+
+_worker_scheduler = None  # WorklistScheduler of a pool process
+_worker_counter = None  # multiprocessing.Value branches built by the run, shared by the pool
+
+
+class SharedBudget(Budget):
+    '''
+    Budget of a worker, the branches are spent on counter, shared with the other workers of the run
+    and the parent, so max_branches bounds the branches of the whole run
+    '''
+
+    def __init__(self, counter, seconds=None, branches=None, memory=None):
+        Budget.__init__(self, seconds, branches, memory=memory)
+        self.counter = counter
+
+    def spend(self, branches=0, nodes=0):
+        with self.counter.get_lock():
+            self.counter.value += branches
+        self.nodes += nodes
+        self.check()
+
+    def check(self):
+        self.branches = self.counter.value
+        Budget.check(self)
+
+
+def _init_worker(formulae, belief, rule_order, sub_complete, prune, strategy, semantic, counter):
+    '''
+    :param formulae: List closure formulae of the parent scheduler, in id order
+    :param belief: Boolean if it is to use logic of belief
+    :param rule_order: String one of RULE_ORDERS
+    :param sub_complete: String one of SUB_COMPLETE_MODES
+    :param prune: String one of PRUNE_MODES
+    :param strategy: String one of BETA_STRATEGIES
+    :param semantic: Boolean if it is to use semantic branching for disjunctions
+    :param counter: multiprocessing.Value branches built by the run
+    '''
+    global _worker_scheduler, _worker_counter
+    _worker_counter = counter
+    _worker_scheduler = WorklistScheduler(belief, rule_order, sub_complete, None, prune, strategy, semantic)
+    for formula in formulae:
+        _worker_scheduler.closure.get_id(formula)  # same order, same ids
+    _worker_scheduler.saturate_closure()
+
+
+def _expand_subtree(task):
+    '''
+    :param task: Tuple (open branch, as built by WorklistBranch.to_tuple, dict limits of get_worker_limits
+    or None)
+    :return: Tuple (list of the saturated open branches of its subtree as tuples, dict counters, String
+    the limit reached, None if the subtree is done)
+    '''
+    data, limits = task
+    stats = _worker_scheduler.stats
+    for key in stats:
+        stats[key] = 0
+    _worker_scheduler.clear_pruning()
+    _worker_scheduler.budget = None
+    if limits is not None:
+        _worker_scheduler.budget = SharedBudget(_worker_counter, limits['seconds'], limits['branches'],
+                                                limits['memory'])
+        _worker_scheduler.budget.start = limits['start']  # the clock of the run
+    try:
+        if _worker_scheduler.budget is not None:
+            _worker_scheduler.budget.check()  # another worker may have used the budget up already
+        branches = [branch.to_tuple() for branch in _worker_scheduler.iter_branches(WorklistBranch.from_tuple(data))]
+    except BudgetExceeded as error:
+        return [], dict(stats), error.reason
+    return branches, dict(stats), None
+
+
+def get_worker_limits(budget):
+    '''
+    :param budget: Budget of the run, None if there is none
+    :return: Dict limits of the budget of a subtree: the time and the branches of the run (spent on the
+    shared counter, see SharedBudget) and the memory limit, that holds for the worker process, None
+    without a budget
+    '''
+    if budget is None:
+        return None
+    return {'seconds': budget.seconds, 'branches': budget.max_branches, 'memory': budget.memory,
+            'start': budget.start}
+
+
+def split_tableau(scheduler, branch, subtrees):
+    '''
+    Expand breadth first, stopping every branch at its next split, until there are enough open subtrees
+    :param scheduler: WorklistScheduler of the run
+    :param branch: WorklistBranch initial branch
+    :param subtrees: Int number of open subtrees wanted
+    :return: Tuple (list of branches saturated while splitting, list of open unsaturated branches)
+    '''
+    saturated = []
+    frontier = deque([branch])
+    while frontier and len(frontier) < subtrees:
+        branch = frontier.popleft()
+        pending = []
+        expanded = scheduler.expand(branch, pending, stop_on_split=True)
+        if expanded:
+            saturated.append(branch)
+        elif expanded is None:
+            frontier.append(branch)
+        frontier.extend(pending)
+    return saturated, list(frontier)
+
+
+def get_parallel_tableaux(formula_list, belief, workers=None, rule_order='alpha-first', sub_complete='eager',
+                          stats=None, prune='none', strategy='queue', semantic=False, budget=None):
+    '''
+    Same branches as the worklist engine. They come in a deterministic order for a given number of
+    workers: the branches saturated while splitting, then the branches of every subtree in split order.
+    Pruning drops redundant branches inside each subtree as they are built, the ones repeated across
+    subtrees are dropped once every subtree is done
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param workers: Int number of worker processes, the number of CPUs by default
+    :param rule_order: String one of RULE_ORDERS
+    :param sub_complete: String one of SUB_COMPLETE_MODES
+    :param stats: Dict if given, updated with the counters of the run (of every process)
+    :param prune: String one of PRUNE_MODES
+    :param strategy: String one of BETA_STRATEGIES
+    :param semantic: Boolean if it is to use semantic branching for disjunctions
+    :param budget: Budget if given, checked while splitting, then every worker stops its subtree once the
+    time, the branches of the run (counted across the workers) or its memory are used up. The branches
+    every worker built are spent on it once the pool is done
+    :return: List of tableaux with all rules applied to its branches
+    '''
+    workers = workers or multiprocessing.cpu_count()
+    scheduler = WorklistScheduler(belief, rule_order, sub_complete, stats, prune, strategy, semantic,
+                                  budget=budget)
+    branch = scheduler.build_initial_branch(formula_list)
+    if branch is None:
+        return None
+    scheduler.saturate_closure()
+    saturated, subtrees = split_tableau(scheduler, branch, SUBTREES_PER_WORKER * workers)
+    if subtrees:
+        counter = multiprocessing.Value('l', budget.branches if budget is not None else 0)
+        pool = multiprocessing.Pool(workers, _init_worker,
+                                    (scheduler.closure.formulae, belief, rule_order, sub_complete, prune,
+                                     strategy, semantic, counter))
+        limits = get_worker_limits(budget)
+        reason = None
+        try:
+            for branches, worker_stats, reason in pool.imap(_expand_subtree,
+                                                            [(branch.to_tuple(), limits) for branch in subtrees]):
+                saturated.extend(WorklistBranch.from_tuple(data) for data in branches)
+                for key, value in worker_stats.iteritems():
+                    scheduler.stats[key] += value
+                if reason is not None:
+                    pool.terminate()  # the budget ran out, the subtrees left are not needed
+                    break
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.close()
+            pool.join()
+        if budget is not None:
+            budget.branches = counter.value  # every branch built, by the subtrees stopped half way too
+            if reason is not None:
+                raise BudgetExceeded(reason, budget.get_usage())
+            budget.check()
+    saturated = remove_redundant_branches(saturated, prune, scheduler.stats)
+    return [branch.to_tableau(scheduler.closure) for branch in saturated]
@@ -0,0 +1,96 @@
+__author__ = 'thiagovieira'
+
+'''
+Entries of a formula on a tableau branch or on a graph state: the formula and its visited flags
+packed in one int, two slots instead of a dict with a key for every flag. An entry is read and written
+like the dict it replaces (entry['formula'], entry['k_visited'] = True), the rule loops use
+formula and flags directly
+'''
+
+ALPHA_VISITED = 1
+BETA_VISITED = 2
+SUB_COMPLETE_VISITED = 4
+
+K_VISITED = 1
+B_VISITED = 2
+N_VISITED = 4
+
+
+class FlagRecord(object):
+    '''
+    formula and the bits of its flags, FLAGS maps the name of every flag to its bit.
+    Two entries are equal when they hold the same formula with the same flags
+    '''
+    __slots__ = ('formula', 'flags')
+    FLAGS = {}
+
+    def __init__(self, formula, flags=0):
+        self.formula = formula
+        self.flags = flags
+
+    def __getitem__(self, key):
+        if key == 'formula':
+            return self.formula
+        return self.flags & self.FLAGS[key] != 0
+
+    def __setitem__(self, key, value):
+        if key == 'formula':
+            self.formula = value
+        elif value:
+            self.flags |= self.FLAGS[key]
+        else:
+            self.flags &= ~self.FLAGS[key]
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.flags == self.flags and other.formula == self.formula
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None  # mutable, as the dicts were
+
+    def __getstate__(self):
+        return self.formula, self.flags
+
+    def __setstate__(self, state):
+        self.formula, self.flags = state
+
+    def copy(self):
+        '''
+        :return: FlagRecord a new entry with the same formula and flags
+        '''
+        return self.__class__(self.formula, self.flags)
+
+    def to_dict(self):
+        '''
+        :return: Dict the entry as the dict it replaces
+        '''
+        entry = {'formula': self.formula}
+        for key, bit in self.FLAGS.iteritems():
+            entry[key] = self.flags & bit != 0
+        return entry
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class BranchEntry(FlagRecord):
+    '''
+    Formula on a tableau branch, with the rules already applied to it
+    '''
+    __slots__ = ()
+    FLAGS = {'alpha-visited': ALPHA_VISITED, 'beta-visited': BETA_VISITED,
+             'sub-complete-visited': SUB_COMPLETE_VISITED}
+
+
+class StateEntry(FlagRecord):
+    '''
+    Formula on a graph state, with the successors already built for it.
+    The repr is the one of the dict it replaces, so str(state) still names the same graph node
+    '''
+    __slots__ = ()
+    FLAGS = {'k_visited': K_VISITED, 'b_visited': B_VISITED, 'n_visited': N_VISITED}
+
+    def __repr__(self):
+        return '{\'n_visited\': %r, \'formula\': %r, \'b_visited\': %r, \'k_visited\': %r}' % (
+            self.flags & N_VISITED != 0, self.formula, self.flags & B_VISITED != 0, self.flags & K_VISITED != 0)
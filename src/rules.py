@@ -0,0 +1,95 @@
+from formula_utils import *
+
+
+__author__ = 'thiagovieira'
+
+'''
+Formulae added by each tableau rule, shared by every tableau engine
+'''
+
+RULE_CACHES = {'subformula complete': LRUCache()}  # keyed on interned formulae
+
+
+def get_alpha_formulae(formula, belief):
+    '''
+    :param formula: Formula interned formula
+    :param belief: Boolean if it is to use logic of belief
+    :return: List formulae the alpha rule adds to a branch holding formula, empty if no alpha rule applies
+    '''
+    if is_conjuction(formula):
+        return [formula[0][1], formula[0][3]]
+    elif is_always(formula):
+        return [formula[1], make_unary('N', formula)]
+    elif is_knowledge(formula) and not belief:
+        return [formula[1]]
+    return []
+
+
+def get_beta_formulae(formula):
+    '''
+    :param formula: Formula interned formula
+    :return: Tuple (beta1, beta2) formulae of the current and of the new branch of a beta rule, None if no
+    beta rule applies. beta2 is in NNF
+    '''
+    if is_until(formula) or is_unless(formula):
+        beta2 = make_binary(make_binary(get_negation(formula[0][3]), '^', formula[0][1]), '^',
+                            make_unary('N', formula))
+        return formula[0][3], get_NNF_iterative(beta2)
+    elif is_eventually(formula):
+        beta2 = make_binary(get_negation(formula[1]), '^', make_unary('N', formula))
+        return formula[1], get_NNF_iterative(beta2)
+    elif is_disjunction(formula):
+        return formula[0][1], formula[0][3]
+    return None
+
+
+def get_beta_complement(formula):
+    '''
+    Semantic branching: the new branch of A v B also gets ~A, so its models are never models of the current
+    branch. The until, unless and eventuality rules already put the negation of beta1 in beta2
+    :param formula: Formula interned formula
+    :return: Formula negation of beta1 in NNF if formula is a disjunction, None otherwise
+    '''
+    if is_disjunction(formula):
+        return get_NNF_iterative(get_negation(formula[0][1]))
+    return None
+
+
+def get_knowledge_subformulae(formula):
+    '''
+    :param formula: Formula knowledge formula
+    :return: List knowledge subformulae of formula with its agent, formula itself excluded
+    '''
+    return [sub for sub in get_subformulae_iterative(formula, [])[1:]
+            if is_knowledge(sub) and get_agent(sub) == get_agent(formula)]
+
+
+@lru_memoize(RULE_CACHES['subformula complete'])
+def get_subformula_complete_table(formula):
+    '''
+    Computed once per distinct knowledge formula, every branch holding it shares the table
+    :param formula: Formula knowledge formula
+    :return: Tuple of (subformula, negated subformula) pairs, for each knowledge subformula of formula
+    with its agent, formula itself excluded
+    '''
+    return tuple((sub, get_negation(sub)) for sub in get_knowledge_subformulae(formula))
+
+
+def set_rule_cache_size(maxsize):
+    '''
+    :param maxsize: Int maximum number of entries of each rule cache (LRU eviction)
+    '''
+    for cache in RULE_CACHES.values():
+        cache.resize(maxsize)
+
+
+def clear_rule_caches():
+    for cache in RULE_CACHES.values():
+        cache.clear()
+
+
+def get_rule_cache_stats():
+    '''
+    :return: Dict cache name -> dict of hits, misses, evictions, size and maxsize
+    '''
+    return dict((name, cache.stats()) for name, cache in RULE_CACHES.items())
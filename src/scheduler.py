@@ -0,0 +1,632 @@
+from collections import deque
+
+from closure import Closure, PersistentBranch
+from formula_utils import *
+from rules import *
+
+
+__author__ = 'thiagovieira'
+
+'''
+Worklist driven tableau rules. Every branch keeps queues of the formulae it still has to expand, a
+formula is queued once when it is added to the branch and each rule is applied to it once, so the
+work grows with the formulae added instead of with the number of passes over every branch
+'''
+
+RULE_ORDERS = ['alpha-first', 'fifo']  # alpha before beta, or every rule in arrival order
+SUB_COMPLETE_MODES = ['eager', 'lazy']  # as soon as a knowledge formula arrives, or once the branch is saturated
+PRUNE_MODES = ['none', 'duplicates', 'subsumed']  # keep every branch, drop repeated formula sets, or also supersets
+BETA_STRATEGIES = ['queue', 'fewest-new', 'most-constrained', 'defer-temporal']  # see select_beta
+
+
+class WorklistBranch(PersistentBranch):
+    '''
+    PersistentBranch with the queues of formula ids waiting for the alpha, beta and subformula complete
+    rules. A split shares the formulae and copies only the queues, that is the pending work.
+    With backjumping, decision is the bit of the split that created the branch (0 for the initial one)
+    and dependencies maps every formula id on the branch to the mask of the decisions it depends on,
+    None otherwise
+    '''
+    __slots__ = ('alpha_queue', 'beta_queue', 'knowledge_queue', 'decision', 'dependencies')
+
+    def __init__(self):
+        PersistentBranch.__init__(self)
+        self.alpha_queue = deque()
+        self.beta_queue = deque()
+        self.knowledge_queue = deque()
+        self.decision = 0
+        self.dependencies = None
+
+    def copy(self):
+        '''
+        :return: WorklistBranch a new branch sharing the formulae and flags, with a copy of the queues
+        (and of the dependencies)
+        '''
+        branch = PersistentBranch.copy(self)
+        branch.alpha_queue = deque(self.alpha_queue)
+        branch.beta_queue = deque(self.beta_queue)
+        branch.knowledge_queue = deque(self.knowledge_queue)
+        branch.decision = 0
+        branch.dependencies = None if self.dependencies is None else dict(self.dependencies)
+        return branch
+
+
+    def to_tuple(self):
+        '''
+        :return: Tuple compact, picklable form of the branch (ids and masks only), see from_tuple
+        '''
+        return (tuple(self.get_order()), self.alpha_visited, self.beta_visited, self.sub_complete_visited,
+                self.was_modified, tuple(self.alpha_queue), tuple(self.beta_queue), tuple(self.knowledge_queue))
+
+    @staticmethod
+    def from_tuple(data):
+        '''
+        :param data: Tuple built by to_tuple
+        :return: WorklistBranch the branch data was built from
+        '''
+        branch = WorklistBranch()
+        for formula_id in data[0]:
+            branch.add(formula_id)
+        branch.alpha_visited, branch.beta_visited, branch.sub_complete_visited, branch.was_modified = data[1:5]
+        branch.alpha_queue, branch.beta_queue, branch.knowledge_queue = deque(data[5]), deque(data[6]), deque(data[7])
+        return branch
+
+
+class WorklistScheduler(object):
+    '''
+    Expands a tableau one rule application at a time. Branches waiting for expansion are kept on a
+    stack, a branch is expanded until it closes or its queues are empty.
+    alpha, beta and knowledge cache the rule consequences of each closure id, computed once per run.
+    stats counts rule applications, branches (the initial one and every split), closed branches,
+    the open branches find_open_branch skipped and the branches dropped by pruning.
+    pending is the stack of open branches waiting for expansion.
+    The mask of a branch is the set of its formulae whatever order they were added in, its fingerprint
+    is the mask with the work still pending on it (visited masks and queues, see get_fingerprint).
+    fingerprints holds the fingerprints of the branches already expanded, saturated the masks of the
+    saturated open branches kept and saturated_by_size the same masks by number of formulae, see is_redundant.
+    strategy picks the next beta formula of a branch (alpha-first rule order only) and with semantic the
+    new branch of a disjunction also gets the negation of its first disjunct, cached in complement.
+    With backjump every split is a decision with its own bit, decisions counts them, see backjump_pending.
+    budget, if any, is spent on every branch built and checkpoint, if any, gets the state of run every
+    so often, see save_checkpoint
+    '''
+
+    def __init__(self, belief, rule_order='alpha-first', sub_complete='eager', stats=None, prune='none',
+                 strategy='queue', semantic=False, backjump=False, budget=None, checkpoint=None):
+        if rule_order not in RULE_ORDERS:
+            raise ValueError('unknown rule order: ' + str(rule_order))
+        if sub_complete not in SUB_COMPLETE_MODES:
+            raise ValueError('unknown subformula complete mode: ' + str(sub_complete))
+        if prune not in PRUNE_MODES:
+            raise ValueError('unknown prune mode: ' + str(prune))
+        if strategy not in BETA_STRATEGIES:
+            raise ValueError('unknown beta strategy: ' + str(strategy))
+        if backjump and checkpoint is not None:
+            raise ValueError('checkpoints do not keep the decisions of backjumping')
+        self.belief = belief
+        self.rule_order = rule_order
+        self.sub_complete = sub_complete
+        self.prune = prune
+        self.strategy = strategy
+        self.semantic = semantic
+        self.backjump = backjump
+        self.decisions = 0
+        self.budget = budget
+        self.checkpoint = checkpoint
+        self.results = []
+        self.closure = Closure()
+        self.alpha = {}
+        self.beta = {}
+        self.knowledge = {}
+        self.complement = {}
+        self.pending = []
+        self.fingerprints = set()
+        self.saturated = set()
+        self.saturated_by_size = {}
+        self.stats = {} if stats is None else stats  # updated in place, so it can be read while iterating
+        for key in ['rule applications', 'branches', 'closed branches', 'skipped branches', 'duplicate branches',
+                    'subsumed branches', 'backjumped branches']:
+            self.stats.setdefault(key, 0)
+
+    def cache_rules(self, formula_id):
+        '''
+        Compute the rule consequences of a closure id, the first time it reaches a branch
+        :param formula_id: Int id given by the closure
+        '''
+        formula = self.closure.get_formula(formula_id)
+        get_id = self.closure.get_id
+        self.alpha[formula_id] = [get_id(alpha) for alpha in get_alpha_formulae(formula, self.belief)]
+        beta = get_beta_formulae(formula)
+        self.beta[formula_id] = beta and (get_id(beta[0]), get_id(beta[1]))
+        complement = self.semantic and get_beta_complement(formula)
+        if complement:
+            self.complement[formula_id] = get_id(complement)
+        if is_knowledge(formula):
+            self.knowledge[formula_id] = [(get_id(sub), get_id(negated_sub))
+                                          for sub, negated_sub in get_subformula_complete_table(formula)]
+
+    def saturate_closure(self):
+        '''
+        Give an id to every formula the rules can produce from the formulae seen so far, so that no
+        expansion adds new ids to the closure afterwards
+        '''
+        formula_id = 0
+        while formula_id < len(self.closure):
+            if formula_id not in self.alpha:
+                self.cache_rules(formula_id)
+            formula_id += 1
+
+    def add(self, branch, formula_id, dependencies=0):
+        '''
+        Add a formula to the branch and queue it for the rules that apply to it
+        :param branch: WorklistBranch branch without formula_id
+        :param formula_id: Int id given by the closure
+        :param dependencies: Int mask of the decisions formula_id depends on, kept with backjumping
+        '''
+        if formula_id not in self.alpha:
+            self.cache_rules(formula_id)
+        branch.add(formula_id)
+        if branch.dependencies is not None:
+            branch.dependencies[formula_id] = dependencies
+        if self.alpha[formula_id]:
+            branch.alpha_queue.append(formula_id)
+        if self.beta[formula_id]:
+            if self.rule_order == 'fifo':
+                branch.alpha_queue.append(formula_id)
+            else:
+                branch.beta_queue.append(formula_id)
+        if formula_id in self.knowledge:
+            branch.knowledge_queue.append(formula_id)
+
+    def count_branch(self):
+        self.stats['branches'] += 1
+        if self.budget is not None:
+            self.budget.spend(branches=1)
+
+    def build_initial_branch(self, formula_list):
+        '''
+        :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+        :return: WorklistBranch branch with the initial formulae, None if it is closed
+        '''
+        branch = WorklistBranch()
+        if self.backjump:
+            branch.dependencies = {}
+        for formula in formula_list:
+            formula_id = self.closure.get_id(parsetree_list_to_formula(formula))
+            if formula_id not in branch:
+                self.add(branch, formula_id)
+        self.count_branch()
+        if self.closure.is_closed(branch.mask):
+            self.stats['closed branches'] += 1
+            return None
+        return branch
+
+    def expand(self, branch, pending, stop_on_split=False):
+        '''
+        Apply rules to branch until it is saturated or closed, new branches of a split go to pending
+        :param branch: WorklistBranch open branch
+        :param pending: List stack of WorklistBranch waiting for expansion
+        :param stop_on_split: Boolean if True, also stop right after a split added a branch to pending
+        :return: Boolean True if branch is saturated and open, False if it closed, None if it stopped on a split
+        '''
+        size = len(pending)
+        while True:
+            if stop_on_split and len(pending) > size:
+                return None
+            if branch.knowledge_queue and (self.sub_complete == 'eager' or
+                                           not (branch.alpha_queue or branch.beta_queue)):
+                self.apply_sub_complete(branch, branch.knowledge_queue.popleft(), pending)
+            elif branch.alpha_queue:
+                formula_id = branch.alpha_queue.popleft()
+                if self.alpha[formula_id]:
+                    self.apply_alpha(branch, formula_id)
+                else:  # beta formula, with the fifo rule order
+                    self.apply_beta(branch, formula_id, pending)
+            elif branch.beta_queue:
+                self.apply_beta(branch, self.select_beta(branch), pending)
+            else:
+                return True
+            if self.closure.is_closed(branch.mask):
+                self.stats['closed branches'] += 1
+                return False
+
+    def select_beta(self, branch):
+        '''
+        'queue' takes the beta formulae in arrival order, the other strategies take the one with the
+        lowest score (the first one on ties):
+        'fewest-new' the number of formulae the rule would add (its components and their alpha formulae
+        not on the branch yet), 'most-constrained' the number of components that are not on the branch
+        and would not close it (a literal whose complement is there closes it, so the rule does not
+        really split) and 'defer-temporal' 1 for the until, unless and eventuality rules, 0 for disjunctions
+        :param branch: WorklistBranch branch with a non empty beta queue
+        :return: Int formula id taken out of the beta queue
+        '''
+        queue = branch.beta_queue
+        if self.strategy == 'queue' or len(queue) == 1:
+            return queue.popleft()
+        formula_id = min(queue, key=lambda formula_id: self.get_beta_score(branch, formula_id))
+        queue.remove(formula_id)
+        return formula_id
+
+    def get_beta_score(self, branch, formula_id):
+        '''
+        :param branch: WorklistBranch open branch
+        :param formula_id: Int id of a beta formula queued on branch
+        :return: Int score of the beta formula for the strategy, see select_beta
+        '''
+        beta1_id, beta2_id = self.beta[formula_id]
+        if self.strategy == 'defer-temporal':
+            return 0 if is_disjunction(self.closure.get_formula(formula_id)) else 1
+        if self.strategy == 'most-constrained':
+            return sum(beta_id not in branch and not self.closure.is_closed(branch.mask | 1 << beta_id)
+                       for beta_id in (beta1_id, beta2_id))
+        new_formulae = set()
+        for beta_id in (beta1_id, beta2_id):
+            if beta_id not in branch:
+                if beta_id not in self.alpha:
+                    self.cache_rules(beta_id)
+                new_formulae.add(beta_id)
+                new_formulae.update(alpha_id for alpha_id in self.alpha[beta_id] if alpha_id not in branch)
+        return len(new_formulae)
+
+    def new_decision(self):
+        '''
+        :return: Int bit of a new split, 0 without backjumping
+        '''
+        if not self.backjump:
+            return 0
+        self.decisions += 1
+        return 1 << (self.decisions - 1)
+
+    def get_dependencies(self, branch, formula_id):
+        '''
+        :param branch: WorklistBranch branch holding formula_id
+        :param formula_id: Int id given by the closure
+        :return: Int mask of the decisions formula_id depends on in branch, 0 without backjumping
+        '''
+        return 0 if branch.dependencies is None else branch.dependencies[formula_id]
+
+    def get_conflict(self, branch):
+        '''
+        :param branch: WorklistBranch closed branch
+        :return: Int mask of the decisions the formulae closing branch depend on, 0 without backjumping
+        '''
+        if branch.dependencies is None:
+            return 0
+        clash = branch.mask & (branch.mask >> 1) & self.closure.literal_mask
+        if clash:
+            formula_id = (clash & -clash).bit_length() - 1  # a literal, its negation is the next id
+            return branch.dependencies[formula_id] | branch.dependencies[formula_id + 1]
+        false = branch.mask & self.closure.false_mask
+        return branch.dependencies[(false & -false).bit_length() - 1]
+
+    def apply_alpha(self, branch, formula_id):
+        self.stats['rule applications'] += 1
+        branch.alpha_visited |= 1 << formula_id
+        dependencies = self.get_dependencies(branch, formula_id)
+        for alpha_id in self.alpha[formula_id]:
+            if alpha_id not in branch:
+                self.add(branch, alpha_id, dependencies)
+
+    def apply_beta(self, branch, formula_id, pending):
+        self.stats['rule applications'] += 1
+        branch.beta_visited |= 1 << formula_id
+        beta1_id, beta2_id = self.beta[formula_id]
+        if beta2_id in branch:  # the formula already holds, beta1 is not forced on the branch
+            return
+        dependencies = self.get_dependencies(branch, formula_id)
+        decision = self.new_decision()
+        new_branch = branch.copy()
+        new_branch.decision = decision
+        self.add(new_branch, beta2_id, dependencies | decision)  # added on a new branch
+        complement_id = self.complement.get(formula_id)
+        if complement_id is not None and complement_id not in new_branch:
+            self.add(new_branch, complement_id, dependencies | decision)  # semantic branching, beta1 is false there
+        self.count_branch()
+        if self.closure.is_closed(new_branch.mask):
+            self.stats['closed branches'] += 1
+            dependencies |= self.get_conflict(new_branch) & ~decision  # beta1 is forced by what closes beta2
+        else:
+            pending.append(new_branch)
+            dependencies |= decision
+        if beta1_id not in branch:
+            self.add(branch, beta1_id, dependencies)  # added on current branch
+
+    def apply_sub_complete(self, branch, formula_id, pending):
+        self.stats['rule applications'] += 1
+        branch.sub_complete_visited |= 1 << formula_id
+        for sub_id, negated_sub_id in self.knowledge[formula_id]:
+            if sub_id not in branch and negated_sub_id not in branch:
+                decision = self.new_decision()
+                new_branch = branch.copy()
+                new_branch.decision = decision
+                self.add(branch, sub_id, decision)  # added on current branch
+                self.add(new_branch, negated_sub_id, decision)  # added on a new branch
+                self.count_branch()
+                pending.append(new_branch)
+
+    def is_redundant(self, branch, saturated=False):
+        '''
+        A branch with the formulae and the pending work of a branch already expanded only leads to the
+        branches that one led to (the same formulae with other queues may not, the beta rule splits even
+        when beta1 is on the branch), and every branch grown from a superset of a saturated open branch
+        holds all of its formulae. With prune 'duplicates' the first kind is dropped, with 'subsumed' both kinds
+        :param branch: WorklistBranch open branch
+        :param saturated: Boolean False if branch is about to be expanded, True if it is saturated and
+        only has to be compared with the saturated branches kept so far
+        :return: Boolean True if branch has to be dropped, counted in stats
+        '''
+        if self.prune == 'none':
+            return False
+        fingerprint = None if saturated else get_fingerprint(branch)
+        if (branch.mask in self.saturated) if saturated else (fingerprint in self.fingerprints):
+            self.stats['duplicate branches'] += 1
+            return True
+        if self.prune == 'subsumed' and has_subset(branch.mask, self.saturated_by_size):
+            self.stats['subsumed branches'] += 1
+            return True
+        if not saturated:
+            self.fingerprints.add(fingerprint)
+        else:
+            self.saturated.add(branch.mask)
+            self.saturated_by_size.setdefault(count_formulae(branch.mask), []).append(branch.mask)
+        return False
+
+    def clear_pruning(self):
+        '''
+        Forget the branches seen by is_redundant, so the next subtree is pruned on its own
+        '''
+        self.fingerprints = set()
+        self.saturated = set()
+        self.saturated_by_size = {}
+
+    def iter_branches(self, branch, pending=None):
+        '''
+        Depth first: a branch is expanded until it is saturated and yielded before the branches split
+        from it, so only the siblings pending along the current path are kept in memory.
+        Redundant branches (see is_redundant) are dropped before they are expanded and once saturated,
+        a branch can only be subsumed by the ones yielded before it
+        :param branch: WorklistBranch open branch
+        :param pending: List open branches waiting below branch, as restored from a checkpoint
+        :return: Generator of the saturated open WorklistBranch of the subtree of branch
+        '''
+        self.pending = pending = (pending or []) + [branch]
+        frames = []  # (size of pending, decision, conflict of its first branch) of the branches being expanded
+        conflict = None
+        while pending:
+            if self.checkpoint is not None and self.checkpoint.is_due():
+                self.save_checkpoint()
+            branch = pending.pop()
+            if branch.decision:
+                frames.append((len(pending), branch.decision, conflict and conflict & ~branch.decision))
+            if self.is_redundant(branch):
+                conflict = None  # not known, so nothing is pruned because of it
+            elif self.expand(branch, pending):
+                conflict = None
+                if not self.is_redundant(branch, saturated=True):
+                    yield branch
+            else:
+                conflict = self.get_conflict(branch)
+            if self.backjump:
+                conflict = self.backjump_pending(conflict, frames)
+
+    def backjump_pending(self, conflict, frames):
+        '''
+        Called when a branch is done, the branches on top of pending are the second branches of the splits
+        of its path, last split first. When the first branch of a split closed (every branch grown from
+        it closed) with a conflict that does not hold the decision of the split, the second branch also
+        holds the formulae closing it and is dropped without being expanded. The conflict of a split
+        where both branches closed is the conflict of the second one if it does not hold the decision,
+        the union of both conflicts without the decision otherwise.
+        frames has an entry for every second branch being expanded, resolved when its subtree is done
+        :param conflict: Int conflict of the branch just done, None if it is open
+        :param frames: List (size of pending, decision, conflict of the first branch or None) stack
+        :return: Int conflict of the first branch of the split on top of pending, None if it has an open branch
+        '''
+        pending = self.pending
+        while True:
+            while frames and frames[-1][0] == len(pending):
+                size, decision, first_conflict = frames.pop()
+                if first_conflict is None:
+                    conflict = None
+                elif conflict is not None and conflict & decision:
+                    conflict = first_conflict | conflict & ~decision
+            if conflict is None or not pending or pending[-1].decision & conflict:
+                return conflict
+            pending.pop()
+            self.stats['backjumped branches'] += 1
+
+    def find_open_branch(self, branch):
+        '''
+        Stop at the first saturated open branch, stats['skipped branches'] counts the open branches
+        left unexpanded (each one the root of a subtree that was not built)
+        :param branch: WorklistBranch open branch
+        :return: WorklistBranch saturated open branch of the subtree of branch, None if all of them close
+        '''
+        for branch in self.iter_branches(branch):
+            self.stats['skipped branches'] += len(self.pending)
+            return branch
+        return None
+
+    def run(self, formula_list):
+        '''
+        :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+        :return: List saturated open WorklistBranch, in the order they were completed, None if the
+        initial branch is closed
+        '''
+        state = self.checkpoint and self.checkpoint.restore('tableaux')
+        if state is not None:
+            pending = self.load_state(state)
+        else:
+            pending = [self.build_initial_branch(formula_list)]
+            if pending[0] is None:
+                return None
+        if pending:
+            for branch in self.iter_branches(pending.pop(), pending):
+                self.results.append(branch)
+        return remove_redundant_branches(self.results, self.prune, self.stats)
+
+    def save_checkpoint(self):
+        '''
+        Save the closure, the pending branches, the saturated open branches found so far (in results),
+        the masks of the pruning checks and the counters, branches as WorklistBranch.to_tuple
+        '''
+        self.checkpoint.save('tableaux', {'engine': 'worklist', 'formulae': self.closure.formulae,
+                                          'pending': [branch.to_tuple() for branch in self.pending],
+                                          'results': [branch.to_tuple() for branch in self.results],
+                                          'fingerprints': self.fingerprints, 'saturated': self.saturated,
+                                          'saturated_by_size': self.saturated_by_size, 'stats': self.stats})
+
+    def load_state(self, state):
+        '''
+        :param state: Dict saved by save_checkpoint, with the same options
+        :return: List pending WorklistBranch, the next one to expand last
+        '''
+        if state['engine'] != 'worklist':
+            raise ValueError('the checkpoint was saved by the ' + state['engine'] + ' engine')
+        for formula in state['formulae']:
+            self.closure.get_id(formula)  # same order, same ids
+        self.saturate_closure()
+        self.results = [WorklistBranch.from_tuple(data) for data in state['results']]
+        self.fingerprints = state['fingerprints']
+        self.saturated = state['saturated']
+        self.saturated_by_size = state['saturated_by_size']
+        self.stats.update(state['stats'])
+        return [WorklistBranch.from_tuple(data) for data in state['pending']]
+
+
+def remove_redundant_branches(branches, prune, stats):
+    '''
+    Drop the saturated branches with the formulae of an earlier one and, with prune 'subsumed', the ones
+    holding every formula of another one, wherever it is in the list
+    :param branches: List saturated open WorklistBranch
+    :param prune: String one of PRUNE_MODES
+    :param stats: Dict counters of the run, 'duplicate branches' and 'subsumed branches' are updated
+    :return: List the branches left, in the same order
+    '''
+    if prune == 'none':
+        return branches
+    masks = set()
+    unique = []
+    for branch in branches:
+        if branch.mask in masks:
+            stats['duplicate branches'] += 1
+        else:
+            masks.add(branch.mask)
+            unique.append(branch)
+    if prune == 'duplicates':
+        return unique
+    masks_by_size = {}
+    for mask in masks:
+        masks_by_size.setdefault(count_formulae(mask), []).append(mask)
+    minimal = []
+    for branch in unique:
+        if has_subset(branch.mask, masks_by_size):
+            stats['subsumed branches'] += 1
+        else:
+            minimal.append(branch)
+    return minimal
+
+
+def get_fingerprint(branch):
+    '''
+    :param branch: WorklistBranch open branch
+    :return: Tuple mask, visited masks and queues of branch, the same for branches that expand the same way
+    '''
+    return (branch.mask, branch.alpha_visited, branch.beta_visited, branch.sub_complete_visited,
+            tuple(branch.alpha_queue), tuple(branch.beta_queue), tuple(branch.knowledge_queue))
+
+
+def count_formulae(mask):
+    '''
+    :param mask: Int branch mask
+    :return: Int number of formulae on the branch
+    '''
+    return bin(mask).count('1')
+
+
+def has_subset(mask, masks_by_size):
+    '''
+    Only masks with fewer formulae can be strict subsets, so most of them are never compared
+    :param mask: Int branch mask
+    :param masks_by_size: Dict number of formulae to list of masks with that many
+    :return: Boolean True if some mask of masks_by_size is a strict subset of mask
+    '''
+    size = count_formulae(mask)
+    for other_size, masks in masks_by_size.iteritems():
+        if other_size < size:
+            for other in masks:
+                if mask & other == other:
+                    return True
+    return False
+
+
+def get_worklist_tableaux(formula_list, belief, rule_order='alpha-first', sub_complete='eager', stats=None,
+                          prune='none', strategy='queue', semantic=False, backjump=False, budget=None,
+                          checkpoint=None):
+    '''
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param rule_order: String one of RULE_ORDERS
+    :param sub_complete: String one of SUB_COMPLETE_MODES
+    :param stats: Dict if given, updated with the counters of the run
+    :param prune: String one of PRUNE_MODES
+    :param strategy: String one of BETA_STRATEGIES
+    :param semantic: Boolean if True, the new branch of a disjunction also gets the negation of its first disjunct
+    :param backjump: Boolean if True, second branches of splits that cannot help are not expanded
+    :param budget: Budget if given, BudgetExceeded is raised when a limit is reached
+    :param checkpoint: Checkpoint if given, the run is saved on it every so often and restored from it on resume
+    :return: List of tableaux with all rules applied to its branches
+    '''
+    scheduler = WorklistScheduler(belief, rule_order, sub_complete, stats, prune, strategy, semantic, backjump,
+                                  budget, checkpoint)
+    branches = scheduler.run(formula_list)
+    if branches is None:
+        return None
+    return [branch.to_tableau(scheduler.closure) for branch in branches]
+
+
+def get_worklist_witness(formula_list, belief, rule_order='alpha-first', sub_complete='eager', stats=None,
+                         prune='none', strategy='queue', semantic=False, backjump=False, budget=None):
+    '''
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param rule_order: String one of RULE_ORDERS
+    :param sub_complete: String one of SUB_COMPLETE_MODES
+    :param stats: Dict if given, updated with the counters of the run
+    :param prune: String one of PRUNE_MODES
+    :param strategy: String one of BETA_STRATEGIES
+    :param semantic: Boolean if True, the new branch of a disjunction also gets the negation of its first disjunct
+    :param backjump: Boolean if True, second branches of splits that cannot help are not expanded
+    :param budget: Budget if given, BudgetExceeded is raised when a limit is reached
+    :return: Dict the first saturated open tableau found, None if there is none
+    '''
+    scheduler = WorklistScheduler(belief, rule_order, sub_complete, stats, prune, strategy, semantic, backjump,
+                                  budget)
+    branch = scheduler.build_initial_branch(formula_list)
+    if branch is not None:
+        branch = scheduler.find_open_branch(branch)
+    return branch and branch.to_tableau(scheduler.closure)
+
+
+def iter_worklist_tableaux(formula_list, belief, rule_order='alpha-first', sub_complete='eager', stats=None,
+                           prune='none', strategy='queue', semantic=False, backjump=False, budget=None):
+    '''
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param rule_order: String one of RULE_ORDERS
+    :param sub_complete: String one of SUB_COMPLETE_MODES
+    :param stats: Dict if given, updated with the counters of the run as it goes
+    :param prune: String one of PRUNE_MODES
+    :param strategy: String one of BETA_STRATEGIES
+    :param semantic: Boolean if True, the new branch of a disjunction also gets the negation of its first disjunct
+    :param backjump: Boolean if True, second branches of splits that cannot help are not expanded
+    :param budget: Budget if given, BudgetExceeded is raised when a limit is reached
+    :return: Generator of tableaux with all rules applied to its branches, depth first
+    '''
+    scheduler = WorklistScheduler(belief, rule_order, sub_complete, stats, prune, strategy, semantic, backjump,
+                                  budget)
+    branch = scheduler.build_initial_branch(formula_list)
+    if branch is not None:
+        for branch in scheduler.iter_branches(branch):
+            yield branch.to_tableau(scheduler.closure)
@@ -0,0 +1,180 @@
+import networkx as nx
+
+
+__author__ = 'thiagovieira'
+
+'''
+State graph store of the graph construction. States get integer ids in the order they are added and
+edges are kept per relation label ('n' and one 'R<agent>' per agent) as adjacency lists indexed by
+id, with the reverse lists next to them, so successors, predecessors and removals never go through
+the states themselves. A state is identified by its name, its str with the order and flags of its
+formulae, as the networkx nodes were, or by its fingerprint, the set of its formulae, so the same state
+reached with its formulae in another order is one node. The pre-tableaux of the successors depend on
+the order of their formulae, so a fingerprinted graph, which expands each set of formulae once, may
+keep fewer states than the named one. networkx is only used to export the graph (to_networkx)
+'''
+
+IDENTITIES = ['fingerprint', 'name']  # set of the formulae, or str of the state (order and flags included)
+
+
+def get_fingerprint(state):
+    '''
+    :param state: List StateEntry formulae of a state
+    :return: Frozenset formulae of the state, whatever their order and flags
+    '''
+    return frozenset(entry.formula for entry in state)
+
+
+class StateGraph(object):
+    '''
+    states[i] is the list of StateEntry of state i, None once it is removed, and keys[i] its key, its
+    str when it was added (or its fingerprint, with the 'fingerprint' identity). ids maps the key of every
+    state left to its id, merged counts the states added again with their formulae in another order.
+    successors[label][i] and predecessors[label][i] are the ids linked to state i by label, pairs the
+    (source, target, label) of every edge, two states may be joined by several labels, once by each.
+    contract_visited and has_negated_k are the attributes of each state, modified and agents_list
+    the ones of the graph
+    '''
+
+    def __init__(self, name='Tableau Graph', agents_list=None, identity='name'):
+        if identity not in IDENTITIES:
+            raise ValueError('unknown state identity: ' + str(identity))
+        self.name = name
+        self.identity = identity
+        self.modified = True
+        self.agents_list = agents_list or []
+        self.states = []
+        self.keys = []
+        self.ids = {}
+        self.merged = 0
+        self.successors = {}
+        self.predecessors = {}
+        self.pairs = set()
+        self.contract_visited = []
+        self.has_negated_k = []
+        self.size = 0
+
+    def __iter__(self):
+        '''
+        :return: Iterator ids of the states left, in the order they were added
+        '''
+        states = self.states
+        return (state_id for state_id in xrange(len(states)) if states[state_id] is not None)
+
+    def __len__(self):
+        return self.size
+
+    def get_key(self, state):
+        '''
+        :param state: List StateEntry formulae of a state
+        :return: key of state in ids
+        '''
+        return get_fingerprint(state) if self.identity == 'fingerprint' else str(state)
+
+    def get_id(self, state):
+        '''
+        :param state: List StateEntry formulae of a state
+        :return: Int id of the state of the graph with the same key, None if there is none
+        '''
+        return self.ids.get(self.get_key(state))
+
+    def number_of_nodes(self):
+        return self.size
+
+    def number_of_edges(self):
+        return len(self.pairs)
+
+    def add_state(self, state):
+        '''
+        :param state: List StateEntry formulae of the state
+        :return: Tuple (Int id of the state, Boolean True if it was not in the graph yet)
+        '''
+        key = self.get_key(state)
+        state_id = self.ids.get(key)
+        if state_id is not None:
+            if len(state) > 1 and [entry.formula for entry in state] != \
+                    [entry.formula for entry in self.states[state_id]]:
+                self.merged += 1  # a node of its own when states were named by their str
+            return state_id, False
+        state_id = len(self.states)
+        self.states.append(state)
+        self.keys.append(key)
+        self.ids[key] = state_id
+        self.contract_visited.append(False)
+        self.has_negated_k.append([])
+        for label in self.successors:
+            self.successors[label].append([])
+            self.predecessors[label].append([])
+        self.size += 1
+        return state_id, True
+
+    def add_edge(self, source, target, label):
+        '''
+        :param source: Int id of the source state
+        :param target: Int id of the target state
+        :param label: String relation label, 'n' or 'R<agent>'
+        :return: Boolean False if source and target were already joined by label, True otherwise
+        '''
+        if (source, target, label) in self.pairs:
+            return False
+        if label not in self.successors:
+            self.successors[label] = [[] for _ in self.states]
+            self.predecessors[label] = [[] for _ in self.states]
+        self.pairs.add((source, target, label))
+        self.successors[label][source].append(target)
+        self.predecessors[label][target].append(source)
+        return True
+
+    def get_successors(self, state_id, label):
+        '''
+        :param state_id: Int id of a state
+        :param label: String relation label
+        :return: List ids of the states state_id reaches by label
+        '''
+        successors = self.successors.get(label)
+        return successors[state_id] if successors else []
+
+    def get_predecessors(self, state_id):
+        '''
+        :param state_id: Int id of a state
+        :return: Set ids of the states with an edge (any label) to state_id
+        '''
+        predecessors = set()
+        for by_id in self.predecessors.itervalues():
+            predecessors.update(by_id[state_id])
+        return predecessors
+
+    def remove_state(self, state_id):
+        '''
+        Remove a state and its edges, its id is not given again
+        :param state_id: Int id of a state left
+        '''
+        for label in self.successors:
+            successors, predecessors = self.successors[label], self.predecessors[label]
+            for target in successors[state_id]:
+                predecessors[target].remove(state_id)
+                self.pairs.discard((state_id, target, label))
+            for source in predecessors[state_id]:
+                if source != state_id:
+                    successors[source].remove(state_id)
+                    self.pairs.discard((source, state_id, label))
+            successors[state_id] = []
+            predecessors[state_id] = []
+        del self.ids[self.keys[state_id]]
+        self.states[state_id] = None
+        self.size -= 1
+
+    def to_networkx(self):
+        '''
+        :return: NetworkX MultiDiGraph with the states left as nodes named by their id, with their
+        formulae and attributes, and an edge with its label for every edge
+        '''
+        G = nx.MultiDiGraph(name=self.name, modified=self.modified, agents_list=self.agents_list)
+        for state_id in self:
+            G.add_node(state_id, formulae=self.states[state_id], contract_visited=self.contract_visited[state_id],
+                       has_negated_k=self.has_negated_k[state_id])
+        for label, successors in self.successors.iteritems():
+            for state_id in self:
+                for target in successors[state_id]:
+                    G.add_edge(state_id, target, label=label)
+        return G
@@ -1,7 +1,10 @@
-import gc
-
+from budget import BudgetExceeded, get_result
+from closure import Closure, BitsetBranch
 from formula_utils import *
-from utils import new_deepcopy
+from parallel import get_parallel_tableaux
+from records import *
+from rules import *
+from scheduler import get_worklist_tableaux, get_worklist_witness, iter_worklist_tableaux
 
 
 __author__ = 'thiagovieira'
@@ -12,71 +15,242 @@ def build_initial_tableau(formula_list):
     :param formula_list: List list of parsetree_list representing all initial formulas in NNF
     :return: Dict of tableaux with all rules applied to its branchs in tableaux_dict['tableaux']
     '''
-    formulae = []
-    for formula in formula_list:
-        if not [f for f in formulae if f['formula'] == formula]:  # check duplicate
-            formula_dict = {'formula': formula, 'alpha-visited': False,
-                            'beta-visited': False,
-                            'sub-complete-visited': False}
-            formulae.append(formula_dict)
-    tableau_dict = {'formulae': formulae, 'is_proper': False,
+    tableau_dict = {'formulae': [], 'index': set(), 'is_proper': False,
                     'was_modified': True}
+    is_proper_tableau = True
+    for formula in formula_list:
+        formula = parsetree_list_to_formula(formula)  # lists are accepted as well
+        if formula not in tableau_dict['index']:  # check duplicate
+            is_proper_tableau = add_formula(tableau_dict, formula) and is_proper_tableau
     tableaux = []
     tableaux.append(tableau_dict)
     tableaux_dict = {'tableaux': tableaux, 'was_modified': True}
-    if is_proper(tableaux_dict['tableaux'][0]):
+    if is_proper_tableau:
         tableaux_dict['tableaux'][0]['is_proper'] = True
         return tableaux_dict
     else:
         return None
 
 
-def get_tableaux(formula_list, belief):
+def new_branch_entry(formula):
+    '''
+    :param formula: Formula interned formula
+    :return: BranchEntry branch entry for formula, with no rule applied to it yet
+    '''
+    return BranchEntry(formula)
+
+
+def add_formula(tableau, formula):
+    '''
+    Append formula to the branch and to its index, tableau['index'] is the set of formulae on the branch
+    :param tableau: Dict tableau dict structure with a list of formulae and some attributes
+    :param formula: Formula interned formula, not on the branch yet
+    :return: Boolean False if formula closes the branch (false, or a literal whose complement is there), True otherwise
+    '''
+    tableau['formulae'].append(new_branch_entry(formula))
+    tableau['index'].add(formula)
+    return not closes_branch(tableau['index'], formula)
+
+
+def copy_tableau(tableau):
+    '''
+    Formulae are immutable and shared by every branch, so only the branch entries (for their visited
+    flags) and the index are copied
+    :param tableau: Dict tableau dict structure with a list of formulae and some attributes
+    :return: Dict a new tableau dict structure with the same formulae and flags
+    '''
+    return {'formulae': [BranchEntry(entry.formula, entry.flags) for entry in tableau['formulae']],
+            'index': set(tableau['index']),
+            'is_proper': tableau['is_proper'], 'was_modified': tableau['was_modified']}
+
+
+def closes_branch(index, formula):
+    '''
+    :param index: Set formulae on a branch
+    :param formula: Formula interned formula
+    :return: Boolean True if formula is false or a literal (atom or knowledge formula, negated or not) whose
+    complement is in index
+    '''
+    if is_false(formula):
+        return True
+    elif is_atom(formula) or is_knowledge(formula):
+        return get_negation(formula) in index
+    elif is_negated_unary_or_atom(formula, 'atom') or is_negated_unary_or_atom(formula, 'knowledge'):
+        return formula[1] in index
+    return False
+
+
+def get_tableaux(formula_list, belief, engine='dict', rule_order='alpha-first', sub_complete='eager', stats=None,
+                 workers=None, prune='none', strategy='queue', semantic=False, backjump=False, budget=None,
+                 checkpoint=None):
     '''
     :param formula_list: List list of parsetree_list representing all initial formulas in NNF
     :param belief: Boolean if it is to use logic of belief
+    :param engine: String 'dict' for branches as lists of formula dicts, 'bitset' for branches as
+    bit masks over the closure of the input (same branches, see get_bitset_tableaux), 'worklist'
+    for the rules driven by queues of unexpanded formulae (see scheduler.py) and 'parallel' for the
+    worklist engine on a process pool (see parallel.py)
+    :param rule_order: String worklist and parallel engines only, 'alpha-first' or 'fifo'
+    :param sub_complete: String worklist and parallel engines only, 'eager' or 'lazy' subformula completion
+    :param stats: Dict if given, updated with the counters of the run
+    :param workers: Int parallel engine only, number of worker processes (the number of CPUs by default)
+    :param prune: String worklist and parallel engines only, 'none', 'duplicates' to drop the branches with
+    the same formulae as another one or 'subsumed' to also drop the ones holding every formula of another one
+    (stats counts them as 'duplicate branches' and 'subsumed branches')
+    :param strategy: String worklist and parallel engines only, how the next beta formula of a branch is
+    chosen: 'queue' (arrival order), 'fewest-new', 'most-constrained' or 'defer-temporal', see
+    scheduler.WorklistScheduler.select_beta
+    :param semantic: Boolean worklist and parallel engines only, if True the new branch of A v B is A, ~A ^ B
+    :param backjump: Boolean worklist engine only, if True every formula keeps the splits it depends on and
+    the second branch of a split is not expanded when the first one closed because of earlier splits only
+    (stats counts them as 'backjumped branches'), the branches are the same
+    :param budget: Budget if given, every branch built is spent on it and BudgetExceeded is raised when
+    a limit is reached (with the parallel engine every worker stops its subtree once the time, the
+    branches counted across the workers or its memory are used up), see get_tableaux_result
+    :param checkpoint: Checkpoint if given (dict and worklist engines), the run is saved on it every so
+    often and a run saved on it is resumed
     :return: List of tableaux with all rules applied to its branches
     '''
-    tableaux_dict = build_initial_tableau(formula_list)
+    if engine == 'worklist':
+        return get_worklist_tableaux(formula_list, belief, rule_order, sub_complete, stats, prune, strategy,
+                                     semantic, backjump, budget, checkpoint)
+    elif backjump:
+        raise ValueError('backjumping needs the worklist engine')
+    elif checkpoint is not None and engine != 'dict':
+        raise ValueError('checkpoints need the dict or worklist engine')
+    elif engine == 'parallel':
+        return get_parallel_tableaux(formula_list, belief, workers, rule_order, sub_complete, stats, prune,
+                                     strategy, semantic, budget)
+    elif prune != 'none' or strategy != 'queue' or semantic:
+        raise ValueError('branch pruning, beta strategies and semantic branching need the worklist or '
+                         'parallel engine')
+    elif engine == 'bitset':
+        return get_bitset_tableaux(formula_list, belief, stats, budget)
+    elif engine != 'dict':
+        raise ValueError('unknown tableau engine: ' + str(engine))
+    state = checkpoint and checkpoint.restore('tableaux')
+    if state is not None:
+        if state['engine'] != 'dict':
+            raise ValueError('the checkpoint was saved by the ' + state['engine'] + ' engine')
+        tableaux_dict = state['tableaux']
+        if stats is not None and state['stats'] is not None:
+            stats.update(state['stats'])
+    else:
+        tableaux_dict = build_initial_tableau(formula_list)
+        if tableaux_dict and budget is not None:
+            budget.spend(branches=1)
     if tableaux_dict:
         while tableaux_dict['was_modified']:
+            if checkpoint is not None and checkpoint.is_due():
+                checkpoint.save('tableaux', {'engine': 'dict', 'tableaux': tableaux_dict, 'stats': stats})
             tableaux_dict['was_modified'] = False
+            if stats is not None:
+                count_pass(stats, tableaux_dict['tableaux'])
+            if budget is not None:
+                budget.check()
             tableaux_dict = apply_alpha_rules(tableaux_dict, belief)
-            tableaux_dict = apply_beta_rules(tableaux_dict)
-            tableaux_dict = get_subformula_complete(tableaux_dict)
+            tableaux_dict = apply_beta_rules(tableaux_dict, budget)
+            tableaux_dict = get_subformula_complete(tableaux_dict, budget)
         return tableaux_dict['tableaux']
     else:
         return None
 
 
-def get_subformula_complete(tableaux_dict):
+def get_tableaux_result(formula_list, belief, budget, **options):
+    '''
+    get_tableaux within a budget, a run that reaches a limit is stopped and reported instead of raising
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param budget: Budget limits of the run
+    :param options: other get_tableaux arguments (engine, rule_order, stats, ...)
+    :return: Dict budget.get_result with 'tableaux', the tableaux if the status is 'done', None if it is 'unknown'
+    '''
+    stats = options.pop('stats', None)
+    stats = {} if stats is None else stats
+    try:
+        tableaux = get_tableaux(formula_list, belief, stats=stats, budget=budget, **options)
+    except BudgetExceeded as error:
+        result = get_result(budget, stats, error)
+        result['tableaux'] = None
+        return result
+    result = get_result(budget, stats)
+    result['tableaux'] = tableaux
+    return result
+
+
+def iter_tableaux(formula_list, belief, rule_order='alpha-first', sub_complete='eager', stats=None, prune='none',
+                  strategy='queue', semantic=False, backjump=False, budget=None):
+    '''
+    Lazy get_tableaux(..., engine='worklist'): every branch is expanded depth first until it is saturated
+    and yielded before the next one is expanded, so memory is bounded by the depth of the tableau
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param rule_order: String 'alpha-first' or 'fifo'
+    :param sub_complete: String 'eager' or 'lazy' subformula completion
+    :param stats: Dict if given, updated with the counters of the run as it goes
+    :param prune: String 'none', 'duplicates' or 'subsumed', a branch is only compared with the ones
+    yielded before it
+    :param strategy: String 'queue', 'fewest-new', 'most-constrained' or 'defer-temporal' beta formula selection
+    :param semantic: Boolean if True the new branch of A v B is A, ~A ^ B
+    :param backjump: Boolean if True the second branches of splits that cannot help are not expanded
+    :param budget: Budget if given, BudgetExceeded is raised when a limit is reached
+    :return: Generator of tableaux with all rules applied to its branches, nothing if none is open
+    '''
+    return iter_worklist_tableaux(formula_list, belief, rule_order, sub_complete, stats, prune, strategy, semantic,
+                                  backjump, budget)
+
+
+def get_witness(formula_list, belief, rule_order='alpha-first', sub_complete='eager', stats=None,
+                strategy='queue', semantic=False, backjump=False, budget=None):
+    '''
+    Decision mode: the pre-tableau is expanded depth first only until one branch is saturated and open
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param rule_order: String 'alpha-first' or 'fifo'
+    :param sub_complete: String 'eager' or 'lazy' subformula completion
+    :param stats: Dict if given, updated with the counters of the run, 'skipped branches' are the open
+    branches that were not expanded
+    :param strategy: String 'queue', 'fewest-new', 'most-constrained' or 'defer-temporal' beta formula selection
+    :param semantic: Boolean if True the new branch of A v B is A, ~A ^ B
+    :param backjump: Boolean if True the second branches of splits that cannot help are not expanded
+    :param budget: Budget if given, BudgetExceeded is raised when a limit is reached
+    :return: Dict a saturated open tableau witnessing that formula_list has an open branch, None if every branch closes
+    '''
+    return get_worklist_witness(formula_list, belief, rule_order, sub_complete, stats, strategy=strategy,
+                                semantic=semantic, backjump=backjump, budget=budget)
+
+
+def count_pass(stats, branches):
+    '''
+    Each pass of the fixed point engines goes through every formula of every branch, once per rule
+    :param stats: Dict counters of the run
+    :param branches: List tableau dicts or BitsetBranch at the start of the pass
+    '''
+    stats['passes'] = stats.get('passes', 0) + 1
+    stats['formula scans'] = stats.get('formula scans', 0) + 3 * sum(len(branch['formulae']) if isinstance(branch, dict)
+                                                                     else len(branch.order) for branch in branches)
+
+
+def get_subformula_complete(tableaux_dict, budget=None):
     '''
     :param tableaux_dict: Dict tableaux dict structure with a list of tableau and some global attributes
+    :param budget: Budget if given, new branches are spent on it
     :return: Dict of tableaux with all its branches as subformula complete
     '''
 
     for tableau in tableaux_dict['tableaux']:
         for formula in tableau['formulae']:
-            if is_knowledge(formula['formula']) and not formula['sub-complete-visited']:
-                formula['sub-complete-visited'] = True
-                subformulae_parsetree_list = get_subformulae_recursive(formula['formula'], [])
-                for sub_parsetree in subformulae_parsetree_list[1:]:  # remove the original formula
-                    if is_knowledge(sub_parsetree) and sub_parsetree[0][1:] == formula['formula'][0][1:]:
-                        negated_sub_parsetree = get_negation(sub_parsetree)
-                        if (not [f for f in tableau['formulae'] if f['formula'] == sub_parsetree]) and (not [f for f in tableau['formulae'] if f['formula'] == negated_sub_parsetree]):
-                            sub_dict = {'formula': sub_parsetree,
-                                        'alpha-visited': False,
-                                        'beta-visited': False,
-                                        'sub-complete-visited': False}
-                            negated_sub_dict = {'formula': negated_sub_parsetree,
-                                        'alpha-visited': False,
-                                        'beta-visited': False,
-                                        'sub-complete-visited': False}
-                            tableaux_dict['was_modified'] = True
-                            new_tableau = new_deepcopy(tableau)
-                            tableau['formulae'].append(sub_dict)  # added on current tableau
-                            new_tableau['formulae'].append(negated_sub_dict)  # added on a new tableau
-                            tableaux_dict['tableaux'].append(new_tableau)
+            if is_knowledge(formula.formula) and not formula.flags & SUB_COMPLETE_VISITED:
+                formula.flags |= SUB_COMPLETE_VISITED
+                for sub_parsetree, negated_sub_parsetree in get_subformula_complete_table(formula.formula):
+                    if sub_parsetree not in tableau['index'] and negated_sub_parsetree not in tableau['index']:
+                        tableaux_dict['was_modified'] = True
+                        new_tableau = copy_tableau(tableau)
+                        add_formula(tableau, sub_parsetree)  # added on current tableau
+                        add_formula(new_tableau, negated_sub_parsetree)  # added on a new tableau
+                        tableaux_dict['tableaux'].append(new_tableau)
+                        if budget is not None:
+                            budget.spend(branches=1)
     return tableaux_dict
 
 
@@ -89,68 +263,24 @@ def apply_alpha_rules(tableaux_dict, belief):
     for tableau in tableaux_dict['tableaux']:
         is_proper_tableau = True
         for formula in tableau['formulae']:
-            if not formula['alpha-visited']:
-                formula['alpha-visited'] = True
-                if is_conjuction(formula['formula']):
-                    alpha1_dict = {'formula': formula['formula'][0][1],
-                                   'alpha-visited': False,
-                                   'beta-visited': False,
-                                   'sub-complete-visited': False}
-                    alpha2_dict = {'formula': formula['formula'][0][3],
-                                   'alpha-visited': False,
-                                   'beta-visited': False,
-                                   'sub-complete-visited': False}
-                    if not [f for f in tableau['formulae'] if f['formula'] == alpha1_dict['formula']]:  # check duplicate
+            if not formula.flags & ALPHA_VISITED:
+                formula.flags |= ALPHA_VISITED
+                if is_knowledge(formula.formula) and not belief:
+                    tableau['was_modified'] = True
+                for alpha in get_alpha_formulae(formula.formula, belief):
+                    if alpha not in tableau['index']:  # check duplicate
                         tableau['was_modified'] = True
-                        tableau['formulae'].append(alpha1_dict)
-                        is_proper_tableau = is_proper(tableau)
-                    if not [f for f in tableau['formulae'] if f['formula'] == alpha2_dict['formula']]:  # check duplicate
-                        tableau['was_modified'] = True
-                        tableau['formulae'].append(alpha2_dict)
-                        is_proper_tableau = is_proper(tableau)
-                elif is_always(formula['formula']) or is_knowledge(formula['formula']):
-                    if is_always(formula['formula']):
-                        alpha1 = formula['formula'][1]
-                        alpha1_dict = {'formula': alpha1,
-                                       'alpha-visited': False,
-                                       'beta-visited': False,
-                                       'sub-complete-visited': False}
-                        alpha2_string = '[\'N\',' + str(formula['formula']) + ']'
-                        alpha2 = literal_eval(alpha2_string)
-                        alpha2_dict = {'formula': alpha2,
-                                       'alpha-visited': False,
-                                       'beta-visited': False,
-                                       'sub-complete-visited': False}
-                        if not [f for f in tableau['formulae'] if f['formula'] == alpha1_dict['formula']]:  # check duplicate
-                            tableau['was_modified'] = True
-                            tableau['formulae'].append(alpha1_dict)
-                            is_proper_tableau = is_proper(tableau)
-                        if not [f for f in tableau['formulae'] if f['formula'] == alpha2_dict['formula']]:  # check duplicate
-                            tableau['was_modified'] = True
-                            tableau['formulae'].append(alpha2_dict)
-                            is_proper_tableau = is_proper(tableau)
-                    else:  # is_knowledge
-                        if not belief:
-                            tableau['was_modified'] = True
-                            alpha1 = formula['formula'][1]
-                            alpha1_dict = {'formula': alpha1,
-                                           'alpha-visited': False,
-                                           'beta-visited': False,
-                                           'sub-complete-visited': False}
-                            if not [f for f in tableau['formulae'] if f['formula'] == alpha1_dict['formula']]:  # check duplicate
-                                tableau['was_modified'] = True
-                                tableau['formulae'].append(alpha1_dict)
-                                is_proper_tableau = is_proper(tableau)
+                        is_proper_tableau = add_formula(tableau, alpha) and is_proper_tableau
                 if not is_proper_tableau:
                     tableaux_dict['tableaux'].remove(tableau)
-                    gc.collect()  # to avoid list fragmentation
                     break
     return tableaux_dict
 
 
-def apply_beta_rules(tableaux_dict):
+def apply_beta_rules(tableaux_dict, budget=None):
     '''
     :param tableaux_dict: Dict tableaux dict structure with a list of tableau and some global attributes
+    :param budget: Budget if given, new branches are spent on it
     :return: Dict of tableaux with all beta rules applied to its branches in tableaux_dict['tableaux']
     '''
     for tableau in tableaux_dict['tableaux']:
@@ -158,89 +288,143 @@ def apply_beta_rules(tableaux_dict):
         if tableau['was_modified']:
             tableau['was_modified'] = False
             for formula in tableau['formulae']:
-                if not formula['beta-visited']:
-                    formula['beta-visited'] = True
-                    if is_until(formula['formula']) or is_unless(formula['formula']):
-                        beta1 = formula['formula'][0][3]
-                        beta1_dict = {'formula': beta1, 'alpha-visited': False,
-                                      'beta-visited': False,
-                                      'sub-complete-visited': False}
-                        beta2_string = '[[\'binary\',[[\'binary\',[\'~\',' + \
-                                       str(formula['formula'][0][3]) + '],\'^\',' + \
-                                       str(formula['formula'][0][1]) + ']],\'^\',[\'N\',[' + \
-                                       str(formula['formula'][0]) + ']]]]'
-                        beta2 = literal_eval(beta2_string)
-                        beta2_dict = {'formula': get_NNF_recursive(beta2),
-                                      'alpha-visited': False,
-                                      'beta-visited': False,
-                                      'sub-complete-visited': False}  # as we negate some formula, we have to ensure that it still remain in NNF
-                        if not [f for f in tableau['formulae'] if f['formula'] == beta2_dict['formula']]:  # check duplicate
-                            tableaux_dict['was_modified'] = True
-                            tableau['was_modified'] = True
-                            new_tableau = new_deepcopy(tableau)
-                            new_tableau['formulae'].append(
-                                beta2_dict)  # added on a new tableau
-                            if is_proper(new_tableau):
-                                tableaux_dict['tableaux'].append(new_tableau)
-                        if not [f for f in tableau['formulae'] if f['formula'] == beta1_dict['formula']]:  # check duplicate
-                            tableaux_dict['was_modified'] = True
-                            tableau['was_modified'] = True
-                            tableau['formulae'].append(beta1_dict)  # added on current tableau
-                            is_proper_tableau = is_proper(tableau)
-                    elif is_eventually(formula['formula']):
-                        beta1 = formula['formula'][1]
-                        beta1_dict = {'formula': beta1, 'alpha-visited': False,
-                                      'beta-visited': False,
-                                      'sub-complete-visited': False}
-                        beta2_string = '[[\'binary\',[\'~\',' + \
-                                       str(formula['formula'][1]) + '],\'^\',' + '[\'N\',' + \
-                                       str(formula['formula']) + ']]]'
-                        beta2 = literal_eval(beta2_string)
-                        beta2_dict = {'formula': get_NNF_recursive(beta2),
-                                      'alpha-visited': False,
-                                      'beta-visited': False,
-                                      'sub-complete-visited': False}  # as we negate some formula, we have to ensure that it still remains in NNF
-                        if not [f for f in tableau['formulae'] if f['formula'] == beta2_dict['formula']]:  # check duplicate
-                            tableaux_dict['was_modified'] = True
-                            tableau['was_modified'] = True
-                            new_tableau = new_deepcopy(tableau)
-                            new_tableau['formulae'].append(
-                                beta2_dict)  # added on a new tableau
-                            if is_proper(new_tableau):
-                                tableaux_dict['tableaux'].append(new_tableau)
-                        if not [f for f in tableau['formulae'] if f['formula'] == beta1_dict['formula']]:  # check duplicate
-                            tableaux_dict['was_modified'] = True
-                            tableau['was_modified'] = True
-                            tableau['formulae'].append(beta1_dict)  # added on current tableau
-                            is_proper_tableau = is_proper(tableau)
-                    elif is_disjunction(formula['formula']):
-                        beta1_dict = {'formula': formula['formula'][0][1],
-                                      'alpha-visited': False,
-                                      'beta-visited': False,
-                                      'sub-complete-visited': False}
-                        beta2_dict = {'formula': formula['formula'][0][3],
-                                      'alpha-visited': False,
-                                      'beta-visited': False,
-                                      'sub-complete-visited': False}
-                        if not [f for f in tableau['formulae'] if f['formula'] == beta2_dict['formula']]:  # check duplicate
-                            tableaux_dict['was_modified'] = True
-                            tableau['was_modified'] = True
-                            new_tableau = new_deepcopy(tableau)
-                            new_tableau['formulae'].append(beta2_dict)  # added on a new tableau
-                            if is_proper(new_tableau):
-                                tableaux_dict['tableaux'].append(new_tableau)
-                        if not [f for f in tableau['formulae'] if f['formula'] == beta1_dict['formula']]:  # check duplicate
-                            tableaux_dict['was_modified'] = True
-                            tableau['was_modified'] = True
-                            tableau['formulae'].append(beta1_dict)  # added on current tableau
-                            is_proper_tableau = is_proper(tableau)
+                if not formula.flags & BETA_VISITED:
+                    formula.flags |= BETA_VISITED
+                    beta = get_beta_formulae(formula.formula)  # beta2 is kept in NNF
+                    if beta and beta[1] not in tableau['index']:  # the formula already holds with beta2
+                        beta1, beta2 = beta
+                        tableaux_dict['was_modified'] = True
+                        tableau['was_modified'] = True
+                        new_tableau = copy_tableau(tableau)
+                        if add_formula(new_tableau, beta2):  # added on a new tableau
+                            tableaux_dict['tableaux'].append(new_tableau)
+                        if budget is not None:
+                            budget.spend(branches=1)
+                        if beta1 not in tableau['index']:  # check duplicate
+                            is_proper_tableau = add_formula(tableau, beta1)  # added on current tableau
                     if not is_proper_tableau:
                         tableaux_dict['tableaux'].remove(tableau)
-                        gc.collect()  # to avoid list fragmentation
                         break
     return tableaux_dict
 
 
+def get_bitset_tableaux(formula_list, belief, stats=None, budget=None):
+    '''
+    Same rules, same rule order and same branches as the dict engine, on BitsetBranch branches
+    :param formula_list: List list of parsetree_list representing all initial formulas in NNF
+    :param belief: Boolean if it is to use logic of belief
+    :param stats: Dict if given, updated with the counters of the run
+    :param budget: Budget if given, every branch built is spent on it
+    :return: List of tableaux with all rules applied to its branches
+    '''
+    closure = Closure()
+    branch = BitsetBranch()
+    for formula in formula_list:
+        formula_id = closure.get_id(parsetree_list_to_formula(formula))
+        if formula_id not in branch:
+            branch.add(formula_id)
+    if closure.is_closed(branch.mask):
+        return None
+    if budget is not None:
+        budget.spend(branches=1)
+    branches = [branch]
+    was_modified = True
+    while was_modified:
+        if stats is not None:
+            count_pass(stats, branches)
+        if budget is not None:
+            budget.check()
+        apply_alpha_rules_bitset(closure, branches, belief)
+        was_modified = apply_beta_rules_bitset(closure, branches, budget)
+        was_modified = get_subformula_complete_bitset(closure, branches, budget) or was_modified
+    return [branch.to_tableau(closure) for branch in branches]
+
+
+def apply_alpha_rules_bitset(closure, branches, belief):
+    '''
+    :param closure: Closure ids of the branches
+    :param branches: List of BitsetBranch, closed branches are removed from it
+    :param belief: Boolean if it is to use logic of belief
+    '''
+    for branch in branches:
+        for formula_id in branch.order:
+            bit = 1 << formula_id
+            if not branch.alpha_visited & bit:
+                branch.alpha_visited |= bit
+                formula = closure.get_formula(formula_id)
+                if is_knowledge(formula) and not belief:
+                    branch.was_modified = True
+                for alpha in get_alpha_formulae(formula, belief):
+                    alpha_id = closure.get_id(alpha)
+                    if alpha_id not in branch:
+                        branch.was_modified = True
+                        branch.add(alpha_id)
+                if closure.is_closed(branch.mask):
+                    branches.remove(branch)
+                    break
+
+
+def apply_beta_rules_bitset(closure, branches, budget=None):
+    '''
+    :param closure: Closure ids of the branches
+    :param branches: List of BitsetBranch, new branches are appended and closed ones removed
+    :param budget: Budget if given, new branches are spent on it
+    :return: Boolean True if some branch was modified
+    '''
+    was_modified = False
+    for branch in branches:
+        if branch.was_modified:
+            branch.was_modified = False
+            for formula_id in branch.order:
+                bit = 1 << formula_id
+                if not branch.beta_visited & bit:
+                    branch.beta_visited |= bit
+                    beta = get_beta_formulae(closure.get_formula(formula_id))
+                    beta_ids = beta and (closure.get_id(beta[0]), closure.get_id(beta[1]))
+                    if beta_ids and beta_ids[1] not in branch:  # the formula already holds with beta2
+                        beta1_id, beta2_id = beta_ids
+                        was_modified = branch.was_modified = True
+                        new_branch = branch.copy()
+                        new_branch.add(beta2_id)  # added on a new branch
+                        if not closure.is_closed(new_branch.mask):
+                            branches.append(new_branch)
+                        if budget is not None:
+                            budget.spend(branches=1)
+                        if beta1_id not in branch:
+                            was_modified = branch.was_modified = True
+                            branch.add(beta1_id)  # added on current branch
+                    if closure.is_closed(branch.mask):
+                        branches.remove(branch)
+                        break
+    return was_modified
+
+
+def get_subformula_complete_bitset(closure, branches, budget=None):
+    '''
+    :param closure: Closure ids of the branches
+    :param branches: List of BitsetBranch, new branches are appended
+    :param budget: Budget if given, new branches are spent on it
+    :return: Boolean True if some branch was split
+    '''
+    was_modified = False
+    for branch in branches:
+        for formula_id in branch.order:
+            bit = 1 << formula_id
+            formula = closure.get_formula(formula_id)
+            if is_knowledge(formula) and not branch.sub_complete_visited & bit:
+                branch.sub_complete_visited |= bit
+                for sub, negated_sub in get_subformula_complete_table(formula):
+                    sub_id, negated_sub_id = closure.get_id(sub), closure.get_id(negated_sub)
+                    if sub_id not in branch and negated_sub_id not in branch:
+                        was_modified = True
+                        new_branch = branch.copy()
+                        branch.add(sub_id)  # added on current branch
+                        new_branch.add(negated_sub_id)  # added on a new branch
+                        branches.append(new_branch)
+                        if budget is not None:
+                            budget.spend(branches=1)
+    return was_modified
+
 
 def is_proper(tableau):
     '''
@@ -263,10 +447,10 @@ def is_proper(tableau):
                 if is_positive and \
                         (is_negated_unary_or_atom(formula['formula'], 'atom') or
                              is_negated_unary_or_atom(formula['formula'], 'knowledge')):
-                    if str(pivot_formula['formula']) == str(formula['formula'][1]):
+                    if pivot_formula['formula'] is formula['formula'][1]:
                         return False
                 elif not is_positive and (is_atom(formula['formula']) or is_knowledge(formula['formula'])):
-                    if str(pivot_formula['formula'][1]) == str(formula['formula']):
+                    if pivot_formula['formula'][1] is formula['formula']:
                         return False
                 else:
                     continue
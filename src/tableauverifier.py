@@ -3,8 +3,8 @@
 '''
 Usage:
   tableauverifier.py parse --file=<formula-file> [--nnf]
-  tableauverifier.py pctableau --file=<formula-file> [--per-line] [--verbose] [--belief]
-  tableauverifier.py tableau --file=<formula-file> [--prop=<property>] [--per-line] [--verbose] [--belief]
+  tableauverifier.py pctableau --file=<formula-file> [--per-line] [--verbose] [--belief] [--cache-size=<size>] [--engine=<engine>] [--workers=<workers>] [--prune=<mode>] [--stream] [--sat] [--max-time=<seconds>] [--max-branches=<n>] [--max-nodes=<n>] [--max-memory=<mb>] [--checkpoint=<file>] [--checkpoint-interval=<seconds>] [--resume]
+  tableauverifier.py tableau --file=<formula-file> [--prop=<property>] [--per-line] [--verbose] [--belief] [--cache-size=<size>] [--engine=<engine>] [--workers=<workers>] [--prune=<mode>] [--stream] [--max-time=<seconds>] [--max-branches=<n>] [--max-nodes=<n>] [--max-memory=<mb>] [--checkpoint=<file>] [--checkpoint-interval=<seconds>] [--resume] [--identity=<identity>]
   tableauverifier.py -h | --help
   tableauverifier.py -v | --version
 
@@ -17,6 +17,20 @@ Options:
     --per-line  A separated tableau for each formula in the file
     --verbose  Show formulae for each tableaux branch
     --belief  Change to the logic of Belief instead of Knowledge
+    --cache-size=<size>  Maximum entries of each formula normalization, tableau rule and graph successor cache [default: 100000]
+    --engine=<engine>  Tableau engine, dict, bitset, worklist or parallel [default: dict]
+    --workers=<workers>  Number of worker processes of the parallel engine (default: number of CPUs)
+    --prune=<mode>  Drop duplicate branches, or also the subsumed ones (worklist and parallel engines), none, duplicates or subsumed [default: none]
+    --stream  Expand and use the tableau branches one at a time, depth first (worklist engine)
+    --sat  Only decide if there is an open branch, stop at the first one and show it (worklist engine)
+    --max-time=<seconds>  Stop a tableau or graph construction after this wall time, its result is then unknown
+    --max-branches=<n>  Stop a tableau or graph construction after building this many branches
+    --max-nodes=<n>  Stop a graph construction after adding this many states
+    --max-memory=<mb>  Stop a tableau or graph construction once the resident memory is over this many MB
+    --checkpoint=<file>  Save the state of the run to this file every so often (tableaux of the dict and worklist engines, graphs), kept when a budget stops the run and removed once it is done
+    --checkpoint-interval=<seconds>  Seconds between two checkpoints [default: 60]
+    --resume  Go on from the state saved in the checkpoint file, the formulae done before are not built again
+    --identity=<identity>  Graph states that are one node, the ones with the same formulae in the same order (name) or with the same formulae (fingerprint, fewer states to expand) [default: name]
 
 Arguments:
    <formula-file>  formula file containing formulae to be used
@@ -28,8 +42,11 @@ from docopt import docopt
 
 import grammar as Grammar
 import formula_utils as FormulaUtils
+import rules as Rules
 import tableau as Tableau
 import graph as Graph
+from budget import Budget, BudgetExceeded, format_usage
+from checkpoint import Checkpoint
 from utils import timewith
 
 
@@ -41,8 +58,7 @@ def run_parser_cli(formulae_list, nnf):
         print 'original string: ',
         print case
         parse_tree = Grammar.parse_formula(case)
-        parsetree_string = Grammar.get_parsetree_string(parse_tree)
-        parsetree_list = FormulaUtils.parsetree_string_to_list(parsetree_string)
+        parsetree_list = Grammar.get_formula(parse_tree)
         print 'parsetree list: ',
         print parsetree_list
         if nnf:
@@ -60,84 +76,236 @@ def run_parser_cli(formulae_list, nnf):
         print
 
 
-def run_tableau_cli(formulae_string_list, per_line, verbose, belief):
+def run_tableau_cli(formulae_string_list, per_line, verbose, belief, engine, stream, workers, prune, limits,
+                    checkpoint):
     timer_all = timewith('overall time...')
     timer_formulae = timewith('preparing formulae...')
     formulae_list = load_formulae_list(formulae_string_list)
     timer_formulae.checkpoint('formulae preparing')
     if per_line:
-        for formula in formulae_list:
+        for idx, formula in enumerate(formulae_list):
+            if is_done(checkpoint, idx):
+                continue
             single_list = []
             single_list.append(formula)
             print '======================================================'
             print '======================================================'
             timer_tableaux = timewith('building tableaux...')
-            tableaux = Tableau.get_tableaux(single_list, belief)
+            stats = {}
+            try:
+                tableaux = build_tableaux(single_list, belief, engine, stream, workers, prune, stats, Budget(**limits),
+                                          checkpoint)
+                timer_tableaux.checkpoint('tableaux built')
+                print 'original formula: ' + str(formula)
+                print '--------------------------'
+                print_tableaux(tableaux, verbose)
+            except BudgetExceeded as error:
+                print_budget_exceeded(error)
+                set_stopped(checkpoint)
+                checkpoint = None  # kept to resume from, the next formulae do not overwrite it
+            print_pruned(prune, stats)
+            set_done(checkpoint)
+    elif not is_done(checkpoint, 0):
+        print '======================================================'
+        print '======================================================'
+        timer_tableaux = timewith('building tableaux...')
+        stats = {}
+        try:
+            tableaux = build_tableaux(formulae_list, belief, engine, stream, workers, prune, stats, Budget(**limits),
+                                      checkpoint)
             timer_tableaux.checkpoint('tableaux built')
-            print 'original formula: ' + str(formula)
             print '--------------------------'
             print_tableaux(tableaux, verbose)
+        except BudgetExceeded as error:
+            print_budget_exceeded(error)
+            set_stopped(checkpoint)
+            checkpoint = None  # kept to resume from
+        print_pruned(prune, stats)
+    if checkpoint is not None:
+        checkpoint.remove()
+    if verbose:
+        print_cache_stats()
+    timer_all.checkpoint('overall time (including prints)')
+
+
+def run_sat_cli(formulae_string_list, per_line, verbose, belief, limits):
+    timer_all = timewith('overall time...')
+    formulae_list = load_formulae_list(formulae_string_list)
+    if per_line:
+        for formula in formulae_list:
+            print '======================================================'
+            print '======================================================'
+            print 'original formula: ' + str(formula)
+            print '--------------------------'
+            print_witness([formula], verbose, belief, limits)
     else:
         print '======================================================'
         print '======================================================'
-        timer_tableaux = timewith('building tableaux...')
-        tableaux = Tableau.get_tableaux(formulae_list, belief)
-        timer_tableaux.checkpoint('tableaux built')
-        print '--------------------------'
-        print_tableaux(tableaux, verbose)
+        print_witness(formulae_list, verbose, belief, limits)
+    if verbose:
+        print_cache_stats()
     timer_all.checkpoint('overall time (including prints)')
 
 
+def print_witness(formulae_list, verbose, belief, limits):
+    stats = {}
+    timer_witness = timewith('looking for an open branch...')
+    try:
+        witness = Tableau.get_witness(formulae_list, belief, stats=stats, budget=Budget(**limits))
+        timer_witness.checkpoint('decided')
+        print 'has open branch: ' + str(witness is not None)
+        if witness and verbose:
+            for formula in witness['formulae']:
+                print formula['formula']
+    except BudgetExceeded as error:
+        print_budget_exceeded(error)
+    print '{0[branches]} branches built, {0[closed branches]} closed, {0[skipped branches]} skipped'.format(stats)
+    print '--------------------------'
+
+
+def build_tableaux(formula_list, belief, engine, stream, workers, prune, stats, budget, checkpoint=None):
+    if stream:
+        return Tableau.iter_tableaux(formula_list, belief, stats=stats, prune=prune, budget=budget)  # built as they are used
+    if engine not in ['dict', 'worklist']:
+        checkpoint = None  # only the graph is saved
+    return Tableau.get_tableaux(formula_list, belief, engine, stats=stats, workers=workers, prune=prune, budget=budget,
+                                checkpoint=checkpoint)
+
+
+def is_done(checkpoint, idx):
+    '''
+    :param checkpoint: Checkpoint of the run, None if there is none
+    :param idx: Int index of the formula about to be built (0 for all of them)
+    :return: Boolean True if the run resumed was already past it, otherwise the checkpoint is now about it
+    '''
+    if checkpoint is None:
+        return False
+    point = checkpoint.get_resume_point()
+    if point is not None and (idx < point[0] or idx == point[0] and point[1] == 'done'):
+        return True
+    checkpoint.key = idx
+    checkpoint.restore('stopped')  # stopped before anything was saved, it is built from the start
+    return False
+
+
+def set_done(checkpoint):
+    if checkpoint is not None:
+        checkpoint.save('done', None)
+
+
+def set_stopped(checkpoint):
+    '''
+    A formula stopped by its budget keeps the checkpoint, a resumed run goes on from the state saved for it
+    or, if none was saved yet, builds it again from the start
+    :param checkpoint: Checkpoint of the run, None if there is none
+    '''
+    if checkpoint is not None and (checkpoint.point is None or checkpoint.point[0] != checkpoint.key):
+        checkpoint.save('stopped', None)
+
+
+def print_budget_exceeded(error):
+    print 'unknown: budget exceeded (' + error.reason + ')'
+    print format_usage(error.usage)
+
+
+def print_pruned(prune, stats):
+    if prune != 'none':
+        print '{0[duplicate branches]} duplicate branches and {0[subsumed branches]} subsumed branches ' \
+              'removed'.format(stats)
+
+
 def print_tableaux(tableaux, verbose):
-    if tableaux:
-        for index, tableau in enumerate(tableaux):
-            print 'tableau branch: ' + str(index)
-            timer_is_proper = timewith('checking if it is proper...')
-            is_proper = Tableau.is_proper(tableau)
-            timer_is_proper.checkpoint('is proper checking')
-            print 'is proper: ' + str(is_proper)
-            if verbose:
-                for formula in tableau['formulae']:
-                    print formula['formula']
-            print str(len(tableau['formulae'])) + ' formulae in this branch'
-            print '--------------------------'
-    else:
+    index = -1
+    for index, tableau in enumerate(tableaux or []):
+        print 'tableau branch: ' + str(index)
+        timer_is_proper = timewith('checking if it is proper...')
+        is_proper = Tableau.is_proper(tableau)
+        timer_is_proper.checkpoint('is proper checking')
+        print 'is proper: ' + str(is_proper)
+        if verbose:
+            for formula in tableau['formulae']:
+                print formula['formula']
+        print str(len(tableau['formulae'])) + ' formulae in this branch'
+        print '--------------------------'
+    if index < 0:
         print 'this tableaux is not proper'
 
 
-def run_graph_cli(formulae_string_list, per_line, verbose, belief):
+def run_graph_cli(formulae_string_list, per_line, verbose, belief, engine, stream, workers, prune, limits,
+                  checkpoint, identity='name'):
     timer_all = timewith('overall time...')
     formulae_list = load_formulae_list(formulae_string_list)
     if per_line:
         for idx, formula in enumerate(formulae_list):
+            if is_done(checkpoint, idx):
+                continue
             single_list = []
             single_list.append(formula)
             print '======================================================'
             print '======================================================'
-            tableaux = Tableau.get_tableaux(single_list, belief)
-            timer_graph = timewith('building graph...')
-            Graph.get_graph(tableaux, idx, belief)
-            timer_graph.checkpoint('graph built')
-    else:
+            stats = {}
+            budget = Budget(**limits)  # shared by the tableaux and the graph
+            try:
+                tableaux = build_graph_tableaux(single_list, belief, engine, stream, workers, prune, stats, budget,
+                                                checkpoint)
+                timer_graph = timewith('building graph...')
+                stopped = Graph.get_graph(tableaux, idx, belief, budget, checkpoint, identity)['status'] == 'unknown'
+                timer_graph.checkpoint('graph built')
+            except BudgetExceeded as error:
+                print_budget_exceeded(error)
+                stopped = True
+            print_pruned(prune, stats)
+            if stopped:
+                set_stopped(checkpoint)
+                checkpoint = None  # kept to resume from, the next formulae do not overwrite it
+            set_done(checkpoint)
+    elif not is_done(checkpoint, 0):
         print '======================================================'
         print '======================================================'
-        tableaux = Tableau.get_tableaux(formulae_list, belief)
-        timer_graph = timewith('building graph...')
-        Graph.get_graph(tableaux, 0, belief)
-        timer_graph.checkpoint('graph built')
+        stats = {}
+        budget = Budget(**limits)
+        try:
+            tableaux = build_graph_tableaux(formulae_list, belief, engine, stream, workers, prune, stats, budget,
+                                            checkpoint)
+            timer_graph = timewith('building graph...')
+            stopped = Graph.get_graph(tableaux, 0, belief, budget, checkpoint, identity)['status'] == 'unknown'
+            timer_graph.checkpoint('graph built')
+        except BudgetExceeded as error:
+            print_budget_exceeded(error)
+            stopped = True
+        print_pruned(prune, stats)
+        if stopped:
+            set_stopped(checkpoint)
+            checkpoint = None  # kept to resume from
+    if checkpoint is not None:
+        checkpoint.remove()
+    if verbose:
+        print_cache_stats()
     timer_all.checkpoint('overall time (including prints)')
 
 
+def build_graph_tableaux(formula_list, belief, engine, stream, workers, prune, stats, budget, checkpoint):
+    if checkpoint is not None and checkpoint.get_resume_point() == (checkpoint.key, 'graph'):
+        return None  # the graph was saved, get_graph goes on from there
+    return build_tableaux(formula_list, belief, engine, stream, workers, prune, stats, budget, checkpoint)
+
+
+def print_cache_stats():
+    for title, cache_stats in [('normalization caches:', FormulaUtils.get_normalization_cache_stats()),
+                               ('rule caches:', Rules.get_rule_cache_stats()),
+                               ('successor caches:', Graph.get_successor_cache_stats())]:
+        print title
+        for name, stats in sorted(cache_stats.items()):
+            print '{0}: {1[hits]} hits, {1[misses]} misses, {1[evictions]} evictions, ' \
+                  '{1[size]}/{1[maxsize]} entries'.format(name, stats)
+
+
 def load_formulae_list(formulae_string_list):
     formulae_list = []
     for case in formulae_string_list:
         parse_tree = Grammar.parse_formula(case)
-        parsetree_string = Grammar.get_parsetree_string(parse_tree)
-        parsetree_list = FormulaUtils.parsetree_string_to_list(parsetree_string)
-        parsetree_list_no_implications = FormulaUtils.remove_implications_recursive(parsetree_list)
-        parsetree_list_nnf = FormulaUtils.get_NNF_recursive(parsetree_list_no_implications)
-        parsetree_list_sorted = FormulaUtils.sort_recursive(parsetree_list_nnf)
-        formulae_list.append(parsetree_list_sorted)
+        parsetree_list = Grammar.get_formula(parse_tree)
+        formulae_list.append(FormulaUtils.normalize_formula(parsetree_list))
     return formulae_list
 
 
@@ -154,15 +322,36 @@ def load_from_file(file_name):
 if __name__ == '__main__':
     args = docopt(__doc__, version='S5+PTL Tableau Verifier 0.1', options_first=False)
     formulae_list = load_from_file(args['--file'])
+    if args['--cache-size']:
+        FormulaUtils.set_normalization_cache_size(int(args['--cache-size']))
+        Rules.set_rule_cache_size(int(args['--cache-size']))
+        Graph.set_successor_cache_size(int(args['--cache-size']))
+    workers = int(args['--workers']) if args['--workers'] else None
+    limits = {'seconds': float(args['--max-time']) if args['--max-time'] else None,
+              'branches': int(args['--max-branches']) if args['--max-branches'] else None,
+              'nodes': int(args['--max-nodes']) if args['--max-nodes'] else None,
+              'memory': float(args['--max-memory']) if args['--max-memory'] else None}
+    checkpoint = None
+    if args['--checkpoint']:
+        checkpoint = Checkpoint(args['--checkpoint'], float(args['--checkpoint-interval']), args['--resume'])
+    elif args['--resume']:
+        raise SystemExit('--resume needs the --checkpoint file to resume from')
+    if args['--prune'] != 'none' and args['--engine'] not in ['worklist', 'parallel'] and not args['--stream']:
+        raise SystemExit('--prune needs the worklist or parallel engine (--engine=worklist)')
     if args['parse']:
         if args['--nnf']:
             run_parser_cli(formulae_list, True)
         else:
             run_parser_cli(formulae_list, False)
     elif args['pctableau']:
-        run_tableau_cli(formulae_list, args['--per-line'], args['--verbose'], args['--belief'])
+        if args['--sat']:
+            run_sat_cli(formulae_list, args['--per-line'], args['--verbose'], args['--belief'], limits)
+        else:
+            run_tableau_cli(formulae_list, args['--per-line'], args['--verbose'], args['--belief'], args['--engine'],
+                            args['--stream'], workers, args['--prune'], limits, checkpoint)
     elif args['tableau']:
         #TODO: deal with property
-        run_graph_cli(formulae_list, args['--per-line'], args['--verbose'], args['--belief'])
+        run_graph_cli(formulae_list, args['--per-line'], args['--verbose'], args['--belief'], args['--engine'],
+                      args['--stream'], workers, args['--prune'], limits, checkpoint, args['--identity'])
     else:
         print 'not implemented'
@@ -1,7 +1,25 @@
+import copy
+import os
+import pickle
+import sys
+import tempfile
 import unittest
+from StringIO import StringIO
 
-from srcLRparsing import grammar as Grammar
-from srcLRparsing import formula_utils as FormulaUtils
+from src import grammar as Grammar
+from src import formula as Formula
+from src import formula_utils as FormulaUtils
+from src import legacy_formula_utils as LegacyFormulaUtils
+from src import utils as Utils
+from src import closure as Closure
+from src import rules as Rules
+from src import tableau as Tableau
+from src import budget as Budget
+from src import checkpoint as Checkpoint
+from src import records as Records
+from src import stategraph as StateGraph
+from src import graph as Graph
+from src import tableauverifier as TableauVerifier
 
 __author__ = 'thiagovieira'
 
@@ -248,8 +266,600 @@ class FormulaUtilsTest(unittest.TestCase):
         pass
 
 
+class GrammarTest(unittest.TestCase):
+    def setUp(self):
+        self.formula_cases = ['p0', 'true', '(~(~false))', '(p0 v p1)',
+                              '(p1 ^ (p2 ^ p3))', '(k1p0)', '((~(~p1)) U q5)',
+                              '(k1(k2p0))', '(p0 W (~(Np3)))',
+                              '((G(k2p3))->p11111)', '(~(k11(k111p0001)))',
+                              '(k3((k2p2)v(r1->(Gs3))))']
+
+    def test_get_parsetree_list(self):
+        for test in self.formula_cases:
+            parse_tree = Grammar.parse_formula(test)
+            parsetree_string = Grammar.get_parsetree_string(parse_tree)
+            expected = FormulaUtils.parsetree_string_to_list(parsetree_string)
+            self.assertEqual(Grammar.get_parsetree_list(parse_tree), expected)
+
+
+class FormulaTransformationTest(unittest.TestCase):
+    def setUp(self):
+        self.parsetree_lists = []
+        for case in ['(~(~false))', '(~(p0 -> (p1 v (~p2))))', '(~((Gp0) U (k1(Fp1))))',
+                     '(~((p0 ^ (~p1)) W (N(~p2))))', '((~(k1(p3 -> p0))) ^ (k1(~(p2 v p1))))',
+                     '(((Fq1) ^ (Gq0)) v ((p3 ^ p2) v (p1 v p0)))',
+                     '(k3((~(k2p2))v(r1->(~(Gs3)))))', '((F(Np1)) ^ (Fq2))']:
+            self.parsetree_lists.append(Grammar.get_parsetree_list(Grammar.parse_formula(case)))
+
+    def assertSameFormula(self, formula, parsetree_list):
+        self.assertEqual(Formula.formula_to_parsetree_list(formula), parsetree_list)
+
+    def test_remove_implications_recursive(self):
+        for parsetree_list in self.parsetree_lists:
+            formula = Formula.parsetree_list_to_formula(parsetree_list)
+            self.assertSameFormula(FormulaUtils.remove_implications_recursive(formula),
+                                   LegacyFormulaUtils.remove_implications_recursive(parsetree_list))
+
+    def test_get_NNF_recursive(self):
+        for parsetree_list in self.parsetree_lists:
+            parsetree_list = LegacyFormulaUtils.remove_implications_recursive(parsetree_list)
+            formula = Formula.parsetree_list_to_formula(parsetree_list)
+            self.assertSameFormula(FormulaUtils.get_NNF_recursive(formula),
+                                   LegacyFormulaUtils.get_NNF_recursive(parsetree_list))
+            self.assertSameFormula(FormulaUtils.get_NNF_recursive(FormulaUtils.get_negation(formula)),
+                                   LegacyFormulaUtils.get_NNF_recursive(LegacyFormulaUtils.get_negation(parsetree_list)))
+
+    def test_sort_recursive(self):
+        for parsetree_list in self.parsetree_lists:
+            formula = Formula.parsetree_list_to_formula(parsetree_list)
+            self.assertSameFormula(FormulaUtils.sort_recursive(formula),
+                                   LegacyFormulaUtils.sort_recursive(parsetree_list))
+
+    def test_iterative(self):
+        for parsetree_list in self.parsetree_lists:
+            formula = Formula.parsetree_list_to_formula(parsetree_list)
+            no_implications = FormulaUtils.remove_implications_recursive(formula)
+            nnf = FormulaUtils.get_NNF_recursive(no_implications)
+            FormulaUtils.clear_normalization_caches()
+            self.assertIs(FormulaUtils.remove_implications_iterative(formula), no_implications)
+            self.assertIs(FormulaUtils.get_NNF_iterative(no_implications), nnf)
+            self.assertIs(FormulaUtils.sort_iterative(nnf), FormulaUtils.sort_recursive(nnf))
+            if not FormulaUtils.is_atom(nnf):  # the recursive version returns None for atoms
+                self.assertEqual(FormulaUtils.get_subformulae_iterative(nnf, []),
+                                 FormulaUtils.get_subformulae_recursive(nnf, []))
+            self.assertEqual(list(Utils.flatten_iterative(nnf)), list(Utils.flatten(nnf)))
+            self.assertEqual(str(nnf), str(Formula.formula_to_parsetree_list(nnf)))
+
+    def test_deep_formula(self):
+        formula = Formula.make_atom('p0')
+        for _ in range(20000):
+            formula = Formula.make_unary('~', Formula.make_unary('N', formula))
+        normalized = FormulaUtils.normalize_formula(formula)
+        self.assertEqual(len(FormulaUtils.get_subformulae_iterative(normalized, [])), 20001)
+        self.assertEqual(str(normalized), "['N', " * 20000 + "['p0']" + ']' * 20000)  # ~N~Np0 is NNp0
+        for protocol in [0, pickle.HIGHEST_PROTOCOL]:
+            self.assertIs(pickle.loads(pickle.dumps(formula, protocol)), formula)
+
+
+class FormulaTest(unittest.TestCase):
+    def test_interning(self):
+        parsetree_list = [['binary', ['k1', ['p0']], '^', ['~', ['k1', ['p0']]]]]
+        formula = Formula.parsetree_list_to_formula(parsetree_list)
+        self.assertIs(formula, Formula.parsetree_list_to_formula(parsetree_list))
+        self.assertIs(formula[0][1], formula[0][3][1])
+        self.assertEqual(hash(formula), hash(Formula.parsetree_list_to_formula(parsetree_list)))
+        self.assertEqual(str(formula), str(parsetree_list))
+        self.assertEqual(Formula.formula_to_parsetree_list(formula), parsetree_list)
+        self.assertEqual(Formula.formula_to_postfix(formula),
+                         ((0, 'p0'), (1, 'k1'), (0, 'p0'), (1, 'k1'), (1, '~'), (2, '^')))
+        self.assertIs(Formula.postfix_to_formula(Formula.formula_to_postfix(formula)), formula)
+
+    def test_kind_tags(self):
+        for case in ['(~(k12p0))', '((p0 U q1) v (G(Fp2)))', '(N(~true))', '((~false) W (p0 ^ p1))']:
+            parsetree_list = Grammar.get_parsetree_list(Grammar.parse_formula(case))
+            formulae = FormulaUtils.get_subformulae_recursive(Formula.parsetree_list_to_formula(parsetree_list), [])
+            for formula in formulae:
+                parsetree_list = Formula.formula_to_parsetree_list(formula)
+                for name in ['is_unary', 'is_binary', 'is_atom', 'is_false', 'is_true', 'is_negation',
+                             'is_knowledge', 'is_always', 'is_eventually', 'is_next', 'is_conjuction',
+                             'is_disjunction', 'is_until', 'is_unless', 'get_main_operator']:
+                    self.assertEqual(getattr(FormulaUtils, name)(formula),
+                                     getattr(LegacyFormulaUtils, name)(parsetree_list))
+                for something in ['knowledge', 'atom', 'always', 'eventually', 'next', 'unknown']:
+                    self.assertEqual(FormulaUtils.is_negated_unary_or_atom(formula, something),
+                                     LegacyFormulaUtils.is_negated_unary_or_atom(parsetree_list, something))
+        self.assertEqual(FormulaUtils.get_agent(formulae[0]), None)
+        self.assertEqual(FormulaUtils.get_agent(Formula.make_unary('k12', Formula.make_atom('p0'))), '12')
+
+    def test_copy(self):
+        formula = Formula.make_unary('G', Formula.make_atom('p0'))
+        self.assertIs(copy.deepcopy(formula), formula)
+        self.assertIs(pickle.loads(pickle.dumps(formula)), formula)
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_eviction_order(self):
+        cache = Utils.LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'b' becomes the least recently used
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2})
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertIn('c', cache)
+
+    def test_normalization_is_memoized(self):
+        formula = Formula.parsetree_list_to_formula(
+            Grammar.get_parsetree_list(Grammar.parse_formula('(~((Gp0) -> (k1(Fp1))))')))
+        FormulaUtils.clear_normalization_caches()
+        normalized = FormulaUtils.normalize_formula(formula)
+        misses = FormulaUtils.get_normalization_cache_stats()['normalize']['misses']
+        self.assertIs(FormulaUtils.normalize_formula(formula), normalized)
+        stats = FormulaUtils.get_normalization_cache_stats()['normalize']
+        self.assertEqual((stats['hits'], stats['misses']), (1, misses))
+
+    def test_subformula_complete_table(self):
+        formula = FormulaUtils.normalize_formula(
+            Grammar.get_formula(Grammar.parse_formula('(k1((k1p0) v ((k2p1) ^ (k1(k1p1)))))')))
+        Rules.clear_rule_caches()
+        table = Rules.get_subformula_complete_table(formula)
+        self.assertEqual(table, tuple((sub, FormulaUtils.get_negation(sub))
+                                      for sub in Rules.get_knowledge_subformulae(formula)))
+        self.assertEqual(len(table), 3)  # k1p0, k1(k1p1) and k1p1, not k2p1
+        self.assertIs(Rules.get_subformula_complete_table(formula), table)
+        stats = Rules.get_rule_cache_stats()['subformula complete']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
 class TableauTest(unittest.TestCase):
-    pass
+    def setUp(self):
+        self.formula_lists = []
+        for cases in [['((Gp0)^(p2vp1))'], ['((~(~p1)) U q5)'], ['((~(Np3))vp0)'], ['((Fp0)^(p2vp1))'],
+                      ['((k1(Gp0))^(~(G(k1p0))))'], ['((G(k1p0))->(k1(Gp0)))'], ['((k1(k2p0))->(k2p0))'],
+                      ['(((k1(Gp0))^(k2(Gp0)))^(k1(~(k2q0))))'], ['(p0 v (p1 v p2))', '(~p1)', '(F(~p0))'],
+                      ['(p0 ^ (~p0))'], ['((p1 U p2) ^ (G(~p2)))']]:
+            self.formula_lists.append([FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))
+                                       for case in cases])
+
+    def test_bitset_engine(self):
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                self.assertEqual(Tableau.get_tableaux(formula_list, belief, engine='bitset'),
+                                 Tableau.get_tableaux(formula_list, belief))
+        self.assertRaises(ValueError, Tableau.get_tableaux, self.formula_lists[0], False, 'lists')
+
+    def assertSaturated(self, tableau, belief):
+        index = tableau['index']
+        for formula in index:
+            self.assertFalse(Tableau.closes_branch(index, formula))
+            self.assertTrue(all(alpha in index for alpha in Rules.get_alpha_formulae(formula, belief)))
+            beta = Rules.get_beta_formulae(formula)
+            self.assertTrue(not beta or beta[0] in index or beta[1] in index)
+            if FormulaUtils.is_knowledge(formula):
+                for sub in Rules.get_knowledge_subformulae(formula):
+                    self.assertTrue(sub in index or FormulaUtils.get_negation(sub) in index)
+
+    def test_worklist_engine(self):
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                tableaux = Tableau.get_tableaux(formula_list, belief)
+                for rule_order in ['alpha-first', 'fifo']:
+                    for sub_complete in ['eager', 'lazy']:
+                        stats = {}
+                        worklist_tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist', rule_order,
+                                                                 sub_complete, stats)
+                        self.assertEqual(bool(worklist_tableaux), bool(tableaux))
+                        for tableau in worklist_tableaux or []:
+                            self.assertSaturated(tableau, belief)
+                        self.assertEqual(stats['branches'] - stats['closed branches'], len(worklist_tableaux or []))
+        self.assertRaises(ValueError, Tableau.get_tableaux, self.formula_lists[0], False, 'worklist', 'lifo')
+
+    def test_iter_tableaux(self):
+        for formula_list in self.formula_lists:
+            self.assertEqual(list(Tableau.iter_tableaux(formula_list, False)),
+                             Tableau.get_tableaux(formula_list, False, 'worklist') or [])
+        stats = {}
+        tableaux = Tableau.iter_tableaux(self.formula_lists[8], False, stats=stats)
+        self.assertEqual(stats, {})  # nothing is expanded before the first branch is asked for
+        next(tableaux)
+        branches = stats['branches']
+        self.assertEqual(len(list(tableaux)), 2)
+        self.assertGreater(stats['branches'], branches)
+
+    def test_parallel_engine(self):
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                worklist_tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist')
+                parallel_tableaux = Tableau.get_tableaux(formula_list, belief, 'parallel', workers=2)
+                self.assertEqual(parallel_tableaux is None, worklist_tableaux is None)
+                self.assertItemsEqual(parallel_tableaux or [], worklist_tableaux or [])
+                self.assertEqual(Tableau.get_tableaux(formula_list, belief, 'parallel', workers=2), parallel_tableaux)
+
+    def test_parallel_pruning(self):
+        # every subtree is pruned on its own, the result does not depend on what a worker expanded before,
+        # a branch repeated across subtrees may keep its formulae in another order than the worklist one
+        case = '(((((~p1) v (~(k1p0))) ^ ((~p0) v q0)) ^ ((~p0) v (Np1))) ^ (p1 v (Np1)))'
+        formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+        for prune in ['duplicates', 'subsumed']:
+            worklist_tableaux = Tableau.get_tableaux(formula_list, False, 'worklist', prune=prune)
+            for workers in [1, 2, 3]:
+                parallel_tableaux = Tableau.get_tableaux(formula_list, False, 'parallel', workers=workers, prune=prune)
+                self.assertItemsEqual([frozenset(tableau['index']) for tableau in parallel_tableaux],
+                                      [frozenset(tableau['index']) for tableau in worklist_tableaux])
+                self.assertEqual(Tableau.get_tableaux(formula_list, False, 'parallel', workers=workers, prune=prune),
+                                 parallel_tableaux)
+
+    def test_parallel_budget(self):
+        case = '(p0 v q0)'
+        for level in range(1, 8):
+            case = '((p{0} v q{0}) ^ {1})'.format(level, case)
+        formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+        result = Tableau.get_tableaux_result(formula_list, False, Budget.Budget(branches=20), engine='parallel',
+                                             workers=1)
+        self.assertEqual((result['status'], result['reason']), ('unknown', 'branches'))
+        self.assertEqual(result['usage']['branches'], 21)  # the worker stops, not the whole subtree is built
+        worklist_branches = Tableau.get_tableaux_result(formula_list, False, Budget.Budget(),
+                                                        engine='worklist')['usage']['branches']
+        for workers in [2, 4]:
+            # the branches are counted across the workers, each one may build a last branch before it stops
+            result = Tableau.get_tableaux_result(formula_list, False, Budget.Budget(branches=20), engine='parallel',
+                                                 workers=workers)
+            self.assertEqual(result['status'], 'unknown')
+            self.assertTrue(20 < result['usage']['branches'] <= 20 + workers)
+            result = Tableau.get_tableaux_result(formula_list, False, Budget.Budget(branches=1000),
+                                                 engine='parallel', workers=workers)
+            self.assertEqual(result['usage']['branches'], worklist_branches)  # every worker is spent on it
+
+    def test_prune_branches(self):
+        for case, prune, branches, removed in [('(p0 v p0)', 'duplicates', 1, 'duplicate branches'),
+                                               ('(p0 v (p0 ^ p1))', 'duplicates', 2, None),
+                                               ('(p0 v (p0 ^ p1))', 'subsumed', 1, 'subsumed branches')]:
+            formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+            stats = {}
+            tableaux = Tableau.get_tableaux(formula_list, False, 'worklist', stats=stats, prune=prune)
+            self.assertEqual(len(tableaux), branches)
+            self.assertEqual(stats['duplicate branches'] + stats['subsumed branches'], 1 if removed else 0)
+            if removed:
+                self.assertEqual(stats[removed], 1)
+            self.assertEqual(list(Tableau.iter_tableaux(formula_list, False, prune=prune)), tableaux)
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                fingerprints = set(frozenset(tableau['index'])
+                                   for tableau in Tableau.get_tableaux(formula_list, belief, 'worklist') or [])
+                tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist', prune='duplicates') or []
+                self.assertEqual(len(tableaux), len(fingerprints))
+                self.assertEqual(set(frozenset(tableau['index']) for tableau in tableaux), fingerprints)
+                tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist', prune='subsumed') or []
+                self.assertEqual(bool(tableaux), bool(fingerprints))
+                for tableau in tableaux:
+                    self.assertFalse(any(fingerprint < tableau['index'] for fingerprint in fingerprints))
+                self.assertItemsEqual(Tableau.get_tableaux(formula_list, belief, 'parallel', workers=2,
+                                                           prune='subsumed') or [], tableaux)
+        self.assertRaises(ValueError, Tableau.get_tableaux, self.formula_lists[0], False, prune='duplicates')
+
+    def test_prune_clause_conjunctions(self):
+        # branches with the same formulae but other work pending expand to other branch sets
+        for case in ['(((((~p1) v (~(k1p0))) ^ ((~p0) v q0)) ^ ((~p0) v (Np1))) ^ (p1 v (Np1)))',
+                     '(((((~p0) v (~p0)) ^ ((Fp0) v (~p1))) ^ ((~p0) v (~p1))) ^ ((~(k1p0)) v p0))',
+                     '((((Fp0) v (Np1)) ^ ((k1p0) v (k1p0))) ^ ((k1p0) v (Np1)))']:
+            formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+            for belief in [False, True]:
+                fingerprints = set(frozenset(tableau['index'])
+                                   for tableau in Tableau.get_tableaux(formula_list, belief, 'worklist'))
+                minimal = set(fingerprint for fingerprint in fingerprints
+                              if not any(other < fingerprint for other in fingerprints))
+                for prune, expected in [('duplicates', fingerprints), ('subsumed', minimal)]:
+                    tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist', prune=prune)
+                    self.assertEqual(len(tableaux), len(expected))
+                    self.assertEqual(set(frozenset(tableau['index']) for tableau in tableaux), expected)
+
+    def test_beta_strategies(self):
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                for strategy in ['queue', 'fewest-new', 'most-constrained', 'defer-temporal']:
+                    for semantic in [False, True]:
+                        tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist', strategy=strategy,
+                                                        semantic=semantic)
+                        for tableau in tableaux or []:
+                            self.assertSaturated(tableau, belief)
+                        witness = Tableau.get_witness(formula_list, belief, strategy=strategy, semantic=semantic)
+                        self.assertEqual(witness is not None, bool(tableaux))
+        p0, p1 = Formula.make_atom('p0'), Formula.make_atom('p1')
+        tableaux = Tableau.get_tableaux([Formula.make_binary(p0, 'v', p1)], False, 'worklist', semantic=True)
+        self.assertEqual([tableau['index'] for tableau in tableaux],
+                         [set([Formula.make_binary(p0, 'v', p1), p0]),
+                          set([Formula.make_binary(p0, 'v', p1), p1, FormulaUtils.get_negation(p0)])])
+        self.assertRaises(ValueError, Tableau.get_tableaux, self.formula_lists[0], False, 'worklist',
+                          strategy='random')
+        self.assertRaises(ValueError, Tableau.get_tableaux, self.formula_lists[0], False, semantic=True)
+
+    def test_beta_verdict(self):
+        # a beta formula whose beta2 is already on the branch holds there, beta1 is not forced on it
+        cases = [['(~p0)', 'q0', '(p0 v q0)'],
+                 ['(((F(p0vq2))vr3)->(G(falsev(~q2))))', '(p0Uq2)', '(k2((falseWq2)U(p0vp1)))']]
+        formula_lists = self.formula_lists + [[FormulaUtils.normalize_formula(Grammar.get_formula(
+            Grammar.parse_formula(formula))) for formula in case] for case in cases]
+        for formula_list in formula_lists:
+            for belief in [False, True]:
+                verdict = bool(Tableau.get_tableaux(formula_list, belief))
+                self.assertEqual(bool(Tableau.get_tableaux(formula_list, belief, 'bitset')), verdict)
+                for strategy in ['queue', 'fewest-new', 'most-constrained', 'defer-temporal']:
+                    for semantic in [False, True]:
+                        self.assertEqual(bool(Tableau.get_tableaux(formula_list, belief, 'worklist',
+                                                                   strategy=strategy, semantic=semantic)), verdict)
+        for formula_list in formula_lists[-2:]:
+            self.assertTrue(Tableau.get_tableaux(formula_list, False))
+
+    def test_backjumping(self):
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                for semantic in [False, True]:
+                    self.assertEqual(Tableau.get_tableaux(formula_list, belief, 'worklist', semantic=semantic,
+                                                          backjump=True),
+                                     Tableau.get_tableaux(formula_list, belief, 'worklist', semantic=semantic))
+                    self.assertEqual(Tableau.get_witness(formula_list, belief, semantic=semantic, backjump=True),
+                                     Tableau.get_witness(formula_list, belief, semantic=semantic))
+        case = '((p0 v q0) ^ ((p1 v q1) ^ ((s0 v s1) ^ (((~s0) v s1) ^ ((s0 v (~s1)) ^ ((~s0) v (~s1)))))))'
+        formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+        stats, backjump_stats = {}, {}
+        self.assertFalse(Tableau.get_tableaux(formula_list, False, 'worklist', stats=stats))
+        self.assertFalse(Tableau.get_tableaux(formula_list, False, 'worklist', stats=backjump_stats, backjump=True))
+        self.assertGreater(backjump_stats['backjumped branches'], 0)
+        self.assertLess(backjump_stats['branches'] - backjump_stats['backjumped branches'], stats['branches'])
+        self.assertRaises(ValueError, Tableau.get_tableaux, formula_list, False, 'parallel', backjump=True)
+
+    def test_budget(self):
+        case = '((p0 v q0) ^ ((p1 v q1) ^ ((p2 v q2) ^ (p3 v q3))))'
+        formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+        for engine in ['dict', 'bitset', 'worklist']:
+            result = Tableau.get_tableaux_result(formula_list, False, Budget.Budget(branches=4), engine=engine)
+            self.assertEqual(result['status'], 'unknown')
+            self.assertEqual(result['reason'], 'branches')
+            self.assertIsNone(result['tableaux'])
+            self.assertEqual(result['usage']['branches'], 5)
+            result = Tableau.get_tableaux_result(formula_list, False, Budget.Budget(seconds=60, branches=1000),
+                                                 engine=engine)
+            self.assertEqual(result['status'], 'done')
+            self.assertEqual(result['tableaux'], Tableau.get_tableaux(formula_list, False, engine))
+        self.assertRaises(Budget.BudgetExceeded, list,
+                          Tableau.iter_tableaux(formula_list, False, budget=Budget.Budget(branches=2)))
+
+    def test_checkpoint(self):
+        case = '((p0 v q0) ^ ((p1 v q1) ^ ((p2 v q2) ^ (k1(p3 v q3)))))'
+        formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+        path = os.path.join(tempfile.mkdtemp(), 'tableau.ckpt')
+        for engine in ['dict', 'worklist']:
+            stats = {}
+            tableaux = Tableau.get_tableaux(formula_list, False, engine, stats=stats)
+            checkpoint = Checkpoint.Checkpoint(path, interval=0)
+            self.assertRaises(Budget.BudgetExceeded, Tableau.get_tableaux, formula_list, False, engine, stats={},
+                              budget=Budget.Budget(branches=3), checkpoint=checkpoint)
+            self.assertGreater(checkpoint.saves, 0)
+            checkpoint = Checkpoint.Checkpoint(path, resume=True)
+            self.assertEqual(checkpoint.get_resume_point(), (None, 'tableaux'))
+            resumed_stats = {}
+            self.assertEqual(Tableau.get_tableaux(formula_list, False, engine, stats=resumed_stats,
+                                                  checkpoint=checkpoint), tableaux)
+            self.assertEqual(resumed_stats, stats)
+            self.assertIsNone(checkpoint.get_resume_point())
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(path))
+        self.assertRaises(ValueError, Tableau.get_tableaux, formula_list, False, 'bitset', checkpoint=checkpoint)
+
+    def test_checkpoint_budget_stop(self):
+        # a formula stopped by its budget keeps the checkpoint, saved or not yet, and the run is resumed from it
+        formulae = ['((p0 v q0) ^ ((p1 v q1) ^ (k1(p2 v q2))))', 'p3']
+        limits = {'seconds': None, 'branches': None, 'nodes': None, 'memory': None}
+        path = os.path.join(tempfile.mkdtemp(), 'tableau.ckpt')
+
+        def run(checkpoint, branches=None):
+            stdout, sys.stdout = sys.stdout, StringIO()
+            try:
+                TableauVerifier.run_tableau_cli(formulae, True, False, False, 'worklist', False, None, 'none',
+                                                dict(limits, branches=branches), checkpoint)
+                return [line for line in sys.stdout.getvalue().splitlines() if 'took' not in line]
+            finally:
+                sys.stdout = stdout
+
+        expected = run(None)
+        for interval, stage in [(60, 'stopped'), (0, 'tableaux')]:
+            output = run(Checkpoint.Checkpoint(path, interval), branches=2)
+            self.assertIn('unknown: budget exceeded (branches)', output)
+            self.assertEqual(Checkpoint.Checkpoint(path, resume=True).get_resume_point(), (0, stage))
+            self.assertEqual(run(Checkpoint.Checkpoint(path, resume=True)), expected)
+            self.assertFalse(os.path.exists(path))
+
+    def test_get_witness(self):
+        for formula_list in self.formula_lists:
+            for belief in [False, True]:
+                stats = {}
+                witness = Tableau.get_witness(formula_list, belief, stats=stats)
+                tableaux = Tableau.get_tableaux(formula_list, belief, 'worklist')
+                self.assertEqual(witness is not None, bool(tableaux))
+                if witness:
+                    self.assertSaturated(witness, belief)
+                    self.assertIn(witness, tableaux)
+                    self.assertEqual(stats['branches'], stats['closed branches'] + stats['skipped branches'] + 1)
+
+    def test_add_formula(self):
+        p0, k1p0 = Formula.make_atom('p0'), Formula.make_unary('k1', Formula.make_atom('p0'))
+        tableau = {'formulae': [], 'index': set(), 'is_proper': True, 'was_modified': True}
+        self.assertTrue(Tableau.add_formula(tableau, FormulaUtils.get_negation(k1p0)))
+        self.assertTrue(Tableau.add_formula(tableau, p0))
+        self.assertTrue(Tableau.is_proper(tableau))
+        self.assertFalse(Tableau.add_formula(tableau, k1p0))
+        self.assertFalse(Tableau.is_proper(tableau))
+        self.assertEqual([f['formula'] for f in tableau['formulae']], [FormulaUtils.get_negation(k1p0), p0, k1p0])
+        self.assertTrue(Tableau.closes_branch(set(), Formula.make_atom('false')))
+
+    def test_persistent_branch(self):
+        branch = Closure.PersistentBranch()
+        for formula_id in [3, 1, 4]:
+            branch.add(formula_id)
+        new_branch = branch.copy()
+        self.assertIs(new_branch.order, branch.order)  # shared, not copied
+        branch.add(5)
+        new_branch.add(9)
+        self.assertIs(new_branch.order[1], branch.order[1])
+        self.assertEqual(branch.get_order(), [3, 1, 4, 5])
+        self.assertEqual(new_branch.get_order(), [3, 1, 4, 9])
+        self.assertTrue(5 in branch and 5 not in new_branch and 4 in new_branch)
+
+    def test_copy_tableau(self):
+        tableau = Tableau.build_initial_tableau(self.formula_lists[0])['tableaux'][0]
+        new_tableau = Tableau.copy_tableau(tableau)
+        self.assertEqual(new_tableau, tableau)
+        new_tableau['formulae'][0]['alpha-visited'] = True
+        self.assertFalse(tableau['formulae'][0]['alpha-visited'])
+        self.assertIs(new_tableau['formulae'][0]['formula'], tableau['formulae'][0]['formula'])
+
+    def test_records(self):
+        p0 = Formula.make_atom('p0')
+        entry = Records.BranchEntry(p0)
+        self.assertFalse(entry['alpha-visited'])
+        entry['alpha-visited'] = True
+        self.assertEqual(entry.flags, Records.ALPHA_VISITED)
+        self.assertEqual(entry.to_dict(), {'formula': p0, 'alpha-visited': True, 'beta-visited': False,
+                                           'sub-complete-visited': False})
+        self.assertEqual(entry, Records.BranchEntry(p0, Records.ALPHA_VISITED))
+        self.assertNotEqual(entry, Records.BranchEntry(p0))
+        self.assertNotEqual(entry, Records.StateEntry(p0, Records.K_VISITED))
+        self.assertEqual(pickle.loads(pickle.dumps(entry)), entry)
+        state_entry = Records.StateEntry(p0, Records.K_VISITED | Records.N_VISITED)
+        self.assertEqual(repr(state_entry), repr({'formula': p0, 'k_visited': True, 'b_visited': False,
+                                                  'n_visited': True}))  # same graph node names
+
+    def test_state_graph(self):
+        states = [[Records.StateEntry(Formula.make_atom(name))] for name in ['p0', 'p1', 'p2']]
+        graph = StateGraph.StateGraph()
+        ids = [graph.add_state(state)[0] for state in states]
+        self.assertEqual(graph.add_state([Records.StateEntry(Formula.make_atom('p1'))]), (ids[1], False))
+        self.assertTrue(graph.add_edge(ids[0], ids[1], 'n'))
+        self.assertFalse(graph.add_edge(ids[0], ids[1], 'n'))
+        self.assertTrue(graph.add_edge(ids[0], ids[1], 'R1'))  # same states, another label
+        self.assertTrue(graph.add_edge(ids[0], ids[2], 'R1'))
+        self.assertTrue(graph.add_edge(ids[2], ids[2], 'n'))
+        self.assertEqual(graph.get_successors(ids[0], 'n'), [ids[1]])
+        self.assertEqual(graph.get_successors(ids[0], 'R1'), [ids[1], ids[2]])
+        self.assertEqual(graph.get_successors(ids[1], 'R2'), [])
+        self.assertEqual(graph.get_predecessors(ids[2]), set([ids[0], ids[2]]))
+        G = graph.to_networkx()
+        self.assertEqual((G.number_of_nodes(), G.number_of_edges()), (3, 4))
+        self.assertEqual(sorted(data['label'] for data in G[ids[0]][ids[1]].values()), ['R1', 'n'])
+        graph.remove_state(ids[2])
+        self.assertEqual(list(graph), ids[:2])
+        self.assertEqual((graph.number_of_nodes(), graph.number_of_edges()), (2, 2))
+        self.assertEqual(graph.get_successors(ids[0], 'R1'), [ids[1]])
+        self.assertIsNone(graph.get_id(states[2]))
+
+    def test_state_graph_labels(self):
+        # fingerprinted, the R1 and the n successor of the first state are the same state, both edges are needed
+        case = '((~(k1p0)) ^ ((N(~(k1p0))) ^ (N(~p0))))'
+        formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+        states, agents_list = Graph.build_states(Tableau.get_tableaux(formula_list, False))
+        graph = StateGraph.StateGraph(agents_list=agents_list, identity='fingerprint')
+        for state in states:
+            Graph.add_state(graph, state)
+        Graph.build_successors(graph, False)
+        self.assertEqual(graph.get_successors(0, 'n'), graph.get_successors(0, 'R1'))
+        Graph.contract_graph(graph, False)
+        self.assertEqual(list(graph), [0, 1])
+
+    def test_state_identity(self):
+        p0, p1 = Formula.make_atom('p0'), Formula.make_atom('p1')
+        graph = StateGraph.StateGraph(identity='fingerprint')
+        state_id = graph.add_state([Records.StateEntry(p0), Records.StateEntry(p1)])[0]
+        self.assertEqual(graph.add_state([Records.StateEntry(p1), Records.StateEntry(p0, Records.K_VISITED)]),
+                         (state_id, False))
+        self.assertEqual((len(graph), graph.merged), (1, 1))
+        named = StateGraph.StateGraph()
+        named.add_state([Records.StateEntry(p0), Records.StateEntry(p1)])
+        self.assertTrue(named.add_state([Records.StateEntry(p1), Records.StateEntry(p0)])[1])
+        self.assertEqual((len(named), named.merged), (2, 0))
+
+    def test_state_identity_contract(self):
+        # the successors of the first state reach the same state by R1 and by n, fingerprinted it is one node
+        for case in ['((~(k1p0)) ^ ((N(~(k1p0))) ^ (N(~p0))))', '((Gp0)^(p2vp1))', '((G(~p0))^(Fp0))']:
+            formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+            contracted = []
+            for identity in StateGraph.IDENTITIES:
+                states, agents_list = Graph.build_states(Tableau.get_tableaux(formula_list, False))
+                graph = StateGraph.StateGraph(agents_list=agents_list, identity=identity)
+                for state in states:
+                    Graph.add_state(graph, state)
+                Graph.contract_graph(Graph.build_successors(graph, False), False)
+                contracted.append(set(StateGraph.get_fingerprint(graph.states[node]) for node in graph))
+            self.assertEqual(contracted[0], contracted[1])
+
+    def test_successor_cache(self):
+        Graph.clear_successor_caches()
+        p0, q0 = Formula.make_atom('p0'), FormulaUtils.normalize_formula(Formula.make_unary('F', Formula.make_atom('q0')))
+        states = Graph.get_successor_states([p0, q0], False, identity='fingerprint')
+        again = Graph.get_successor_states([q0, p0], False, identity='fingerprint')
+        self.assertEqual(again, states)
+        self.assertIsNot(again[0][0], states[0][0])  # the visited flags of every node are its own
+        Graph.get_successor_states([q0, p0], True, identity='fingerprint')  # another key
+        stats = Graph.get_successor_cache_stats()['successor states']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        Graph.get_successor_states([q0, p0], False)
+        self.assertEqual(Graph.get_successor_cache_stats()['successor states']['misses'], 3)
+
+    def test_successor_frontier(self):
+        formula = Formula.make_atom('q')
+        for level in range(5):
+            formula = Formula.make_unary('N', Formula.make_binary(Formula.make_atom('p' + str(level)), '^', formula))
+        states, agents_list = Graph.build_states(Tableau.get_tableaux([FormulaUtils.normalize_formula(formula)], False))
+        graph = StateGraph.StateGraph(agents_list=agents_list)
+        for state in states:
+            Graph.add_state(graph, state)
+        Graph.build_successors(graph, False)
+        self.assertEqual((graph.number_of_nodes(), graph.number_of_edges()), (6, 5))
+        self.assertTrue(all(Graph.is_expanded(graph, node, False) for node in graph))
+
+    def test_belief_successors(self):
+        # the negated knowledge formula of the agent already built its successor, multi digit agents too
+        for agent in ['1', '12']:
+            case = '((k{0}p0) ^ (~(k{0}q0)))'.format(agent)
+            formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+            states, agents_list = Graph.build_states(Tableau.get_tableaux(formula_list, True))
+            graph = StateGraph.StateGraph(agents_list=agents_list)
+            for state in states:
+                Graph.add_state(graph, state)
+            Graph.build_successors(graph, True)
+            self.assertEqual((graph.number_of_nodes(), graph.number_of_edges()), (2, 2))
+            self.assertEqual(graph.get_successors(0, 'R' + agent), [1])
+
+    def test_contract_engines(self):
+        for case in ['((G(~p0))^(Fp0))', '((N(p0^(Nfalse)))v(Gp1))', '((p0Up1)^(N((Gp0)^(G(~p1)))))']:
+            formula_list = [FormulaUtils.normalize_formula(Grammar.get_formula(Grammar.parse_formula(case)))]
+            contracted = []
+            for engine in Graph.CONTRACT_ENGINES:
+                states, agents_list = Graph.build_states(Tableau.get_tableaux(formula_list, False))
+                graph = StateGraph.StateGraph(agents_list=agents_list)
+                for state in states:
+                    Graph.add_state(graph, state)
+                stats = {}
+                Graph.contract_graph(Graph.build_successors(graph, False), False, engine=engine, stats=stats)
+                contracted.append((sorted(frozenset(entry.formula for entry in graph.states[node]) for node in graph),
+                                   stats['removed states']))
+            self.assertEqual(contracted[0], contracted[1])
+        self.assertRaises(ValueError, Graph.contract_graph, graph, False, engine='none')
+
+    def test_closure(self):
+        closure = Closure.Closure()
+        p0, k1p0 = Formula.make_atom('p0'), Formula.make_unary('k1', Formula.make_atom('p0'))
+        negated_p0_id = closure.get_id(FormulaUtils.get_negation(p0))
+        self.assertEqual(closure.get_id(p0) + 1, negated_p0_id)
+        self.assertIs(closure.get_formula(negated_p0_id), FormulaUtils.get_negation(p0))
+        mask = 1 << closure.get_id(p0) | 1 << closure.get_id(k1p0)
+        self.assertFalse(closure.is_closed(mask))
+        self.assertTrue(closure.is_closed(mask | 1 << closure.get_id(FormulaUtils.get_negation(k1p0))))
+        self.assertFalse(closure.is_closed(1 << negated_p0_id | 1 << closure.get_id(k1p0)))
+        self.assertTrue(closure.is_closed(1 << closure.get_id(Formula.make_atom('false'))))
 
 
 if __name__ == '__main__':
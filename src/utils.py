@@ -17,6 +17,22 @@ def flatten(lis):
                 continue
 
 
+def flatten_iterative(lis):
+    '''
+    Same as flatten with an explicit stack of iterators, for very deep lists
+    '''
+    stack = [iter(lis)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, Iterable) and not isinstance(item, basestring):
+                stack.append(iter(item))
+                break
+            elif item != 'binary':
+                yield item
+        else:
+            stack.pop()
+
+
 def new_deepcopy(obj):  # deep copy (recursive) of simple dictionary/list types
     if isinstance(obj, dict):
         d = obj.copy()  # shallow dict copy
@@ -33,6 +49,97 @@ def new_deepcopy(obj):  # deep copy (recursive) of simple dictionary/list types
     return d
 
 
+class LRUCache(object):
+    '''
+    Bounded mapping that evicts the least recently used entry, with hit/miss counters.
+    Entries live in a circular doubly linked list of [previous, next, key, value] links
+    '''
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._links = {}
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None]
+
+    def __len__(self):
+        return len(self._links)
+
+    def __contains__(self, key):
+        return key in self._links
+
+    def get(self, key, default=None):
+        link = self._links.get(key)
+        if link is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        link_previous, link_next, _, value = link
+        link_previous[1] = link_next  # move the link to the most recently used end
+        link_next[0] = link_previous
+        last = self._root[0]
+        last[1] = self._root[0] = link
+        link[0] = last
+        link[1] = self._root
+        return value
+
+    def put(self, key, value):
+        link = self._links.get(key)
+        if link is not None:
+            link[3] = value
+            return
+        last = self._root[0]
+        link = [last, self._root, key, value]
+        last[1] = self._root[0] = self._links[key] = link
+        while len(self._links) > self.maxsize:
+            self._evict_oldest()
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self._links) > maxsize:
+            self._evict_oldest()
+
+    def clear(self):
+        self._links.clear()
+        self._root[:] = [self._root, self._root, None, None]
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._links), 'maxsize': self.maxsize}
+
+    def _evict_oldest(self):
+        oldest = self._root[1]
+        self._root[1] = oldest[1]
+        oldest[1][0] = self._root
+        del self._links[oldest[2]]
+        self.evictions += 1
+
+
+_MISSING = object()
+
+
+def lru_memoize(cache):
+    '''
+    Memoize a one argument function on cache, recursive calls through the module name hit it too
+    :param cache: LRUCache where results are kept, keyed on the argument
+    :return: decorator
+    '''
+    def decorator(func):
+        def memoized_func(key):
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(key)
+                cache.put(key, value)
+            return value
+        memoized_func.__name__ = func.__name__
+        memoized_func.__doc__ = func.__doc__
+        memoized_func.cache = cache
+        return memoized_func
+    return decorator
+
+
 class timewith():
     def __init__(self, name=''):
         self.name = name